@@ -1,15 +1,16 @@
+import asyncio
 from core.mcp.handler import mcp_registry
+from core.lazy import lazy
 from core.llm.client import get_llm_client
-import json
-from . import document_analyzer
+from core.llm.constrained import parse_json
 from .pipeline import AnalyzerPipeline
 
-llm = get_llm_client()
+llm = lazy("llm", get_llm_client)
 
-QUERY_ANALYSIS_PROMPT = """
+# Fixed instructions first so their KV cache can be reused across queries
+QUERY_ANALYSIS_PREFIX = """
 You are a Gatekeeper and Analyzer AI.
-Analyze the following user query:
-"{query}"
+Analyze the user query given at the end.
 
 1. Validate intent: Is this related to insurance regulations? (Yes/No)
 2. Classify: 
@@ -18,14 +19,19 @@ Analyze the following user query:
 3. Extract Entities: Region (e.g., Tunisia, Europe), Topic (e.g., Car, Health).
 
 Return ONLY a valid JSON object:
-{{
+{
   "is_valid": true,
   "classification": "RAG" or "GraphRAG",
-  "entities": {{
+  "entities": {
     "region": ["Region1"],
     "topic": "Topic"
-  }}
-}}
+  }
+}
+"""
+
+QUERY_ANALYSIS_PROMPT = """
+User query:
+"{query}"
 """
 
 async def analyze_query(query: str) -> dict:
@@ -33,17 +39,12 @@ async def analyze_query(query: str) -> dict:
     Analyze user query to determine intent and routing.
     """
     prompt = QUERY_ANALYSIS_PROMPT.format(query=query)
-    response = llm.generate(prompt)
-    
-    # Simple JSON extraction
-    try:
-        import re
-        match = re.search(r'\{.*\}', response, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-    except Exception:
-        pass
-    
+    response = await (await llm.aget()).agenerate_json(prompt, task="query_analysis", prefix=QUERY_ANALYSIS_PREFIX)
+
+    parsed = parse_json(response, expect="object")
+    if isinstance(parsed, dict):
+        return parsed
+
     # Fallback
     return {"is_valid": True, "classification": "RAG", "entities": {}}
 
@@ -51,11 +52,11 @@ mcp_registry.register_tool("analyze_query", analyze_query)
 print("Analyzer Agent initialized.")
 
 # Register processing tools
-pipeline = AnalyzerPipeline()
+pipeline = lazy("analyzer.pipeline", AnalyzerPipeline)
 
 
 async def process_new_documents():
-  return pipeline.process_new_files()
+  return await asyncio.to_thread(lambda: pipeline.process_new_files())
 
 
 mcp_registry.register_tool("analyzer.process_new_files", process_new_documents)
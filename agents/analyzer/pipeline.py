@@ -1,26 +1,40 @@
-import os
-import hashlib
 import yaml
-import json
-import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from ingestion.pdf_loader import IngestionPipeline
 from processing.chunker import DocumentChunker
 from core.llm.client import get_llm_client
+from core.llm.constrained import parse_json
+from core.embedding.service import get_embedding_service
+from agents.rag.ids import point_id
+from agents.rag.vector_store import get_vector_store
 
-from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
-from qdrant_client.http import models as qmodels
-
-DEFAULT_QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 DEFAULT_COLLECTION = "regulations_chunks"
 
+# Single-pass enrichment: fixed instructions (prefix-cacheable) followed by the chunk text
+ENRICHMENT_PREFIX = """You are an insurance regulation analyst.
+Analyze the text given at the end and return ONLY a JSON object with exactly these keys:
+{
+  "summary": "a concise paragraph summarizing the text",
+  "keywords": ["5-10 key insurance terms and concepts"],
+  "questions": ["3-5 hypothetical questions the text could answer"],
+  "requirements": ["explicit requirements, obligations or normative statements"],
+  "policy_type": "Auto, Health, Life, Property, or General",
+  "clause_type": "Requirement, Coverage, Exclusion, Procedure, or Definition"
+}
+Use an empty list for "requirements" if the text states none.
+
+Text:
+"""
+
 
 class AnalyzerPipeline:
     # Enrichment configuration constants
     MAX_KEYWORDS = 10
     MAX_QUESTIONS = 5
+    POLICY_TYPES = ("Auto", "Health", "Life", "Property", "General")
+    CLAUSE_TYPES = ("Requirement", "Coverage", "Exclusion", "Procedure", "Definition")
     
     def __init__(self, config_path="configs/config.yaml"):
         with open(config_path, "r") as f:
@@ -31,71 +45,31 @@ class AnalyzerPipeline:
         self.chunker = DocumentChunker(config_path=config_path)
         self.llm = get_llm_client()
 
-        # Embedding model (HF all-MiniLM-L6-v2)
-        self.embedder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-        self.qdrant_url = cfg.get("qdrant", {}).get("url", DEFAULT_QDRANT_URL)
-        self.q_client = QdrantClient(url=self.qdrant_url)
-        self.collection_name = cfg.get("qdrant", {}).get("collection", DEFAULT_COLLECTION)
+        # "single_pass" asks for all enrichment fields in one JSON generation;
+        # "per_field" issues one call per field
+        acfg = cfg.get("analyzer", {}) or {}
+        self.enrichment_mode = acfg.get("enrichment_mode", "single_pass")
+        self.enrichment_max_new_tokens = acfg.get("enrichment_max_new_tokens", 768)
+        # Runs independent enrichment calls concurrently so the LLM batcher can group them
+        self.pool = ThreadPoolExecutor(max_workers=5)
+        # Chunks of a file are enriched concurrently on their own pool (the per-field
+        # fallbacks above block on self.pool, so sharing it could deadlock)
+        self.chunk_pool = ThreadPoolExecutor(max_workers=acfg.get("enrichment_concurrency", 8))
 
-        # Ensure collection exists (create with appropriate vector size)
-        try:
-            dim = self.embedder.get_sentence_embedding_dimension()
-        except Exception:
-            # Fallback to known dim
-            dim = 384
+        # Shared embedding service (HF all-MiniLM-L6-v2)
+        self.embedder = get_embedding_service()
+        self.collection_name = cfg.get("qdrant", {}).get("collection", DEFAULT_COLLECTION)
+        # Vector store from vector_store.backend; the Qdrant backend creates the collection
+        # (HNSW, quantization, sparse vectors) and its payload indexes if needed
+        self.store = get_vector_store(self.collection_name, self.embedder.dim, cfg)
 
-        # Create collection safely: check existing collections first
-        try:
-            exists = False
-            try:
-                collections = self.q_client.get_collections()
-                cols = getattr(collections, 'collections', [])
-                for c in cols:
-                    # c may be namedtuple/object or dict
-                    name = getattr(c, 'name', None) or c.get('name') if isinstance(c, dict) else None
-                    if name == self.collection_name:
-                        exists = True
-                        break
-            except Exception:
-                # Fallback to try to get collection directly
-                try:
-                    _ = self.q_client.get_collection(self.collection_name)
-                    exists = True
-                except Exception:
-                    exists = False
-
-            if not exists:
-                params = qmodels.VectorParams(size=dim, distance=qmodels.Distance.COSINE)
-                try:
-                    self.q_client.create_collection(collection_name=self.collection_name, vectors_config=params)
-                except Exception:
-                    # If create_collection not available, try recreate_collection as last resort
-                    try:
-                        self.q_client.recreate_collection(collection_name=self.collection_name, vectors_config=params)
-                    except Exception:
-                        pass
-        except Exception:
-            # ignore collection creation errors here; operations will fail later if needed
-            pass
-
-    def _make_id(self, metadata: dict, text: str) -> str:
-        base = f"{metadata.get('filename','')}-{metadata.get('chunk_id','')}-{text[:64]}"
-        return hashlib.sha1(base.encode("utf-8")).hexdigest()
+    def _make_id(self, metadata: dict, text: str, index: int = 0) -> str:
+        # Deterministic UUID (Qdrant rejects arbitrary hex strings as point IDs)
+        return point_id(metadata.get("filename", ""), metadata.get("chunk_id", index), text)
 
     def _parse_json_from_llm(self, result: str, expect_array: bool = True):
         """Helper method to extract JSON from LLM response."""
-        try:
-            # Try to extract JSON array or object from response
-            if expect_array:
-                match = re.search(r'\[.*\]', result, re.DOTALL)
-            else:
-                match = re.search(r'\{.*\}', result, re.DOTALL)
-            
-            if match:
-                return json.loads(match.group(0))
-        except Exception:
-            pass
-        return None
+        return parse_json(result, expect="array" if expect_array else "object")
 
     def _summarize(self, text: str) -> str:
         prompt = f"Summarize the following insurance regulation text in a concise paragraph:\n\n{text}"
@@ -106,7 +80,7 @@ class AnalyzerPipeline:
             "Extract 5-10 key insurance terms and concepts from the following text. "
             "Return ONLY a JSON array of keyword strings.\n\n" + text
         )
-        result = self.llm.generate(prompt)
+        result = self.llm.generate_json(prompt, task="keywords")
         parsed = self._parse_json_from_llm(result, expect_array=True)
         if parsed:
             return parsed
@@ -118,7 +92,7 @@ class AnalyzerPipeline:
             "Generate 3-5 hypothetical questions that the following insurance regulation text could answer. "
             "Return ONLY a JSON array of question strings.\n\n" + text
         )
-        result = self.llm.generate(prompt)
+        result = self.llm.generate_json(prompt, task="questions")
         parsed = self._parse_json_from_llm(result, expect_array=True)
         if parsed:
             return parsed
@@ -130,7 +104,7 @@ class AnalyzerPipeline:
             "Extract any explicit requirements, obligations, or normative statements from the following text. "
             "Return as a JSON array of requirement strings.\n\n" + text
         )
-        result = self.llm.generate(prompt)
+        result = self.llm.generate_json(prompt, task="requirements")
         parsed = self._parse_json_from_llm(result, expect_array=True)
         if parsed:
             return parsed
@@ -147,7 +121,7 @@ class AnalyzerPipeline:
             "Text: " + text[:500] + "\n\n"
             "Return ONLY a JSON object with 'policy_type' and 'clause_type' keys."
         )
-        result = self.llm.generate(prompt)
+        result = self.llm.generate_json(prompt, task="classification")
         
         classification = {
             "policy_type": existing_metadata.get("policy_type", "General"),
@@ -155,26 +129,84 @@ class AnalyzerPipeline:
         }
         
         parsed = self._parse_json_from_llm(result, expect_array=False)
-        if parsed:
-            classification.update(parsed)
+        if isinstance(parsed, dict):
+            # Same vocabulary as the single-pass path: filters match on these values
+            if parsed.get("policy_type") in self.POLICY_TYPES:
+                classification["policy_type"] = parsed["policy_type"]
+            if parsed.get("clause_type") in self.CLAUSE_TYPES:
+                classification["clause_type"] = parsed["clause_type"]
         
         return classification
 
-    def _embed(self, text: str):
-        vec = self.embedder.encode(text)
-        return vec
+    def _enrich_single_pass(self, text: str) -> dict:
+        """Ask for every enrichment field in one JSON generation.
 
-    def _upsert_chunk(self, collection: str, chunk_id: str, vector, payload: dict):
-        # Use qdrant PointStruct
-        try:
-            point = qmodels.PointStruct(id=chunk_id, vector=vector.tolist() if hasattr(vector, 'tolist') else vector, payload=payload)
-            self.q_client.upsert(collection_name=collection, points=[point])
-        except Exception:
-            # best-effort: some qdrant versions use different method names
-            try:
-                self.q_client.upsert(collection_name=collection, points=[point])
-            except Exception:
-                pass
+        Returns only the fields that parsed and validated; callers fill the rest.
+        """
+        result = self.llm.generate_json(
+            text, task="enrichment", max_new_tokens=self.enrichment_max_new_tokens, prefix=ENRICHMENT_PREFIX
+        )
+        parsed = self._parse_json_from_llm(result, expect_array=False)
+        if not isinstance(parsed, dict):
+            return {}
+
+        def _str_list(value, limit=None):
+            if not isinstance(value, list):
+                return None
+            items = [str(v).strip() for v in value if str(v).strip()]
+            return items[:limit] if limit else items
+
+        fields = {}
+        summary = parsed.get("summary")
+        if isinstance(summary, str) and summary.strip():
+            fields["summary"] = summary.strip()
+        keywords = _str_list(parsed.get("keywords"), self.MAX_KEYWORDS)
+        if keywords:
+            fields["keywords"] = keywords
+        questions = _str_list(parsed.get("questions"), self.MAX_QUESTIONS)
+        if questions:
+            fields["questions"] = questions
+        # An empty requirements list is a valid answer
+        requirements = _str_list(parsed.get("requirements"))
+        if requirements is not None:
+            fields["requirements"] = requirements
+        policy_type = parsed.get("policy_type")
+        clause_type = parsed.get("clause_type")
+        if policy_type in self.POLICY_TYPES and clause_type in self.CLAUSE_TYPES:
+            fields["classification"] = {"policy_type": policy_type, "clause_type": clause_type}
+        return fields
+
+    def _enrich(self, text: str, metadata: dict) -> dict:
+        """Return summary, keywords, questions, requirements and classification for a chunk.
+
+        In single-pass mode the dedicated per-field calls only run for fields
+        that failed to parse.
+        """
+        fields = {}
+        if self.enrichment_mode == "single_pass":
+            fields = self._enrich_single_pass(text)
+
+        fallbacks = {
+            "summary": (self._summarize, text),
+            "keywords": (self._extract_keywords, text),
+            "questions": (self._generate_questions, text),
+            "requirements": (self._extract_requirements, text),
+            "classification": (self._classify_metadata, text, metadata),
+        }
+        futures = {
+            name: self.pool.submit(*call)
+            for name, call in fallbacks.items() if name not in fields
+        }
+        for name, future in futures.items():
+            fields[name] = future.result()
+        return fields
+
+    def _embed(self, chunks):
+        """Encode all chunks as one (n, dim) float32 matrix, reusing pooled or stored vectors."""
+        return self.embedder.encode_documents(
+            [c.page_content for c in chunks],
+            precomputed=[getattr(c, "vector", None) for c in chunks],
+        )
 
     def process_file(self, object_name: str):
         docs = self.ingest.download_and_load(object_name)
@@ -184,49 +216,62 @@ class AnalyzerPipeline:
         # Chunk
         chunks = self.chunker.chunk_documents(docs)
 
+        # Embed every chunk in one batched pass
+        embeddings = self._embed(chunks)
+
+        # Enrich every chunk (summary, keywords, questions, requirements,
+        # policy/clause classification) with up to `enrichment_concurrency`
+        # chunks in flight; results come back in chunk order
+        enrichments = self.chunk_pool.map(lambda c: self._enrich(c.page_content, c.metadata), chunks)
+
+        # Points are buffered and upserted in concurrent batches while enrichment runs
+        writer = self.store.writer()
         enriched_chunks = []
-        for c in chunks:
-            text = c.page_content
-            metadata = c.metadata
-
-            # Enrich chunk with all required fields
-            summary = self._summarize(text)
-            keywords = self._extract_keywords(text)
-            questions = self._generate_questions(text)
-            requirements = self._extract_requirements(text)
-            
-            # Classify policy and clause type
-            classification = self._classify_metadata(text, metadata)
-            
-            # Generate embedding
-            embedding = self._embed(text)
-
-            # Create unique chunk ID
-            chunk_id = self._make_id(metadata, text)
-
-            # Build enriched chunk structure matching the spec
-            enriched_chunk = {
-                "chunk_id": chunk_id,
-                "text": text,
-                "summary": summary,
-                "keywords": keywords,
-                "questions": questions,
-                "country": metadata.get("country", "Unknown"),
-                "policy_type": classification.get("policy_type", "General"),
-                "clause_type": classification.get("clause_type", "Requirement"),
-                "extracted_requirements": requirements,
-                "source": {
-                    "document": metadata.get("filename", object_name),
-                    "page": metadata.get("page", 0),
-                    "section": metadata.get("section", "")
-                },
-                "embedding": embedding.tolist() if hasattr(embedding, 'tolist') else embedding,
-                "metadata": metadata  # Keep original metadata for compatibility
-            }
-
-            # Upsert to Qdrant
-            self._upsert_chunk(self.collection_name, chunk_id, embedding, enriched_chunk)
-            enriched_chunks.append(enriched_chunk)
+        try:
+            for i, (c, embedding, enrichment) in enumerate(zip(chunks, embeddings, enrichments)):
+                text = c.page_content
+                metadata = c.metadata
+
+                summary = enrichment["summary"]
+                keywords = enrichment["keywords"]
+                questions = enrichment["questions"]
+                requirements = enrichment["requirements"]
+                classification = enrichment["classification"]
+
+                # Create unique chunk ID
+                chunk_id = self._make_id(metadata, text, i)
+
+                # Build enriched chunk structure matching the spec
+                enriched_chunk = {
+                    "chunk_id": chunk_id,
+                    "text": text,
+                    "summary": summary,
+                    "keywords": keywords,
+                    "questions": questions,
+                    "country": metadata.get("country", "Unknown"),
+                    "policy_type": classification.get("policy_type", "General"),
+                    "clause_type": classification.get("clause_type", "Requirement"),
+                    "doc_type": metadata.get("doc_type", ""),
+                    "filename": metadata.get("filename", object_name),
+                    "extracted_requirements": requirements,
+                    "source": {
+                        "document": metadata.get("filename", object_name),
+                        "page": metadata.get("page", 0),
+                        "section": metadata.get("section", "")
+                    },
+                }
+
+                # Upsert to the vector store
+                writer.add(chunk_id, embedding, enriched_chunk)
+                enriched_chunks.append(enriched_chunk)
+        finally:
+            # Cancel enrichments not started yet and flush what was enriched; a failed
+            # file is not marked processed, so the next run re-indexes it in full
+            enrichments.close()
+            upsert_stats = writer.close()
+        if upsert_stats["failed"]:
+            # Leave the file unprocessed so the next run retries it
+            return {"status": "upsert_failed", "file": object_name, "upsert": upsert_stats}
 
         # Mark processed
         self.ingest.mark_as_processed(object_name)
@@ -234,6 +279,7 @@ class AnalyzerPipeline:
             "status": "processed", 
             "file": object_name, 
             "chunks_indexed": len(chunks),
+            "upsert": upsert_stats,
             "enriched_chunks": enriched_chunks
         }
 
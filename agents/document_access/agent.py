@@ -1,10 +1,12 @@
+import asyncio
 from core.mcp.handler import mcp_registry
+from core.lazy import lazy
 from agents.document_access.minio import MinioHandler
 from agents.document_access.metadata import MetadataManager
 import pypdf
 
-minio = MinioHandler()
-metadata_mgr = MetadataManager()
+minio = lazy("documents.minio", MinioHandler)
+metadata_mgr = lazy("documents.metadata", MetadataManager)
 
 # --- MCP Tools ---
 
@@ -13,7 +15,7 @@ async def list_available_documents() -> list:
     List all regulatory documents available in MinIO.
     Returns a list of file metadata.
     """
-    return minio.list_documents()
+    return await asyncio.to_thread(lambda: minio.list_documents())
 
 async def get_document_path(filename: str) -> str:
     """
@@ -21,21 +23,21 @@ async def get_document_path(filename: str) -> str:
     """
     import os
     local_path = f"temp_{os.path.basename(filename)}"
-    if minio.download_document(filename, local_path):
+    if await asyncio.to_thread(lambda: minio.download_document(filename, local_path)):
         return local_path
     return ""
 
 async def sync_metadata() -> list:
     """Sync metadata with MinIO and return current list."""
-    return metadata_mgr.sync_with_minio()
+    return await asyncio.to_thread(lambda: metadata_mgr.sync_with_minio())
 
 async def update_doc_metadata(doc_id: str, updates: dict) -> bool:
     """Update metadata for a specific document."""
-    return metadata_mgr.update_document(doc_id, updates)
+    return await asyncio.to_thread(lambda: metadata_mgr.update_document(doc_id, updates))
 
 async def list_metadata() -> list:
     """List all document metadata."""
-    return metadata_mgr.load_metadata()
+    return await asyncio.to_thread(lambda: metadata_mgr.load_metadata())
 
 async def read_document_text(file_path: str) -> str:
     """Read text content from a PDF file."""
@@ -1,13 +1,17 @@
+import asyncio
 from core.mcp.handler import mcp_registry
+from core.lazy import lazy
+from core.llm.executor import get_inference_executor
 from agents.graph_rag.db import Neo4jHandler
 from agents.graph_rag.builder import GraphBuilder
 from agents.graph_rag.qdrant_ingest import QdrantToNeo4jIngestor
 from agents.graph_rag.fusion import GraphRAG
 
-db = Neo4jHandler()
-builder = GraphBuilder(db)
-ingestor = QdrantToNeo4jIngestor()
-grag = GraphRAG()
+# One Neo4j driver and one GraphBuilder shared by every graph component
+db = lazy("graph.neo4j", Neo4jHandler)
+builder = lazy("graph.builder", lambda: GraphBuilder(db.get()))
+ingestor = lazy("graph.ingestor", lambda: QdrantToNeo4jIngestor(db=db.get(), builder=builder.get()))
+grag = lazy("graph.fusion", lambda: GraphRAG(db=db.get()))
 
 # --- MCP Tools ---
 
@@ -16,7 +20,7 @@ async def query_knowledge_graph(cypher_query: str) -> list:
     Execute a direct Cypher query against the Knowledge Graph.
     Useful for retrieval or checking existence of nodes.
     """
-    return db.execute_query(cypher_query)
+    return await asyncio.to_thread(lambda: db.execute_query(cypher_query))
 
 async def compare_policies(policy_a: str, policy_b: str) -> str:
     """
@@ -28,7 +32,7 @@ async def compare_policies(policy_a: str, policy_b: str) -> str:
     OPTIONAL MATCH (a)-[r]-(b)
     RETURN a, b, r
     """
-    result = db.execute_query(query, {"p1": policy_a, "p2": policy_b})
+    result = await asyncio.to_thread(lambda: db.execute_query(query, {"p1": policy_a, "p2": policy_b}))
     # In a real agent, we would pass this result to the LLM to summarize.
     # For now, return raw data.
     return str(result)
@@ -37,28 +41,24 @@ async def build_graph_from_text(text: str, metadata: dict = None) -> bool:
     """
     Trigger the builder to extract entities and relations from text and ingest into Neo4j.
     """
-    return builder.process_text_chunk(text, metadata)
+    # Dominated by the extraction LLM call, so it shares the inference concurrency limit
+    return await get_inference_executor().run(lambda: builder.process_text_chunk(text, metadata))
 
 # Register tools
 mcp_registry.register_tool("graph_query", query_knowledge_graph)
 mcp_registry.register_tool("graph_compare", compare_policies)
 mcp_registry.register_tool("graph_ingest_chunk", build_graph_from_text)
-mcp_registry.register_tool("graph_ingest_from_qdrant", ingestor.ingest_all)
+async def ingest_from_qdrant(max_workers: int = 8, resume: bool = False) -> dict:
+    """Build the graph from every chunk stored in Qdrant (resume=True continues an interrupted run)."""
+    return await asyncio.to_thread(lambda: ingestor.ingest_all(max_workers=max_workers, resume=resume))
 
+mcp_registry.register_tool("graph_ingest_from_qdrant", ingest_from_qdrant)
 
-async def graph_retrieve_fusion(query: str, top_k: int = 5) -> dict:
-    """Perform GraphRAG retrieval fusion and return synthesis."""
-    # Use grag; it needs an embedder - we'll use sentence-transformers here lazily
-    try:
-        from sentence_transformers import SentenceTransformer
-        embedder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    except Exception:
-        embedder = None
-
-    if embedder is None:
-        return {"error": "embedder not available"}
 
-    return grag.retrieve(query, embedder, top_k=top_k)
+async def graph_retrieve_fusion(query: str, top_k: int = 5, filters: dict = None) -> dict:
+    """Perform GraphRAG retrieval fusion and return synthesis."""
+    # grag embeds the query with the shared embedding service; the synthesis runs on the inference executor
+    return await (await grag.aget()).aretrieve(query, top_k=top_k, filters=filters)
 
 
 mcp_registry.register_tool("graph_retrieve_fusion", graph_retrieve_fusion)
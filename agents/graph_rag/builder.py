@@ -25,8 +25,8 @@ class GraphBuilder:
         else:
             enriched_metadata = {}
         
-        prompt = GraphPrompts.get_extraction_prompt(text, enriched_metadata)
-        response = self.llm.generate(prompt)
+        prefix, prompt = GraphPrompts.get_extraction_parts(text, enriched_metadata)
+        response = self.llm.generate(prompt, prefix=prefix)
         
         if response:
             return self._execute_validated_cypher(response)
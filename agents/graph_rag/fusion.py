@@ -1,31 +1,50 @@
-from typing import List, Dict
-from qdrant_client import QdrantClient
+import asyncio
+from typing import List, Dict, Tuple
 from agents.graph_rag.db import Neo4jHandler
 from core.llm.client import get_llm_client
+from core.embedding.service import get_embedding_service
+from agents.rag.collection import relaxed_filters
+from agents.rag.vector_store import SEARCH_PAYLOAD_FIELDS, VectorStore, get_vector_store
 import yaml
 
 
+# Payload fields retrieval fusion reads from each hit; "metadata" holds the
+# country of points ingested before it became a top-level field
+RETRIEVE_PAYLOAD_FIELDS = SEARCH_PAYLOAD_FIELDS + ["summary", "keywords", "metadata"]
+
+
 class GraphRAG:
-    """Retrieval fusion: vector retrieval from Qdrant + graph neighborhood expansion in Neo4j.
+    """Retrieval fusion: vector retrieval (Qdrant or the local store) + graph neighborhood expansion in Neo4j.
 
     Returns combined evidence for downstream summarizers/planners.
     """
 
-    def __init__(self, config_path: str = "configs/config.yaml"):
+    def __init__(self, config_path: str = "configs/config.yaml", db: Neo4jHandler = None,
+                 store: VectorStore = None):
         with open(config_path, "r") as f:
             cfg = yaml.safe_load(f)
 
         qcfg = cfg.get("qdrant", {})
-        self.q_client = QdrantClient(url=qcfg.get("url", "http://localhost:6333"))
         self.collection = qcfg.get("collection", "regulations_chunks")
+        # Retrieval only reads: open the collection the ingestion side provisioned
+        self.store = store or get_vector_store(self.collection, get_embedding_service().dim, cfg, provision=False)
 
-        self.db = Neo4jHandler(config_path=config_path)
+        self.db = db or Neo4jHandler(config_path=config_path)
         self.llm = get_llm_client()
 
-    def _vector_search(self, query_vector, top_k=5):
+    def _vector_search(self, query_vector, top_k=5, filters=None, query_text=None):
+        # Hybrid dense + sparse (RRF) when the query text is given and the store supports it
         try:
-            hits = self.q_client.search(collection_name=self.collection, query_vector=query_vector, limit=top_k)
-            return hits
+            for attempt in relaxed_filters(filters):
+                hits = self.store.search(
+                    query_vector, top_k,
+                    filters=attempt,
+                    query_text=query_text,
+                    with_payload=RETRIEVE_PAYLOAD_FIELDS,
+                )
+                if hits:
+                    return hits
+            return []
         except Exception:
             return []
 
@@ -41,21 +60,25 @@ class GraphRAG:
             results.extend(rows or [])
         return results
 
-    def retrieve(self, query: str, embedder, top_k=5) -> Dict:
-        # 1) embed query using provided embedder
-        q_vec = embedder.encode(query)
+    def _gather(self, query: str, embedder=None, top_k=5, filters=None) -> Tuple[list, list, str]:
+        """Vector hits, graph evidence and the synthesis prompt for `query`."""
+        # 1) embed query (shared embedding service and its query cache unless an embedder is given)
+        if embedder is None:
+            q_vec = get_embedding_service().encode_query(query)
+        else:
+            q_vec = embedder.encode(query)
 
         # 2) vector search
-        vec_hits = self._vector_search(q_vec, top_k=top_k)
+        vec_hits = self._vector_search(q_vec, top_k=top_k, filters=filters, query_text=query)
 
         # extract seed terms from top results (simple heuristic: metadata country+keywords)
         seed_terms = []
         docs = []
         for h in vec_hits:
             payload = getattr(h, 'payload', None) or h.get('payload', {})
-            meta = payload.get('metadata', {})
             docs.append(payload)
-            country = meta.get('country')
+            # country is a top-level payload field (older points only had it under metadata)
+            country = payload.get('country') or (payload.get('metadata') or {}).get('country')
             keywords = payload.get('summary', '')
             if country:
                 seed_terms.append(country)
@@ -73,9 +96,17 @@ class GraphRAG:
             "Given the following document summaries and graph evidence, produce a concise comparison and identify gaps:\n\n"
             "Document Summaries:\n" + context_text + "\n\nGraph Evidence:\n" + graph_text + "\n\nAnswer:"
         )
+        return docs, graph_evidence, synth_prompt
 
+    def retrieve(self, query: str, embedder=None, top_k=5, filters=None) -> Dict:
+        docs, graph_evidence, synth_prompt = self._gather(query, embedder, top_k, filters)
         synthesis = self.llm.generate(synth_prompt)
+        return {"vector_hits": docs, "graph": graph_evidence, "synthesis": synthesis}
 
+    async def aretrieve(self, query: str, embedder=None, top_k=5, filters=None) -> Dict:
+        """Async `retrieve()`: search and graph expansion in a worker thread, synthesis on the inference executor."""
+        docs, graph_evidence, synth_prompt = await asyncio.to_thread(self._gather, query, embedder, top_k, filters)
+        synthesis = await self.llm.agenerate(synth_prompt)
         return {"vector_hits": docs, "graph": graph_evidence, "synthesis": synthesis}
 
 
@@ -3,34 +3,40 @@ class GraphPrompts:
     MAX_TEXT_LENGTH = 1500
     MAX_SUMMARY_LENGTH = 500
     
-    EXTRACTION_TEMPLATE = """You are a Neo4j Graph Agent. Output ONLY valid Cypher. No explanations, no markdown.
+    # Fixed instruction block shared by every extraction call. It comes first
+    # and contains no placeholders so its KV cache can be computed once.
+    EXTRACTION_PREFIX = """You are a Neo4j Graph Agent. Output ONLY valid Cypher. No explanations, no markdown.
 
 SCHEMA:
 Node Labels: Regulation, Article, Obligation, Authority, Entity, Concept, PolicyType, Country, Requirement
 Relationships: APPLIES_TO, REQUIRES, REGULATED_BY, RELATED_TO, COVERS, HAS_POLICY, MENTIONS
 
 SYNTAX RULES (CRITICAL):
-- Nodes MUST be in parentheses: MERGE (r:Regulation {{name: "X"}})
+- Nodes MUST be in parentheses: MERGE (r:Regulation {name: "X"})
 - Relationships use arrows: MERGE (a)-[:RELATED_TO]->(b)
 - Use MERGE to avoid duplicates
 - Separate statements with semicolons
 - NO explanations, just Cypher
+- Use the Country and Policy Type from the ENRICHED METADATA below
 
-ENRICHED METADATA:
+EXAMPLE OUTPUT (for Country: <Country>, Policy Type: <PolicyType>):
+MERGE (c:Country {name: "<Country>"});
+MERGE (p:PolicyType {name: "<PolicyType>"});
+MERGE (c)-[:HAS_POLICY]->(p);
+MERGE (r:Regulation {name: "Insurance Code"});
+MERGE (a:Article {id: "Art. 1"});
+MERGE (r)-[:REQUIRES]->(a);
+
+"""
+
+    # Per-chunk part appended after the prefix
+    EXTRACTION_SUFFIX = """ENRICHED METADATA:
 - Country: {country}
 - Policy Type: {policy_type}
 - Clause Type: {clause_type}
 - Keywords: {keywords}
 - Requirements: {requirements}
 
-EXAMPLE OUTPUT:
-MERGE (c:Country {{name: "{country}"}});
-MERGE (p:PolicyType {{name: "{policy_type}"}});
-MERGE (c)-[:HAS_POLICY]->(p);
-MERGE (r:Regulation {{name: "Insurance Code"}});
-MERGE (a:Article {{id: "Art. 1"}});
-MERGE (r)-[:REQUIRES]->(a);
-
 INPUT TEXT (Summary):
 {summary}
 
@@ -39,8 +45,11 @@ ORIGINAL TEXT (for context):
 
 Generate Cypher:"""
 
+    EXTRACTION_TEMPLATE = EXTRACTION_PREFIX.replace("{", "{{").replace("}", "}}") + EXTRACTION_SUFFIX
+    
     @staticmethod
-    def get_extraction_prompt(text: str, metadata: dict = None) -> str:
+    def get_extraction_parts(text: str, metadata: dict = None) -> tuple:
+        """Return (fixed prefix, per-chunk suffix) of the extraction prompt."""
         meta = metadata or {}
         country = meta.get("country", "Unknown")
         policy_type = meta.get("policy_type", "General")
@@ -59,7 +68,7 @@ Generate Cypher:"""
         truncated = text[:GraphPrompts.MAX_TEXT_LENGTH] if len(text) > GraphPrompts.MAX_TEXT_LENGTH else text
         summary_truncated = summary[:GraphPrompts.MAX_SUMMARY_LENGTH] if len(summary) > GraphPrompts.MAX_SUMMARY_LENGTH else summary
         
-        return GraphPrompts.EXTRACTION_TEMPLATE.format(
+        suffix = GraphPrompts.EXTRACTION_SUFFIX.format(
             text=truncated,
             summary=summary_truncated,
             country=country,
@@ -68,5 +77,9 @@ Generate Cypher:"""
             keywords=keywords_str,
             requirements=requirements_str
         )
+        return GraphPrompts.EXTRACTION_PREFIX, suffix
 
-
+    @staticmethod
+    def get_extraction_prompt(text: str, metadata: dict = None) -> str:
+        prefix, suffix = GraphPrompts.get_extraction_parts(text, metadata)
+        return prefix + suffix
@@ -1,14 +1,27 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import List, Dict
 from qdrant_client import QdrantClient
 from agents.graph_rag.builder import GraphBuilder
 from agents.graph_rag.db import Neo4jHandler
+from agents.rag.scroll import scroll_pages, ScrollCursor
 import yaml
 
+# Payload fields graph ingestion reads ("metadata"/"original_text" only exist on legacy points)
+INGEST_PAYLOAD_FIELDS = [
+    "text", "original_text", "chunk_id", "country", "policy_type", "clause_type",
+    "summary", "keywords", "extracted_requirements", "source", "metadata",
+]
+DEFAULT_CURSOR_PATH = "data/graph_ingest_cursor.json"
+
+logger = logging.getLogger(__name__)
+
 
 class QdrantToNeo4jIngestor:
     """Ingests chunks stored in Qdrant into Neo4j using GraphBuilder."""
 
-    def __init__(self, config_path: str = "configs/config.yaml"):
+    def __init__(self, config_path: str = "configs/config.yaml", db: Neo4jHandler = None, builder: GraphBuilder = None):
         with open(config_path, "r") as f:
             cfg = yaml.safe_load(f)
 
@@ -19,67 +32,151 @@ class QdrantToNeo4jIngestor:
         self.q_client = QdrantClient(url=url)
         self.collection = collection
 
-        self.db = Neo4jHandler(config_path=config_path)
-        self.builder = GraphBuilder(self.db)
-
-    def _iterate_points(self, batch_size=100):
-        # Basic scroll through all points using cursor pagination if needed
-        offset = 0
-        while True:
-            try:
-                res = self.q_client.scroll(collection_name=self.collection, limit=batch_size, offset=offset)
-            except Exception:
-                # Fallback to retrieval without offset if method not available
-                res = self.q_client.get(collection_name=self.collection, limit=batch_size)
-
-            points = getattr(res, 'points', None) or res.get('result', {}).get('points', [])
-            if not points:
-                break
-
-            for p in points:
-                yield p
-
-            offset += batch_size
-
-    def ingest_all(self) -> Dict[str, int]:
+        self.db = db or Neo4jHandler(config_path=config_path)
+        self.builder = builder or GraphBuilder(self.db)
+        self.cursor = ScrollCursor(qcfg.get("graph_ingest_cursor", DEFAULT_CURSOR_PATH), collection)
+
+    def _iterate_pages(self, batch_size=100, offset=None):
+        """Pages of points (payload fields only, next page prefetched) and their resume cursor."""
+        return scroll_pages(
+            self.q_client,
+            self.collection,
+            page_size=batch_size,
+            with_payload=INGEST_PAYLOAD_FIELDS,
+            offset=offset,
+        )
+
+    def _iterate_points(self, batch_size=100, offset=None):
+        for points, _ in self._iterate_pages(batch_size, offset):
+            yield from points
+
+    def _ingest_pages(self, batch_size, offset, finished, retry):
+        """`(points, retried IDs, cursor position after the page)` in ingest order.
+
+        Points that failed in the previous run are fetched by ID first; the
+        scroll then continues from `offset` unless it had already finished.
+        """
+        for start in range(0, len(retry), batch_size):
+            ids = retry[start:start + batch_size]
+            points = self.q_client.retrieve(
+                collection_name=self.collection,
+                ids=ids,
+                with_payload=INGEST_PAYLOAD_FIELDS,
+                with_vectors=False,
+            )
+            yield points, ids, (offset, finished)
+        if finished:
+            return
+        for points, next_offset in self._iterate_pages(batch_size, offset):
+            yield points, [], (next_offset, next_offset is None)
+
+    def ingest_all(self, max_workers: int = 8, resume: bool = False, batch_size: int = 100) -> Dict[str, int]:
+        """Ingest every point, running up to `max_workers` extractions
+        concurrently and submitting more as earlier ones finish.
+
+        The cursor of the first page not fully ingested yet is saved as the
+        job advances, with the IDs of the points before it whose extraction
+        failed. With resume=True those points are retried and the scroll
+        starts from the cursor. It is cleared once every point has been
+        ingested.
+        """
         count = 0
         success = 0
-        for p in self._iterate_points():
-            payload = getattr(p, 'payload', None) or p.get('payload', {})
-            
-            # Handle enriched chunk structure
-            text = payload.get('text') or payload.get('original_text')
-            
-            # Build metadata for Neo4j from enriched structure
-            metadata = {
-                "chunk_id": payload.get("chunk_id", ""),
-                "country": payload.get("country", "Unknown"),
-                "policy_type": payload.get("policy_type", "General"),
-                "clause_type": payload.get("clause_type", "Requirement"),
-                "summary": payload.get("summary", ""),
-                "keywords": payload.get("keywords", []),
-                "extracted_requirements": payload.get("extracted_requirements", []),
-                "source": payload.get("source", {}),
-            }
-            
-            # Fallback to legacy metadata if enriched structure not present
-            if not text:
-                text = payload.get('original_text')
-                if payload.get('metadata'):
-                    metadata.update(payload.get('metadata', {}))
-
-            if not text:
-                continue
-
-            count += 1
-            try:
-                ok = self.builder.process_text_chunk(text, metadata)
-                if ok:
-                    success += 1
-            except Exception as e:
-                print(f"Graph ingest error for point {p.get('id', '')}: {e}")
-
-        return {"total": count, "ingested": success}
+        pending = set()
+        # Point ID of each submitted extraction, for error reports
+        point_ids = {}
+        # Points whose extraction raised or returned False
+        failed = set()
+        # (futures of a fully submitted page, retried IDs, cursor after that page), in ingest order
+        pages = deque()
+        offset, finished, retry = None, False, []
+        if resume:
+            offset, finished, retry = self.cursor.load(), self.cursor.finished(), self.cursor.failed()
+        if offset is not None or retry:
+            print(f"Resuming graph ingestion of {self.collection} from {offset} ({len(retry)} failed points to retry)")
+        # Failed IDs of the previous run not retried yet stay recorded in the cursor
+        outstanding = set(retry)
+
+        def _drain(limit):
+            nonlocal pending, success
+            while len(pending) > limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    point = point_ids.pop(future, None)
+                    try:
+                        if future.result():
+                            success += 1
+                            continue
+                    except Exception as e:
+                        logger.error("Graph ingest error for point %s: %s", point, e)
+                    failed.add(point)
+            # Advance the saved cursor past every page whose points are all done
+            while pages and all(f.done() for f in pages[0][0]):
+                _, retried, (next_offset, end) = pages.popleft()
+                outstanding.difference_update(retried)
+                self.cursor.save(next_offset, failed=sorted(failed | outstanding, key=str), finished=end)
+
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        for page, retried, position in self._ingest_pages(batch_size, offset, finished, retry):
+            page_futures = []
+            for p in page:
+                future = self._submit(pool, p)
+                if future is None:
+                    continue
+                count += 1
+                point_ids[future] = self._point_id(p)
+                page_futures.append(future)
+                pending.add(future)
+                _drain(max_workers * 2)
+            # Only a fully submitted page may move the cursor past its points
+            pages.append((page_futures, retried, position))
+            _drain(max_workers * 2)
+
+        _drain(0)
+        pool.shutdown()
+        if failed:
+            # Keep the failed IDs so a resume=True run retries them without rescanning
+            self.cursor.save(None, failed=sorted(failed, key=str), finished=True)
+            print(f"{len(failed)} points failed graph extraction; run with resume=True to retry them")
+        else:
+            self.cursor.clear()
+        return {"total": count, "ingested": success, "failed": len(failed)}
+
+    def _submit(self, pool, p):
+        """Submit a point's graph extraction; None if the point has no text."""
+        # Records with an empty payload carry None rather than a dict
+        payload = (p.get('payload') if isinstance(p, dict) else getattr(p, 'payload', None)) or {}
+        # Handle enriched chunk structure
+        text = payload.get('text') or payload.get('original_text')
+
+        # Build metadata for Neo4j from enriched structure
+        metadata = {
+            "chunk_id": payload.get("chunk_id", ""),
+            "country": payload.get("country", "Unknown"),
+            "policy_type": payload.get("policy_type", "General"),
+            "clause_type": payload.get("clause_type", "Requirement"),
+            "summary": payload.get("summary", ""),
+            "keywords": payload.get("keywords", []),
+            "extracted_requirements": payload.get("extracted_requirements", []),
+            "source": payload.get("source", {}),
+        }
+
+        # Fallback to legacy metadata if enriched structure not present
+        if not text:
+            text = payload.get('original_text')
+            if payload.get('metadata'):
+                metadata.update(payload.get('metadata', {}))
+
+        if not text:
+            return None
+
+        return pool.submit(self.builder.process_text_chunk, text, metadata)
+
+    @staticmethod
+    def _point_id(p):
+        if isinstance(p, dict):
+            return p.get('id', '')
+        return getattr(p, 'id', '')
 
 
 __all__ = ["QdrantToNeo4jIngestor"]
@@ -6,20 +6,16 @@ import agents.graph_rag.agent
 import agents.rag.agent
 import agents.analyzer.agent
 import agents.summarizer.agent
+from agents.rag.collection import RAG_FILTER_FIELDS, filters_from_analysis
 
-async def execute_pipeline(query: str) -> dict:
-    """
-    Orchestrate the multi-agent pipeline to answer a user query.
-    """
-    print(f"Planner: Processing query: {query}")
-    
-    # 1. Analyze
-    analysis = await mcp_registry.methods["analyze_query"](query=query)
-    print(f"Planner Result: {analysis}")
-    
+async def _retrieve_context(query: str, analysis: dict) -> str:
+    """Route the query to RAG or GraphRAG retrieval and return the context text."""
     intent = analysis.get("classification", "RAG")
-    entities = analysis.get("entities", {})
-    region = entities.get("region", [])
+    # Restrict the searches to the jurisdiction / policy type the query is about,
+    # using only the fields the rag_search collection stores
+    filters = filters_from_analysis(analysis, fields=RAG_FILTER_FIELDS)
+    if filters:
+        print(f"Planner: Search filters: {filters}")
     
     context = ""
     
@@ -31,17 +27,38 @@ async def execute_pipeline(query: str) -> dict:
             # Naive extraction of policies to compare if available, else fall back to search
             # Ideally LLM extracts "Regulation A" and "Regulation B"
             # Here we simulate or use RAG to find relevant docs first
-            rag_results = await mcp_registry.methods["rag_search"](query=query, top_k=5)
+            countries = filters.get("country", [])
+            if len(countries) > 1:
+                # One search per jurisdiction, batched into a single embedding pass and request
+                per_country = [{**filters, "country": country} for country in countries]
+                rag_results = await mcp_registry.methods["rag_search_batch"](
+                    queries=[query] * len(countries), top_k=5, filters=per_country)
+            else:
+                rag_results = await mcp_registry.methods["rag_search"](query=query, top_k=5, filters=filters)
             context += f"GraphRAG/RAG Context: {rag_results}\n"
         else:
-             rag_results = await mcp_registry.methods["rag_search"](query=query, top_k=5)
+             rag_results = await mcp_registry.methods["rag_search"](query=query, top_k=5, filters=filters)
              context += f"GraphRAG Context: {rag_results}\n"
              
     else: # RAG
         print("Planner: Routing to RAG...")
-        results = await mcp_registry.methods["rag_search"](query=query, top_k=3)
+        results = await mcp_registry.methods["rag_search"](query=query, top_k=3, filters=filters)
         context += f"RAG Context: {results}\n"
 
+    return context
+
+async def execute_pipeline(query: str) -> dict:
+    """
+    Orchestrate the multi-agent pipeline to answer a user query.
+    """
+    print(f"Planner: Processing query: {query}")
+    
+    # 1. Analyze
+    analysis = await mcp_registry.methods["analyze_query"](query=query)
+    print(f"Planner Result: {analysis}")
+    
+    context = await _retrieve_context(query, analysis)
+
     # 3. Summarize
     print("Planner: Summarizing...")
     answer = await mcp_registry.methods["summarize_results"](query=query, context=context)
@@ -52,6 +69,33 @@ async def execute_pipeline(query: str) -> dict:
         "context_used": len(context)
     }
 
+async def execute_pipeline_stream(query: str):
+    """
+    Streaming variant of `execute_pipeline`: yields the query analysis, then the
+    answer tokens as they are generated, then the same result dict.
+    """
+    print(f"Planner: Processing query (streaming): {query}")
+    analysis = await mcp_registry.methods["analyze_query"](query=query)
+    yield {"type": "analysis", "analysis": analysis}
+
+    context = await _retrieve_context(query, analysis)
+
+    print("Planner: Summarizing (streaming)...")
+    answer = ""
+    async for event in mcp_registry.stream_methods["summarize_results"](query=query, context=context):
+        if event.get("type") == "token":
+            answer += event["text"]
+            yield event
+
+    yield {
+        "type": "result",
+        "result": {
+            "answer": answer,
+            "analysis": analysis,
+            "context_used": len(context)
+        }
+    }
+
 async def ingest_pending_documents() -> dict:
     """
     Orchestrate the ingestion of all pending documents.
@@ -96,7 +140,8 @@ async def ingest_pending_documents() -> dict:
             
             # 4. RAG Ingest
             print(f"  - Ingesting to Qdrant...")
-            await mcp_registry.methods["rag_ingest_chunks"](chunks=chunks)
+            # The chunks are the document's full new version: drop points left from earlier runs
+            await mcp_registry.methods["rag_ingest_chunks"](chunks=chunks, replace=True)
             
             # 5. GraphRAG Ingest (Chunk by Chunk)
             print(f"  - Ingesting to Neo4j (GraphRAG)...")
@@ -120,4 +165,5 @@ async def ingest_pending_documents() -> dict:
 
 mcp_registry.register_tool("execute_pipeline", execute_pipeline)
 mcp_registry.register_tool("ingest_documents", ingest_pending_documents)
+mcp_registry.register_stream_tool("execute_pipeline", execute_pipeline_stream)
 print("Planner Agent initialized.")
@@ -1,36 +1,58 @@
+import asyncio
 from core.mcp.handler import mcp_registry
+from core.lazy import lazy
 from agents.rag.db import QdrantHandler
 from agents.shared.chunking import ChonkieHandler
 
-qdrant = QdrantHandler()
-chonkie_handler = ChonkieHandler()
+qdrant = lazy("rag.qdrant", QdrantHandler)
+chonkie_handler = lazy("rag.chunker", ChonkieHandler)
 
 # --- MCP Tools ---
 
-async def rag_search(query: str, top_k: int = 5) -> list:
+async def rag_search(query: str, top_k: int = 5, filters: dict = None, mode: str = None,
+                     fields: list = None) -> list:
     """
     Perform semantic search on the regulatory documents.
+    `filters` maps payload fields (country, policy_type, clause_type, doc_type,
+    filename) to a value or a list of values.
+    `mode` is "hybrid" (dense + lexical) or "dense"; hybrid is the default when available.
+    `fields` selects the payload fields returned per hit.
     Returns list of relevant text chunks.
     """
-    return qdrant.search(query, top_k)
+    # Proxies are resolved in the worker so a cold handler never builds on the event loop
+    return await asyncio.to_thread(lambda: qdrant.search(query, top_k, filters, mode, fields))
+
+async def rag_search_batch(queries: list, top_k: int = 5, filters=None, mode: str = None,
+                           fields: list = None) -> list:
+    """
+    Search several queries in one embedding pass and one vector store request.
+    `filters` is one filters dict for all queries or a list with one per query
+    (e.g. a country filter per jurisdiction of a comparison).
+    Returns one {"query", "filters", "results"} group per query.
+    """
+    return await asyncio.to_thread(lambda: qdrant.search_batch(queries, top_k, filters, mode, fields))
 
 async def chunk_document(text: str, metadata: dict) -> list:
     """Chunk text using Chonkie."""
-    return chonkie_handler.chunk_text(text, metadata)
+    return await asyncio.to_thread(lambda: chonkie_handler.chunk_text(text, metadata))
 
-async def rag_ingest_chunks(chunks: list) -> bool:
-    """Ingest pre-processed chunks into Qdrant."""
-    return qdrant.ingest_chunks(chunks)
+async def rag_ingest_chunks(chunks: list, replace: bool = False) -> bool:
+    """
+    Ingest pre-processed chunks into Qdrant.
+    With replace=True, stale points of the chunks' documents are deleted.
+    """
+    return await asyncio.to_thread(lambda: qdrant.ingest_chunks(chunks, replace=replace))
 
-async def rag_ingest(text: str, metadata: dict) -> bool:
+async def rag_ingest(text: str, metadata: dict, replace: bool = False) -> bool:
     """
     Chunk and ingest text into Qdrant vector database.
     """
-    chunks = chonkie_handler.chunk_text(text, metadata)
-    return qdrant.ingest_chunks(chunks)
+    chunks = await asyncio.to_thread(lambda: chonkie_handler.chunk_text(text, metadata))
+    return await asyncio.to_thread(lambda: qdrant.ingest_chunks(chunks, replace=replace))
 
 # Register tools
 mcp_registry.register_tool("rag_search", rag_search)
+mcp_registry.register_tool("rag_search_batch", rag_search_batch)
 mcp_registry.register_tool("rag_ingest", rag_ingest)
 mcp_registry.register_tool("chunk_document", chunk_document) # New
 mcp_registry.register_tool("rag_ingest_chunks", rag_ingest_chunks) # New
@@ -0,0 +1,310 @@
+"""Provisioning, payload indexes and metadata filters for the Qdrant chunk collections.
+
+Collections are created from the `qdrant` section of `configs/config.yaml`:
+HNSW `m`/`ef_construct`, int8 scalar quantization (quantized vectors kept in
+RAM, originals used to rescore the top candidates), on-disk vectors and
+payload, and the search-time `hnsw_ef`. `tune_collection` applies the same
+settings to an existing collection (see `agents/rag/maintenance.py tune`).
+
+With `qdrant.hybrid.enabled`, new collections also get a BM25-style sparse
+vector named "sparse" next to the default dense vector, and `vector_search`
+fuses the dense and sparse rankings with reciprocal rank fusion in a single
+`query_points` call. Collections created before hybrid mode have no sparse
+vector and are searched dense-only until they are recreated and re-ingested.
+
+Searches are narrowed to the jurisdiction and policy type extracted by
+`analyze_query`. Filters travel as plain dicts (field -> value or list of
+values) so they can be passed through MCP tools, and are turned into a
+Qdrant `Filter` just before the search. Every filtered field has a keyword
+payload index, so Qdrant resolves the filter without scanning payloads.
+"""
+from typing import Dict, Iterator, List, Optional
+
+import yaml
+from qdrant_client.models import (
+    Filter, FieldCondition, MatchValue, MatchAny, PayloadSchemaType,
+    Distance, VectorParams, VectorParamsDiff, HnswConfigDiff, CollectionParamsDiff,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, QuantizationSearchParams,
+    SearchParams, SparseVectorParams, SparseVector, Modifier, Prefetch, FusionQuery, Fusion,
+    SearchRequest, QueryRequest,
+)
+
+from core.embedding.sparse import SparseEncoder
+from agents.rag.vector_store import SEARCH_PAYLOAD_FIELDS
+
+SPARSE_VECTOR = "sparse"
+
+
+# Fields earlier ingests stored in the payload that the slim layout drops
+LEGACY_PAYLOAD_FIELDS = ["embedding", "metadata"]
+
+PAYLOAD_INDEXES = {
+    "country": PayloadSchemaType.KEYWORD,
+    "policy_type": PayloadSchemaType.KEYWORD,
+    "clause_type": PayloadSchemaType.KEYWORD,
+    "doc_type": PayloadSchemaType.KEYWORD,
+    "filename": PayloadSchemaType.KEYWORD,
+}
+
+# Filterable fields of the "regulations" collection written by QdrantHandler:
+# chunk text plus document metadata, without the analyzer's policy/clause types
+RAG_FILTER_FIELDS = ("country", "doc_type", "filename")
+
+# Filters kept when a fully filtered search finds nothing
+PRIMARY_FILTERS = ("country", "filename")
+
+# Query-analysis topics mapped to the policy types the analyzer assigns
+TOPIC_POLICY_TYPES = {
+    "auto": "Auto", "car": "Auto", "motor": "Auto", "vehicle": "Auto", "automobile": "Auto",
+    "health": "Health", "medical": "Health", "sante": "Health", "santé": "Health",
+    "life": "Life", "vie": "Life",
+    "property": "Property", "home": "Property", "house": "Property", "housing": "Property",
+    "habitation": "Property",
+}
+
+
+def load_qdrant_config(config_path: str = "configs/config.yaml") -> dict:
+    try:
+        with open(config_path, "r") as f:
+            return yaml.safe_load(f).get("qdrant", {}) or {}
+    except Exception:
+        return {}
+
+
+def _hnsw_config(cfg: dict) -> HnswConfigDiff:
+    hnsw = cfg.get("hnsw", {}) or {}
+    return HnswConfigDiff(
+        m=hnsw.get("m", 16),
+        ef_construct=hnsw.get("ef_construct", 100),
+        on_disk=hnsw.get("on_disk", False),
+    )
+
+
+def _quantization_config(cfg: dict) -> Optional[ScalarQuantization]:
+    quant = cfg.get("quantization", {}) or {}
+    if not quant.get("enabled", False):
+        return None
+    return ScalarQuantization(scalar=ScalarQuantizationConfig(
+        type=ScalarType.INT8,
+        quantile=quant.get("quantile", 0.99),
+        always_ram=quant.get("always_ram", True),
+    ))
+
+
+def hybrid_enabled(cfg: dict) -> bool:
+    return bool((cfg.get("hybrid", {}) or {}).get("enabled", False))
+
+
+def sparse_encoder(cfg: dict) -> SparseEncoder:
+    hybrid = cfg.get("hybrid", {}) or {}
+    return SparseEncoder(
+        k1=hybrid.get("k1", 1.2),
+        b=hybrid.get("b", 0.75),
+        avg_doc_len=hybrid.get("avg_doc_len", 200),
+    )
+
+
+def create_collection(client, collection: str, dim: int, cfg: Optional[dict] = None):
+    """Create a collection with the configured HNSW, quantization and storage settings."""
+    cfg = load_qdrant_config() if cfg is None else cfg
+    sparse = None
+    if hybrid_enabled(cfg):
+        # Qdrant applies the IDF part of BM25 from its own collection statistics
+        sparse = {SPARSE_VECTOR: SparseVectorParams(modifier=Modifier.IDF)}
+    client.create_collection(
+        collection_name=collection,
+        vectors_config=VectorParams(size=dim, distance=Distance.COSINE, on_disk=cfg.get("on_disk_vectors", False)),
+        sparse_vectors_config=sparse,
+        hnsw_config=_hnsw_config(cfg),
+        quantization_config=_quantization_config(cfg),
+        on_disk_payload=cfg.get("on_disk_payload", True),
+    )
+
+
+def has_sparse_vectors(client, collection: str) -> bool:
+    try:
+        sparse = client.get_collection(collection).config.params.sparse_vectors or {}
+    except Exception:
+        return False
+    return SPARSE_VECTOR in sparse
+
+
+def point_vector(dense, sparse=None):
+    """The `vector` of a PointStruct: the dense vector alone, or dense plus sparse."""
+    if sparse is None:
+        return dense
+    indices, values = sparse
+    return {"": dense, SPARSE_VECTOR: SparseVector(indices=indices, values=values)}
+
+
+def vector_search(client, collection: str, dense, top_k: int, query_filter=None, params=None,
+                  sparse=None, prefetch: int = 4, with_payload=None):
+    """Dense search, or dense + sparse fused with RRF when a sparse query is given.
+
+    Each ranking contributes `top_k * prefetch` candidates to the fusion.
+    `with_payload` is a list of payload fields (default SEARCH_PAYLOAD_FIELDS),
+    True for the whole payload or False for none.
+    """
+    if with_payload is None:
+        with_payload = SEARCH_PAYLOAD_FIELDS
+    if sparse is None or not sparse[0]:
+        return client.search(
+            collection_name=collection,
+            query_vector=dense,
+            query_filter=query_filter,
+            search_params=params,
+            with_payload=with_payload,
+            limit=top_k,
+        )
+    indices, values = sparse
+    candidates = top_k * prefetch
+    response = client.query_points(
+        collection_name=collection,
+        prefetch=[
+            Prefetch(query=dense, filter=query_filter, params=params, limit=candidates),
+            Prefetch(query=SparseVector(indices=indices, values=values), using=SPARSE_VECTOR,
+                     filter=query_filter, limit=candidates),
+        ],
+        query=FusionQuery(fusion=Fusion.RRF),
+        limit=top_k,
+        with_payload=with_payload,
+    )
+    return response.points
+
+
+def vector_search_batch(client, collection: str, dense_list, top_k: int, query_filters=None, params=None,
+                        sparse_list=None, prefetch: int = 4, with_payload=None) -> List[List]:
+    """`vector_search` for several queries in a single Qdrant request.
+
+    `query_filters` and `sparse_list` hold one entry (or None) per query.
+    Queries are all dense or all hybrid, decided by `sparse_list`.
+    """
+    if with_payload is None:
+        with_payload = SEARCH_PAYLOAD_FIELDS
+    query_filters = query_filters or [None] * len(dense_list)
+    if not sparse_list or not any(s and s[0] for s in sparse_list):
+        return client.search_batch(collection_name=collection, requests=[
+            SearchRequest(vector=dense, filter=query_filter, params=params, limit=top_k,
+                          with_payload=with_payload)
+            for dense, query_filter in zip(dense_list, query_filters)
+        ])
+    candidates = top_k * prefetch
+    requests = []
+    for dense, query_filter, sparse in zip(dense_list, query_filters, sparse_list):
+        prefetches = [Prefetch(query=dense, filter=query_filter, params=params, limit=candidates)]
+        if sparse and sparse[0]:
+            prefetches.append(Prefetch(query=SparseVector(indices=sparse[0], values=sparse[1]), using=SPARSE_VECTOR,
+                                       filter=query_filter, limit=candidates))
+        requests.append(QueryRequest(prefetch=prefetches, query=FusionQuery(fusion=Fusion.RRF),
+                                     limit=top_k, with_payload=with_payload))
+    return [response.points for response in client.query_batch_points(collection_name=collection, requests=requests)]
+
+
+def tune_collection(client, collection: str, cfg: Optional[dict] = None):
+    """Apply the configured settings to an existing collection.
+
+    Qdrant rebuilds the HNSW graph and the quantized vectors in the
+    background; the collection stays searchable meanwhile. Disabling
+    quantization on a collection that has it is not applied here.
+    """
+    cfg = load_qdrant_config() if cfg is None else cfg
+    client.update_collection(
+        collection_name=collection,
+        vectors_config={"": VectorParamsDiff(on_disk=cfg.get("on_disk_vectors", False))},
+        hnsw_config=_hnsw_config(cfg),
+        quantization_config=_quantization_config(cfg),
+        collection_params=CollectionParamsDiff(on_disk_payload=cfg.get("on_disk_payload", True)),
+    )
+
+
+def search_params(cfg: Optional[dict] = None) -> SearchParams:
+    """Search-time HNSW ef and quantization rescoring from the `qdrant.search` config."""
+    cfg = load_qdrant_config() if cfg is None else cfg
+    search = cfg.get("search", {}) or {}
+    quant = cfg.get("quantization", {}) or {}
+    quantization = None
+    if quant.get("enabled", False):
+        quantization = QuantizationSearchParams(
+            rescore=search.get("rescore", True),
+            oversampling=search.get("oversampling", 2.0),
+        )
+    return SearchParams(hnsw_ef=search.get("hnsw_ef", 128), quantization=quantization)
+
+
+def ensure_payload_indexes(client, collection: str):
+    """Create the keyword payload indexes (a no-op for indexes that already exist)."""
+    for field, schema in PAYLOAD_INDEXES.items():
+        try:
+            client.create_payload_index(collection_name=collection, field_name=field, field_schema=schema)
+        except Exception as e:
+            print(f"Qdrant payload index on {field} not created: {e}")
+
+
+def _policy_type(topic) -> Optional[str]:
+    if not isinstance(topic, str):
+        return None
+    for word in topic.lower().replace("-", " ").split():
+        if word in TOPIC_POLICY_TYPES:
+            return TOPIC_POLICY_TYPES[word]
+    return None
+
+
+def filters_from_analysis(analysis: dict, fields=None) -> Dict:
+    """Build search filters from the `entities` of `analyze_query`.
+
+    `region` becomes a country filter, `topic` a policy_type filter when it
+    names a known policy type. `fields` are the payload fields the target
+    collection stores (default: PAYLOAD_INDEXES); filters on any other field
+    are dropped, since they would match nothing.
+    """
+    entities = (analysis or {}).get("entities") or {}
+    filters = {}
+
+    region = entities.get("region") or []
+    if isinstance(region, str):
+        region = [region]
+    countries = [r.strip() for r in region if isinstance(r, str) and r.strip()]
+    if countries:
+        filters["country"] = countries
+
+    policy_type = _policy_type(entities.get("topic"))
+    if policy_type:
+        filters["policy_type"] = policy_type
+
+    fields = PAYLOAD_INDEXES if fields is None else fields
+    return {k: v for k, v in filters.items() if k in fields}
+
+
+def build_filter(filters: Optional[Dict]) -> Optional[Filter]:
+    """Turn a filters dict into a Qdrant Filter (None when there is nothing to filter on)."""
+    if not filters:
+        return None
+    conditions = []
+    for field, value in filters.items():
+        if value is None or value == [] or value == "":
+            continue
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            match = MatchValue(value=values[0]) if len(values) == 1 else MatchAny(any=values)
+        else:
+            match = MatchValue(value=value)
+        conditions.append(FieldCondition(key=field, match=match))
+    return Filter(must=conditions) if conditions else None
+
+
+def relaxed_filters(filters: Optional[Dict]) -> Iterator[Optional[Dict]]:
+    """Yield the filters to try in order: all of them, the primary ones, then none."""
+    if filters:
+        yield filters
+        primary = {k: v for k, v in filters.items() if k in PRIMARY_FILTERS}
+        if primary and primary != filters:
+            yield primary
+    yield None
+
+
+__all__ = [
+    "PAYLOAD_INDEXES", "RAG_FILTER_FIELDS", "load_qdrant_config", "create_collection", "tune_collection",
+    "search_params", "SPARSE_VECTOR", "hybrid_enabled", "sparse_encoder", "has_sparse_vectors",
+    "SEARCH_PAYLOAD_FIELDS", "LEGACY_PAYLOAD_FIELDS", "point_vector", "vector_search", "vector_search_batch",
+    "ensure_payload_indexes", "filters_from_analysis", "build_filter", "relaxed_filters",
+]
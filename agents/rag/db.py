@@ -1,67 +1,149 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from sentence_transformers import SentenceTransformer
-import uuid
+from core.embedding.service import get_embedding_service
+from agents.rag.ids import point_id
+from agents.rag.collection import relaxed_filters
+from agents.rag.vector_store import get_vector_store
 
 class QdrantHandler:
-    def __init__(self, collection_name="regulations"):
-        self.client = QdrantClient("localhost", port=6333)
+    """Chunk ingestion and search over the configured vector store (Qdrant or local)."""
+
+    def __init__(self, collection_name="regulations", store=None):
         self.collection_name = collection_name
-        # Use same model as Chonkie for consistency
-        self.encoder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2", device="cpu")
-        self._ensure_collection()
-
-    def _ensure_collection(self):
-        try:
-            self.client.get_collection(self.collection_name)
-        except Exception:
-            print(f"Creating Qdrant collection: {self.collection_name}")
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-            )
+        # Shared embedding service (same model as Chonkie for consistency)
+        self.encoder = get_embedding_service()
+        # vector_store.backend: Qdrant (collection provisioning, hybrid search) or the in-process index
+        self.store = store or get_vector_store(collection_name, self.encoder.dim)
+
+    def ingest_chunks(self, chunks, batch_size=None, replace=False):
+        """Ingest chunks through the vector store's batched writer.
+
+        batch_size overrides the writer's batch size (`qdrant.upsert.batch_points`).
+
+        Point IDs are derived from (filename, chunk index, text hash), so
+        re-ingesting a document overwrites its points. With replace=True the
+        chunks are taken as the full new version of their documents and any
+        other points left over from a previous version are deleted.
+        """
+        if not chunks:
+            return False
 
-    def ingest_chunks(self, chunks, batch_size=50):
-        """Ingest chunks in batches to avoid connection timeout."""
-        points = []
-        for chunk in chunks:
-            text = chunk["text"]
-            meta = chunk["metadata"]
-            vector = self.encoder.encode(text).tolist()
-            
-            points.append(PointStruct(
-                id=str(uuid.uuid4()),
-                vector=vector,
-                payload={ "text": text, **meta }
-            ))
-        
-        if not points:
+        # Encode every chunk as one matrix (forward passes of embedding.batch_size)
+        # Chunker-pooled vectors are used as-is; unchanged chunk texts reuse their
+        # vectors from the persistent embedding store
+        vectors = self.encoder.encode_documents(
+            [chunk["text"] for chunk in chunks],
+            precomputed=[chunk.get("vector") for chunk in chunks],
+        )
+
+        ids = []
+        payloads = []
+        for i, chunk in enumerate(chunks):
+            metadata = chunk["metadata"]
+            ids.append(point_id(metadata.get("filename", ""), metadata.get("chunk_id", i), chunk["text"]))
+            payloads.append({ "text": chunk["text"], **metadata })
+
+        stats = self.store.upsert(ids, vectors, payloads, batch_size=batch_size)
+        if stats["failed"]:
+            # Keep the previous version's points: the new one is incomplete
             return False
-        
-        # Upload in batches to avoid timeout
-        total = len(points)
-        for i in range(0, total, batch_size):
-            batch = points[i:i + batch_size]
+
+        if replace:
+            self._delete_stale(chunks, ids)
+        return True
+
+    def _delete_stale(self, chunks, ids):
+        """Delete each document's points that are not part of its new version.
+
+        Runs after the upsert, so a document is never missing from search
+        while it is being re-ingested.
+        """
+        ids_by_file = {}
+        for chunk, chunk_id in zip(chunks, ids):
+            filename = chunk["metadata"].get("filename")
+            if filename:
+                ids_by_file.setdefault(filename, []).append(chunk_id)
+
+        for filename, keep in ids_by_file.items():
             try:
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=batch
-                )
-                print(f"    > Qdrant: Uploaded batch {i//batch_size + 1}/{(total + batch_size - 1)//batch_size}")
+                self.store.delete_document_except(filename, keep)
             except Exception as e:
-                print(f"    > Qdrant batch upload error: {e}")
-                return False
-        
-        return True
+                print(f"    > Stale point cleanup error for {filename}: {e}")
+
+    def search(self, query: str, top_k=5, filters=None, mode=None, with_payload=None):
+        """Semantic search, restricted to the points matching `filters` if given.
+
+        mode is "hybrid" (dense + sparse fused with RRF) or "dense"; it defaults
+        to hybrid when the store supports it (Qdrant collections with sparse vectors).
+        with_payload selects the payload fields returned per hit (default
+        SEARCH_PAYLOAD_FIELDS; True returns the whole payload).
+        When the filtered search finds nothing (e.g. a region with no indexed
+        documents yet), the filters are relaxed down to an unfiltered search.
+        """
+        vector = self.encoder.encode_query(query)
+        results = []
+        for attempt in relaxed_filters(filters):
+            results = self.store.search(
+                vector, top_k,
+                filters=attempt,
+                query_text=None if mode == "dense" else query,
+                with_payload=with_payload,
+            )
+            if results:
+                break
+        return self._format_hits(results)
+
+    def search_batch(self, queries, top_k=5, filters=None, mode=None, with_payload=None):
+        """Search several queries at once, e.g. one per jurisdiction of a comparison.
+
+        All queries are encoded in one forward pass and sent as one batch
+        request. `filters` is a single filters dict applied to every query or
+        a list with one entry per query. Queries whose filtered search finds
+        nothing are retried together with relaxed filters, as in `search`.
+        Returns one {"query", "filters", "results"} group per query.
+        """
+        if not queries:
+            return []
+        if filters is None or isinstance(filters, dict):
+            filters = [filters] * len(queries)
+        vectors = self.encoder.encode_queries(list(queries))
+        query_texts = None if mode == "dense" else list(queries)
+
+        results = [[] for _ in queries]
+        attempts = [relaxed_filters(f) for f in filters]
+        pending = list(range(len(queries)))
+        while pending:
+            batch = []
+            for i in pending:
+                attempt = next(attempts[i], StopIteration)
+                if attempt is not StopIteration:
+                    batch.append((i, attempt))
+            if not batch:
+                break
+            found = self.store.search_batch(
+                [vectors[i] for i, _ in batch], top_k,
+                filters=[attempt for _, attempt in batch],
+                query_texts=[query_texts[i] for i, _ in batch] if query_texts else None,
+                with_payload=with_payload,
+            )
+            pending = []
+            for (i, attempt), hits in zip(batch, found):
+                results[i] = hits
+                # An unfiltered attempt (None) is the last one
+                if not hits and attempt is not None:
+                    pending.append(i)
 
-    def search(self, query: str, top_k=5):
-        vector = self.encoder.encode(query).tolist()
-        results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=vector,
-            limit=top_k
-        )
         return [
-            {"text": hit.payload["text"], "score": hit.score, "metadata": hit.payload}
-            for hit in results
+            {"query": query, "filters": f, "results": self._format_hits(hits)}
+            for query, f, hits in zip(queries, filters, results)
         ]
+
+    @staticmethod
+    def _format_hits(results):
+        hits = []
+        for hit in results:
+            payload = hit.payload or {}
+            hits.append({
+                "text": payload.get("text", ""),
+                "score": hit.score,
+                "metadata": {k: v for k, v in payload.items() if k != "text"},
+            })
+        return hits
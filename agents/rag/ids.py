@@ -0,0 +1,19 @@
+"""Deterministic Qdrant point IDs.
+
+A chunk's ID is a UUIDv5 of (filename, chunk index, sha1 of its text), so
+re-ingesting the same document overwrites its points instead of appending
+duplicates.
+"""
+import hashlib
+import uuid
+
+# Fixed namespace so IDs are stable across processes and releases
+POINT_NAMESPACE = uuid.UUID("5b0c7a7e-3f51-4c36-9a0e-6d1f2f0b8c11")
+
+
+def point_id(filename: str, chunk_index, text: str) -> str:
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{filename}:{chunk_index}:{digest}"))
+
+
+__all__ = ["point_id"]
@@ -0,0 +1,206 @@
+"""In-process vector store: memory-mapped float32 matrix, SQLite payloads, exact top-k.
+
+Vectors are L2-normalized on write, so a matrix-vector product gives the
+cosine scores Qdrant would compute, without any approximation. Payloads are
+kept in memory for filtering and persisted in `points.sqlite` next to
+`vectors.f32`. Rows freed by deletes are reused. Meant for development, CI
+and benchmarks, and for corpora that fit comfortably in one process.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from agents.rag.vector_store import VectorStore, SearchHit, SEARCH_PAYLOAD_FIELDS
+
+
+def _matches(payload: dict, filters: Optional[Dict]) -> bool:
+    """Same semantics as collection.build_filter: every field must match one of its values."""
+    for field, value in (filters or {}).items():
+        if value is None or value == [] or value == "":
+            continue
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        actual = payload.get(field)
+        actual = actual if isinstance(actual, list) else [actual]
+        if not any(a in values for a in actual):
+            return False
+    return True
+
+
+def _project(payload: dict, with_payload) -> dict:
+    if with_payload is None:
+        with_payload = SEARCH_PAYLOAD_FIELDS
+    if with_payload is True:
+        return dict(payload)
+    if not with_payload:
+        return {}
+    return {k: payload[k] for k in with_payload if k in payload}
+
+
+class _LocalWriter:
+    def __init__(self, store, batch_size: int):
+        self.store = store
+        self.batch_size = batch_size
+        self._batch = []
+        self._started = time.perf_counter()
+        self.stats = {"points": 0, "batches": 0, "retries": 0, "failed": 0}
+
+    def add(self, point_id, vector, payload: dict):
+        self._batch.append((point_id, vector, payload))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        self.store._write(batch)
+        self.stats["points"] += len(batch)
+        self.stats["batches"] += 1
+
+    def close(self) -> dict:
+        self.flush()
+        elapsed = time.perf_counter() - self._started
+        self.stats["elapsed_s"] = elapsed
+        self.stats["points_per_s"] = self.stats["points"] / elapsed if elapsed else 0.0
+        return self.stats
+
+
+class LocalVectorStore(VectorStore):
+    backend = "local"
+
+    def __init__(self, path: str, dim: int, initial_capacity: int = 4096):
+        self.dim = int(dim)
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(os.path.join(path, "points.sqlite"), check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS points (id TEXT PRIMARY KEY, row INTEGER, payload TEXT)")
+        self._conn.commit()
+
+        self._rows = {}      # point id -> matrix row
+        self._ids = {}       # matrix row -> point id
+        self._payloads = {}  # matrix row -> payload
+        for point_id, row, payload in self._conn.execute("SELECT id, row, payload FROM points"):
+            self._rows[point_id] = row
+            self._ids[row] = point_id
+            self._payloads[row] = json.loads(payload)
+        self._next_row = max(self._ids) + 1 if self._ids else 0
+        self._free = [row for row in range(self._next_row) if row not in self._ids]
+
+        self._matrix_path = os.path.join(path, "vectors.f32")
+        existing = os.path.getsize(self._matrix_path) // (self.dim * 4) if os.path.exists(self._matrix_path) else 0
+        self._open(max(initial_capacity, existing, self._next_row))
+
+    def _open(self, capacity: int):
+        needed = capacity * self.dim * 4
+        if not os.path.exists(self._matrix_path) or os.path.getsize(self._matrix_path) < needed:
+            with open(self._matrix_path, "ab") as f:
+                f.truncate(needed)
+        self._capacity = capacity
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self._capacity:
+            return
+        self._matrix.flush()
+        del self._matrix
+        self._open(max(rows, self._capacity * 2))
+
+    def _write(self, batch):
+        with self._lock:
+            new = sum(1 for point_id, _, _ in batch if str(point_id) not in self._rows)
+            self._ensure_capacity(self._next_row + max(new - len(self._free), 0))
+            records = []
+            for point_id, vector, payload in batch:
+                point_id = str(point_id)
+                row = self._rows.get(point_id)
+                if row is None:
+                    if self._free:
+                        row = self._free.pop()
+                    else:
+                        row = self._next_row
+                        self._next_row += 1
+                vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+                norm = np.linalg.norm(vector)
+                self._matrix[row] = vector / norm if norm else vector
+                self._rows[point_id] = row
+                self._ids[row] = point_id
+                self._payloads[row] = payload
+                records.append((point_id, row, json.dumps(payload, default=str, ensure_ascii=False)))
+            # Vectors hit the disk before the index references them
+            self._matrix.flush()
+            self._conn.executemany("INSERT OR REPLACE INTO points (id, row, payload) VALUES (?, ?, ?)", records)
+            self._conn.commit()
+
+    def writer(self, batch_size: Optional[int] = None):
+        return _LocalWriter(self, batch_size or 512)
+
+    def delete_document_except(self, filename: str, keep_ids: List):
+        keep = {str(i) for i in keep_ids}
+        with self._lock:
+            stale = [row for row, payload in self._payloads.items()
+                     if payload.get("filename") == filename and self._ids[row] not in keep]
+            ids = [self._ids[row] for row in stale]
+            for row, point_id in zip(stale, ids):
+                del self._rows[point_id], self._ids[row], self._payloads[row]
+                self._free.append(row)
+            self._conn.executemany("DELETE FROM points WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def search(self, vector, top_k: int = 5, filters: Optional[Dict] = None, query_text: Optional[str] = None,
+               with_payload=None) -> List[SearchHit]:
+        query = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        with self._lock:
+            if filters or self._free:
+                rows = np.fromiter((row for row, payload in self._payloads.items() if _matches(payload, filters)),
+                                   dtype=np.int64)
+                scores = self._matrix[rows] @ query if len(rows) else np.zeros(0, dtype=np.float32)
+            else:
+                # No holes and no filter: score the live prefix of the matrix in place
+                rows = np.arange(self._next_row)
+                scores = self._matrix[:self._next_row] @ query
+            if not len(rows):
+                return []
+            k = min(top_k, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                SearchHit(self._ids[int(rows[i])], float(scores[i]), _project(self._payloads[int(rows[i])], with_payload))
+                for i in top
+            ]
+
+    def search_batch(self, vectors, top_k: int = 5, filters: Optional[List[Optional[Dict]]] = None,
+                     query_texts: Optional[List[str]] = None, with_payload=None) -> List[List[SearchHit]]:
+        filters = filters or [None] * len(vectors)
+        if any(filters) or self._free or not self._next_row:
+            return super().search_batch(vectors, top_k, filters, query_texts, with_payload)
+        queries = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        queries = queries / np.clip(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12, None)
+        with self._lock:
+            # One (rows x queries) product for every unfiltered query
+            scores = self._matrix[:self._next_row] @ queries.T
+            k = min(top_k, self._next_row)
+            results = []
+            for column in scores.T:
+                top = np.argpartition(-column, k - 1)[:k]
+                top = top[np.argsort(-column[top])]
+                results.append([
+                    SearchHit(self._ids[int(i)], float(column[i]), _project(self._payloads[int(i)], with_payload))
+                    for i in top
+                ])
+            return results
+
+    def count(self) -> int:
+        return len(self._ids)
+
+
+__all__ = ["LocalVectorStore"]
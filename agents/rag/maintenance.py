@@ -0,0 +1,178 @@
+"""Maintenance jobs for the RAG Qdrant collection.
+
+`dedup` removes the duplicate points that earlier ingests left behind, when
+point IDs were random UUIDs and every re-run appended a new copy of each
+chunk. Points are grouped by their deterministic ID (filename, chunk index,
+text hash). One point per group is kept, preferably the one that already has
+the deterministic ID. With --rewrite-ids the kept point is also moved to its
+deterministic ID, so later ingests overwrite it instead of adding a copy.
+
+`tune` applies the `qdrant` section of `configs/config.yaml` (HNSW,
+int8 scalar quantization, on-disk vectors and payload) to an existing
+collection, and creates the payload indexes it is missing.
+
+`slim` drops the `embedding` copy of the vector and the duplicate `metadata`
+dict from the payloads of earlier AnalyzerPipeline ingests. Filterable
+fields that were only stored under `metadata` are first lifted to the top
+level.
+
+Usage:
+    python -m agents.rag.maintenance dedup [--collection regulations] [--rewrite-ids] [--dry-run]
+    python -m agents.rag.maintenance tune [--collection regulations]
+    python -m agents.rag.maintenance slim [--collection regulations_chunks] [--dry-run]
+"""
+import argparse
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    PointStruct, PointIdsList, Filter, FilterSelector, IsEmptyCondition, PayloadField,
+)
+
+from agents.rag.ids import point_id
+from agents.rag.collection import (
+    PAYLOAD_INDEXES, LEGACY_PAYLOAD_FIELDS, load_qdrant_config, tune_collection, ensure_payload_indexes,
+)
+
+
+def _canonical_id(point) -> str:
+    payload = point.payload or {}
+    return point_id(payload.get("filename", ""), payload.get("chunk_id", ""), payload.get("text", ""))
+
+
+def dedup(client: QdrantClient, collection: str, rewrite_ids: bool = False,
+          dry_run: bool = False, page_size: int = 256) -> dict:
+    """Keep one point per deterministic ID and delete the rest."""
+    kept = {}  # canonical id -> point kept for it
+    duplicates = []
+    scanned = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            limit=page_size,
+            offset=offset,
+            with_payload=["filename", "chunk_id", "text"],
+            with_vectors=rewrite_ids,
+        )
+        for point in points:
+            scanned += 1
+            key = _canonical_id(point)
+            current = kept.get(key)
+            if current is None:
+                kept[key] = point
+            elif str(point.id) == key:
+                # Prefer the copy that already lives at the deterministic ID
+                duplicates.append(current.id)
+                kept[key] = point
+            else:
+                duplicates.append(point.id)
+        if offset is None:
+            break
+
+    moves = [(key, point) for key, point in kept.items() if str(point.id) != key] if rewrite_ids else []
+    print(f"Scanned {scanned} points: {len(duplicates)} duplicates, {len(moves)} to move to deterministic IDs")
+    if dry_run:
+        return {"scanned": scanned, "duplicates": len(duplicates), "moved": 0, "dry_run": True}
+
+    for start in range(0, len(moves), page_size):
+        batch = moves[start:start + page_size]
+        # Full payload is needed to copy the point, the scroll only fetched the key fields
+        full = {str(p.id): p for p in client.retrieve(collection, ids=[p.id for _, p in batch], with_payload=True)}
+        client.upsert(collection_name=collection, points=[
+            PointStruct(id=key, vector=point.vector, payload=full[str(point.id)].payload)
+            for key, point in batch
+        ])
+        duplicates.extend(point.id for _, point in batch)
+
+    for start in range(0, len(duplicates), page_size):
+        client.delete(
+            collection_name=collection,
+            points_selector=PointIdsList(points=duplicates[start:start + page_size]),
+        )
+    print(f"Deleted {len(duplicates)} points from {collection}")
+    return {"scanned": scanned, "duplicates": len(duplicates) - len(moves), "moved": len(moves), "dry_run": False}
+
+
+def tune(client: QdrantClient, collection: str, config_path: str = "configs/config.yaml") -> dict:
+    """Migrate an existing collection to the configured provisioning settings."""
+    tune_collection(client, collection, load_qdrant_config(config_path))
+    ensure_payload_indexes(client, collection)
+    info = client.get_collection(collection)
+    print(f"Updated {collection}: status={info.status} optimizer={info.optimizer_status}")
+    return {"collection": collection, "status": str(info.status)}
+
+
+def slim(client: QdrantClient, collection: str, dry_run: bool = False, page_size: int = 256) -> dict:
+    """Remove the legacy `embedding`/`metadata` payload fields, lifting filter fields first."""
+    lifted = 0
+    scanned = 0
+    offset = None
+    fields = list(PAYLOAD_INDEXES)
+    has_metadata = Filter(must_not=[IsEmptyCondition(is_empty=PayloadField(key="metadata"))])
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            scroll_filter=has_metadata,
+            limit=page_size,
+            offset=offset,
+            with_payload=["metadata"] + fields,
+            with_vectors=False,
+        )
+        for point in points:
+            scanned += 1
+            payload = point.payload or {}
+            metadata = payload.get("metadata") or {}
+            missing = {f: metadata[f] for f in fields if f not in payload and f in metadata}
+            if missing:
+                lifted += 1
+                if not dry_run:
+                    client.set_payload(collection_name=collection, payload=missing, points=[point.id])
+        if offset is None:
+            break
+
+    print(f"{scanned} points with a metadata copy, {lifted} need filter fields lifted")
+    if dry_run:
+        return {"with_metadata": scanned, "lifted": lifted, "dry_run": True}
+
+    # One filtered call drops the legacy fields from every point of the collection
+    client.delete_payload(
+        collection_name=collection,
+        keys=LEGACY_PAYLOAD_FIELDS,
+        points=FilterSelector(filter=Filter()),
+    )
+    print(f"Dropped {', '.join(LEGACY_PAYLOAD_FIELDS)} from {collection} payloads")
+    return {"with_metadata": scanned, "lifted": lifted, "dry_run": False}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance jobs for the RAG Qdrant collection")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("dedup", help="Delete duplicate chunk points")
+    p.add_argument("--collection", default="regulations")
+    p.add_argument("--host", default="localhost")
+    p.add_argument("--port", type=int, default=6333)
+    p.add_argument("--rewrite-ids", action="store_true", help="Move kept points to their deterministic IDs")
+    p.add_argument("--dry-run", action="store_true")
+    p = sub.add_parser("tune", help="Apply the configured HNSW/quantization/on-disk settings")
+    p.add_argument("--collection", default="regulations")
+    p.add_argument("--host", default="localhost")
+    p.add_argument("--port", type=int, default=6333)
+    p.add_argument("--config", default="configs/config.yaml")
+    p = sub.add_parser("slim", help="Drop vector and metadata copies from payloads")
+    p.add_argument("--collection", default="regulations_chunks")
+    p.add_argument("--host", default="localhost")
+    p.add_argument("--port", type=int, default=6333)
+    p.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    client = QdrantClient(args.host, port=args.port)
+    if args.command == "dedup":
+        dedup(client, args.collection, rewrite_ids=args.rewrite_ids, dry_run=args.dry_run)
+    elif args.command == "tune":
+        tune(client, args.collection, args.config)
+    elif args.command == "slim":
+        slim(client, args.collection, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Qdrant backend of the vector store interface."""
+import os
+from typing import Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    PointStruct, Filter, FieldCondition, MatchValue, HasIdCondition, FilterSelector,
+)
+
+from agents.rag.vector_store import VectorStore
+from agents.rag.writer import upsert_writer
+from agents.rag.collection import (
+    create_collection, search_params, ensure_payload_indexes, build_filter,
+    hybrid_enabled, sparse_encoder, has_sparse_vectors, point_vector, vector_search, vector_search_batch,
+)
+
+DEFAULT_QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+
+
+class _PointWriter:
+    """Builds PointStructs (with sparse vectors in hybrid collections) for an UpsertWriter."""
+
+    def __init__(self, store, writer):
+        self.store = store
+        self.writer = writer
+
+    def add(self, point_id, vector, payload: dict):
+        dense = vector.tolist() if hasattr(vector, "tolist") else list(vector)
+        sparse = None
+        if self.store.hybrid:
+            sparse = self.store.sparse_encoder.encode_document(payload.get("text", ""))
+        self.writer.add(PointStruct(id=point_id, vector=point_vector(dense, sparse), payload=payload))
+
+    def close(self) -> dict:
+        return self.writer.close()
+
+
+class QdrantVectorStore(VectorStore):
+    backend = "qdrant"
+
+    def __init__(self, collection: str, dim: int, config: Optional[dict] = None, client: QdrantClient = None,
+                 provision: bool = True):
+        self.config = config or {}
+        self.client = client or QdrantClient(url=self.config.get("url", DEFAULT_QDRANT_URL))
+        self.collection = collection
+        self.dim = dim
+        # HNSW / quantization / on-disk settings and search-time ef
+        self.search_params = search_params(self.config)
+        if provision:
+            self._ensure_collection()
+        # Sparse lexical vectors only when the collection was created with them
+        self.hybrid = hybrid_enabled(self.config) and has_sparse_vectors(self.client, collection)
+        self.sparse_encoder = sparse_encoder(self.config) if self.hybrid else None
+        self.hybrid_prefetch = (self.config.get("hybrid", {}) or {}).get("prefetch", 4)
+
+    def _ensure_collection(self):
+        try:
+            self.client.get_collection(self.collection)
+        except Exception:
+            print(f"Creating Qdrant collection: {self.collection}")
+            try:
+                create_collection(self.client, self.collection, self.dim, self.config)
+            except Exception as e:
+                print(f"Qdrant collection {self.collection} not created: {e}")
+        ensure_payload_indexes(self.client, self.collection)
+
+    def writer(self, batch_size: Optional[int] = None):
+        return _PointWriter(self, upsert_writer(self.client, self.collection, self.config, batch_points=batch_size))
+
+    def delete_document_except(self, filename: str, keep_ids: List):
+        # One filtered delete, applied after the upserts acknowledged before it
+        self.client.delete(
+            collection_name=self.collection,
+            points_selector=FilterSelector(filter=Filter(
+                must=[FieldCondition(key="filename", match=MatchValue(value=filename))],
+                must_not=[HasIdCondition(has_id=list(keep_ids))],
+            )),
+        )
+
+    def search(self, vector, top_k: int = 5, filters: Optional[Dict] = None, query_text: Optional[str] = None,
+               with_payload=None) -> List:
+        if hasattr(vector, "tolist"):
+            vector = vector.tolist()
+        sparse = None
+        if self.hybrid and query_text:
+            sparse = self.sparse_encoder.encode_query(query_text)
+        return vector_search(
+            self.client, self.collection, vector, top_k,
+            query_filter=build_filter(filters),
+            params=self.search_params,
+            sparse=sparse,
+            prefetch=self.hybrid_prefetch,
+            with_payload=with_payload,
+        )
+
+    def search_batch(self, vectors, top_k: int = 5, filters: Optional[List[Optional[Dict]]] = None,
+                     query_texts: Optional[List[str]] = None, with_payload=None) -> List[List]:
+        """All queries in one Qdrant batch request, each with its own filter."""
+        dense_list = [v.tolist() if hasattr(v, "tolist") else list(v) for v in vectors]
+        filters = filters or [None] * len(dense_list)
+        sparse_list = None
+        if self.hybrid and query_texts:
+            sparse_list = [self.sparse_encoder.encode_query(t) if t else None for t in query_texts]
+        return vector_search_batch(
+            self.client, self.collection, dense_list, top_k,
+            query_filters=[build_filter(f) for f in filters],
+            params=self.search_params,
+            sparse_list=sparse_list,
+            prefetch=self.hybrid_prefetch,
+            with_payload=with_payload,
+        )
+
+    def count(self) -> int:
+        return self.client.count(collection_name=self.collection, exact=True).count
+
+
+__all__ = ["QdrantVectorStore"]
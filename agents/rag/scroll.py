@@ -0,0 +1,98 @@
+"""Cursor-following streaming scroll over a Qdrant collection.
+
+`client.scroll` returns `(points, next_page_offset)`. The next page is
+requested with that offset, which is a point ID and not a running count,
+until it comes back as None. `scroll_pages` fetches the following page in a
+background thread while the caller processes the current one.
+`ScrollCursor` persists the offset of the first unprocessed page, and the
+IDs of points that failed before it, so a long job can resume where it
+stopped and retry them.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+
+def scroll_pages(client, collection: str, page_size: int = 256, with_payload=True, scroll_filter=None,
+                 offset=None, prefetch: bool = True) -> Iterator[Tuple[List, Optional[object]]]:
+    """Yield `(points, next_offset)` pages, without vectors, starting at `offset`.
+
+    `next_offset` is the cursor to resume from once the page has been
+    processed (None after the last page).
+    """
+    def fetch(cursor):
+        return client.scroll(
+            collection_name=collection,
+            scroll_filter=scroll_filter,
+            limit=page_size,
+            offset=cursor,
+            with_payload=with_payload,
+            with_vectors=False,
+        )
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(fetch, offset)
+        while future is not None:
+            points, next_offset = future.result()
+            future = None
+            if prefetch and next_offset is not None:
+                future = pool.submit(fetch, next_offset)
+            if points:
+                yield points, next_offset
+            if next_offset is None:
+                break
+            if future is None:
+                future = pool.submit(fetch, next_offset)
+
+
+def scroll_points(client, collection: str, **kwargs) -> Iterator:
+    """Yield every point of the collection, one page at a time."""
+    for points, _ in scroll_pages(client, collection, **kwargs):
+        yield from points
+
+
+class ScrollCursor:
+    """The scroll offset of a collection, saved as JSON so an interrupted job can resume.
+
+    Alongside the offset it records the IDs of points before it that failed
+    (to retry on resume) and whether the scroll had reached the end.
+    """
+
+    def __init__(self, path: str, collection: str):
+        self.path = path
+        self.collection = collection
+
+    def _state(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if state.get("collection") == self.collection else {}
+
+    def load(self):
+        return self._state().get("offset")
+
+    def failed(self) -> List:
+        return list(self._state().get("failed", []))
+
+    def finished(self) -> bool:
+        return bool(self._state().get("finished", False))
+
+    def save(self, offset, failed=(), finished: bool = False):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        state = {"collection": self.collection, "offset": offset, "failed": list(failed), "finished": finished}
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+__all__ = ["scroll_pages", "scroll_points", "ScrollCursor"]
@@ -0,0 +1,100 @@
+"""Pluggable vector store behind QdrantHandler, AnalyzerPipeline and GraphRAG.
+
+`vector_store.backend` in `configs/config.yaml` selects the implementation:
+
+- "qdrant": the Qdrant service at `qdrant.url` (`agents/rag/qdrant_store.py`)
+- "local": an in-process index with a memory-mapped float32 matrix, a SQLite
+  payload store and exact top-k by matrix multiply
+  (`agents/rag/local_store.py`). It needs no running service, so it suits
+  development, CI and benchmarks, and gives an exact baseline for Qdrant's
+  latency and recall.
+
+Both take the same plain-dict filters as `agents.rag.collection` (field ->
+value or list of values) and return hits with `id`, `score` and `payload`.
+"""
+import os
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+import yaml
+
+DEFAULT_LOCAL_PATH = "data/vector_store"
+
+SearchHit = namedtuple("SearchHit", ["id", "score", "payload"])
+
+# Payload fields returned by searches unless the caller asks for others
+SEARCH_PAYLOAD_FIELDS = [
+    "text", "filename", "chunk_id", "country", "doc_type", "policy_type", "clause_type", "source",
+]
+
+
+class VectorStore(ABC):
+    """Interface shared by the vector store backends."""
+
+    backend = None
+    # True when searches can fuse dense and lexical rankings
+    hybrid = False
+
+    @abstractmethod
+    def writer(self, batch_size: Optional[int] = None):
+        """Buffered writer with add(id, vector, payload) and close() -> stats."""
+
+    def upsert(self, ids: List, vectors, payloads: List[dict], batch_size: Optional[int] = None) -> dict:
+        writer = self.writer(batch_size)
+        for point_id, vector, payload in zip(ids, vectors, payloads):
+            writer.add(point_id, vector, payload)
+        return writer.close()
+
+    @abstractmethod
+    def delete_document_except(self, filename: str, keep_ids: List):
+        """Delete the points of `filename` whose IDs are not in `keep_ids`."""
+
+    @abstractmethod
+    def search(self, vector, top_k: int = 5, filters: Optional[Dict] = None, query_text: Optional[str] = None,
+               with_payload=None) -> List:
+        """Top-k hits for a dense query vector; `query_text` enables hybrid ranking where supported."""
+
+    def search_batch(self, vectors, top_k: int = 5, filters: Optional[List[Optional[Dict]]] = None,
+                     query_texts: Optional[List[str]] = None, with_payload=None) -> List[List]:
+        """`search` for several queries; `filters`/`query_texts` hold one entry per query."""
+        filters = filters or [None] * len(vectors)
+        query_texts = query_texts or [None] * len(vectors)
+        return [
+            self.search(vector, top_k, filters=f, query_text=text, with_payload=with_payload)
+            for vector, f, text in zip(vectors, filters, query_texts)
+        ]
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of points in the store."""
+
+
+def _load_config(config_path: str = "configs/config.yaml") -> dict:
+    try:
+        with open(config_path, "r") as f:
+            return yaml.safe_load(f) or {}
+    except Exception:
+        return {}
+
+
+def get_vector_store(collection: str, dim: int, config: Optional[dict] = None, provision: bool = True) -> VectorStore:
+    """Open the configured backend's store for `collection`.
+
+    With provision=True (writers) a missing Qdrant collection is created and
+    its payload indexes are ensured; read-only callers pass provision=False
+    to open the existing collection as is.
+    """
+    cfg = _load_config() if config is None else config
+    scfg = cfg.get("vector_store", {}) or {}
+    backend = scfg.get("backend", "qdrant")
+    if backend == "local":
+        from agents.rag.local_store import LocalVectorStore
+        return LocalVectorStore(os.path.join(scfg.get("path", DEFAULT_LOCAL_PATH), collection), dim)
+    if backend == "qdrant":
+        from agents.rag.qdrant_store import QdrantVectorStore
+        return QdrantVectorStore(collection, dim, cfg.get("qdrant", {}) or {}, provision=provision)
+    raise ValueError(f"Unknown vector_store.backend {backend!r}; expected 'qdrant' or 'local'")
+
+
+__all__ = ["VectorStore", "SearchHit", "SEARCH_PAYLOAD_FIELDS", "get_vector_store"]
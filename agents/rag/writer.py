@@ -0,0 +1,141 @@
+"""Buffered, batched and concurrent Qdrant upserts.
+
+`UpsertWriter` accumulates points and flushes a batch once it reaches
+`batch_points` points or about `batch_bytes` of request body. Up to
+`max_in_flight` batches are sent concurrently. With `wait=False`, Qdrant
+acknowledges a batch once it is in its write-ahead log, without waiting
+for indexing. That is safe here because every batch holds distinct point
+IDs, and operations sent after `close()` returns (e.g. a stale-point
+delete) are applied after the acknowledged upserts.
+
+A failing batch is retried with exponential backoff, split in halves, so
+a single oversized or malformed point does not sink its whole batch.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+from typing import Optional
+
+DEFAULT_UPSERT_CONFIG = {
+    "batch_points": 128,
+    "batch_bytes": 4 * 1024 * 1024,
+    "max_in_flight": 4,
+    "wait": False,
+    "max_retries": 4,
+    "backoff_s": 0.5,
+}
+
+
+def _point_bytes(point) -> int:
+    """Rough size of a point in the JSON request body."""
+    size = len(json.dumps(point.payload or {}, default=str, ensure_ascii=False))
+    vector = point.vector
+    vectors = vector.values() if isinstance(vector, dict) else [vector]
+    for v in vectors:
+        indices = getattr(v, "indices", None)
+        # ~12 bytes per float in JSON; sparse entries carry an index and a value
+        size += len(indices) * 20 if indices is not None else len(v) * 12
+    return size + 64
+
+
+class UpsertWriter:
+    def __init__(self, client, collection: str, batch_points: int = 128, batch_bytes: int = 4 * 1024 * 1024,
+                 max_in_flight: int = 4, wait: bool = False, max_retries: int = 4, backoff_s: float = 0.5):
+        self.client = client
+        self.collection = collection
+        self.batch_points = batch_points
+        self.batch_bytes = batch_bytes
+        self.max_in_flight = max_in_flight
+        self.wait = wait
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+
+        self._batch = []
+        self._batch_size = 0
+        self._pending = set()
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._lock = threading.Lock()
+        self._started = None
+        self.stats = {"points": 0, "batches": 0, "retries": 0, "splits": 0, "failed": 0}
+
+    def add(self, point):
+        if self._started is None:
+            self._started = time.perf_counter()
+        size = _point_bytes(point)
+        if self._batch and self._batch_size + size > self.batch_bytes:
+            self.flush()
+        self._batch.append(point)
+        self._batch_size += size
+        if len(self._batch) >= self.batch_points:
+            self.flush()
+
+    def add_many(self, points):
+        for point in points:
+            self.add(point)
+
+    def flush(self):
+        """Send the buffered points as one batch (blocks while max_in_flight batches are pending)."""
+        if not self._batch:
+            return
+        batch, self._batch, self._batch_size = self._batch, [], 0
+        while len(self._pending) >= self.max_in_flight:
+            done, self._pending = wait_futures(self._pending, return_when=FIRST_COMPLETED)
+        self._pending.add(self._pool.submit(self._send, batch))
+
+    def _send(self, batch, attempt: int = 0):
+        try:
+            self.client.upsert(collection_name=self.collection, points=batch, wait=self.wait)
+        except Exception as e:
+            if attempt >= self.max_retries:
+                print(f"    > Qdrant upsert of {len(batch)} points failed: {e}")
+                with self._lock:
+                    self.stats["failed"] += len(batch)
+                return
+            time.sleep(self.backoff_s * (2 ** attempt))
+            with self._lock:
+                self.stats["retries"] += 1
+            if len(batch) > 1:
+                # Halve the batch so one bad point or an oversized request only fails its own half
+                with self._lock:
+                    self.stats["splits"] += 1
+                mid = len(batch) // 2
+                self._send(batch[:mid], attempt + 1)
+                self._send(batch[mid:], attempt + 1)
+            else:
+                self._send(batch, attempt + 1)
+            return
+        with self._lock:
+            self.stats["points"] += len(batch)
+            self.stats["batches"] += 1
+
+    def close(self) -> dict:
+        """Flush, wait for every in-flight batch and return the write stats."""
+        self.flush()
+        wait_futures(self._pending)
+        self._pending = set()
+        self._pool.shutdown()
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        self.stats["elapsed_s"] = elapsed
+        self.stats["points_per_s"] = self.stats["points"] / elapsed if elapsed else 0.0
+        print(f"    > Qdrant: upserted {self.stats['points']} points in {self.stats['batches']} batches "
+              f"({self.stats['points_per_s']:.1f} points/s, {self.stats['retries']} retries, "
+              f"{self.stats['failed']} failed)")
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def upsert_writer(client, collection: str, cfg: Optional[dict] = None, **overrides) -> UpsertWriter:
+    """Writer configured from the `qdrant.upsert` config section."""
+    settings = dict(DEFAULT_UPSERT_CONFIG)
+    settings.update(((cfg or {}).get("upsert", {}) or {}))
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    return UpsertWriter(client, collection, **settings)
+
+
+__all__ = ["UpsertWriter", "upsert_writer"]
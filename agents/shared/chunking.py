@@ -1,6 +1,9 @@
 from chonkie import SemanticChunker
 import yaml
 
+from core.embedding.pooling import pooled_chunk_vector
+from core.embedding.service import get_embedding_service
+
 class ChonkieHandler:
     def __init__(self, config_path="configs/config.yaml"):
         try:
@@ -11,16 +14,16 @@ class ChonkieHandler:
         
         self.chunk_size = config.get("chunk_size", 800)
         self.chunk_overlap = config.get("chunk_overlap", 150)
-        # Using CPU to avoid VRAM conflicts with LiquidAI
-        self.device = "cpu"
-        self.model_name = "sentence-transformers/all-MiniLM-L6-v2"
+        # Reuse the shared embedding model (CPU, to avoid VRAM conflicts with LiquidAI)
+        embedder = get_embedding_service()
+        self.model_name = embedder.model_name
+        self.pooled_dim = embedder.dim if embedder.chunk_vectors == "pooled" else None
 
-        print(f"Initializing Chonkie with model={self.model_name} on {self.device}...")
+        print(f"Initializing Chonkie with shared model={self.model_name}...")
         self.chunker = SemanticChunker(
             chunk_size=self.chunk_size,
             overlap=self.chunk_overlap,
-            model=self.model_name,
-            device=self.device
+            model=embedder.chunker_model
         )
 
     def chunk_text(self, text, metadata):
@@ -32,9 +35,15 @@ class ChonkieHandler:
             chunk_meta = metadata.copy()
             chunk_meta["chunk_id"] = i
             
-            processed_chunks.append({
+            processed = {
                 "text": chunk_text,
                 "metadata": chunk_meta
-            })
+            }
+            # Reuse the sentence embeddings the chunker already computed
+            if self.pooled_dim:
+                vector = pooled_chunk_vector(chunk, self.pooled_dim)
+                if vector is not None:
+                    processed["vector"] = vector.tolist()
+            processed_chunks.append(processed)
             
         return processed_chunks
@@ -1,31 +1,37 @@
 from core.mcp.handler import mcp_registry
+from core.lazy import lazy
 from core.llm.client import get_llm_client
 
-llm = get_llm_client()
+llm = lazy("llm", get_llm_client)
+
+# Each template is split into a fixed *_PREFIX (role + task) and a *_PROMPT
+# holding the per-call data, so the prefix KV cache can be reused.
 
 # Phase 1: Document summarization
-SUMMARIZE_PROMPT = """
+SUMMARIZE_PREFIX = """
 You are an Expert Legal Summarizer.
+
+Task:
+Provide a clear, comprehensive answer to the user query below, using the context from the knowledge base. 
+If comparing, use a markdown table or bullet points.
+Cite regulations where possible.
+"""
+
+SUMMARIZE_PROMPT = """
 User Query: "{query}"
 
 Context from Knowledge Base:
 {context}
 
-Task:
-Provide a clear, comprehensive answer. 
-If comparing, use a markdown table or bullet points.
-Cite regulations where possible.
+Answer:
 """
 
 # Phase 2: Comparison summarization
-COMPARISON_SUMMARY_PROMPT = """
+COMPARISON_SUMMARY_PREFIX = """
 You are an Expert Comparative Insurance Analyst.
 
-Comparison Data:
-{comparison_data}
-
 Task:
-Summarize the key similarities and differences between the insurance policies or regulations.
+Summarize the key similarities and differences between the insurance policies or regulations in the comparison data below.
 Organize your summary clearly with:
 - Common requirements
 - Unique requirements for each jurisdiction
@@ -33,16 +39,15 @@ Organize your summary clearly with:
 Use markdown tables or structured lists for clarity.
 """
 
+COMPARISON_SUMMARY_PROMPT = """
+Comparison Data:
+{comparison_data}
+"""
+
 # Phase 2: Gap analysis summarization
-GAP_SUMMARY_PROMPT = """
+GAP_SUMMARY_PREFIX = """
 You are an Expert Regulatory Gap Analyst.
 
-Reference Policy (Baseline):
-{reference}
-
-Analyzed Policy:
-{analyzed}
-
 Task:
 Identify and summarize gaps where the analyzed policy is missing requirements or coverage present in the reference policy.
 Organize findings as:
@@ -51,18 +56,20 @@ Organize findings as:
 - Strengths (areas where analyzed policy exceeds reference)
 """
 
-# Phase 2: Recommendations summarization
-RECOMMENDATION_SUMMARY_PROMPT = """
-You are an Expert Insurance Policy Advisor.
+GAP_SUMMARY_PROMPT = """
+Reference Policy (Baseline):
+{reference}
 
-Current Policy Analysis:
-{analysis}
+Analyzed Policy:
+{analyzed}
+"""
 
-Identified Gaps:
-{gaps}
+# Phase 2: Recommendations summarization
+RECOMMENDATION_SUMMARY_PREFIX = """
+You are an Expert Insurance Policy Advisor.
 
 Task:
-Provide actionable recommendations for policy improvements.
+Provide actionable recommendations for policy improvements, based on the analysis and gaps below.
 Structure your recommendations as:
 1. Priority 1 (Critical): Urgent changes needed for compliance or coverage
 2. Priority 2 (Important): Recommended improvements for better protection
@@ -71,38 +78,59 @@ Structure your recommendations as:
 Include specific language or clauses where possible.
 """
 
+RECOMMENDATION_SUMMARY_PROMPT = """
+Current Policy Analysis:
+{analysis}
+
+Identified Gaps:
+{gaps}
+"""
+
 async def summarize_results(query: str, context: str) -> str:
     """
     Phase 1: Generate a final answer based on the query and retrieved context.
     """
     prompt = SUMMARIZE_PROMPT.format(query=query, context=context)
-    return llm.generate(prompt)
+    return await (await llm.aget()).agenerate(prompt, prefix=SUMMARIZE_PREFIX)
+
+async def summarize_results_stream(query: str, context: str):
+    """
+    Streaming variant of `summarize_results`: yields token events as they are generated.
+    """
+    prompt = SUMMARIZE_PROMPT.format(query=query, context=context)
+    answer = ""
+    client = await llm.aget()
+    async for text in client.agenerate_stream(prompt, prefix=SUMMARIZE_PREFIX):
+        answer += text
+        yield {"type": "token", "text": text}
+    yield {"type": "result", "result": answer}
 
 async def summarize_comparison(comparison_data: str) -> str:
     """
     Phase 2: Summarize comparison results between policies or jurisdictions.
     """
     prompt = COMPARISON_SUMMARY_PROMPT.format(comparison_data=comparison_data)
-    return llm.generate(prompt)
+    return await (await llm.aget()).agenerate(prompt, prefix=COMPARISON_SUMMARY_PREFIX)
 
 async def summarize_gaps(reference: str, analyzed: str) -> str:
     """
     Phase 2: Summarize gaps identified in policy analysis.
     """
     prompt = GAP_SUMMARY_PROMPT.format(reference=reference, analyzed=analyzed)
-    return llm.generate(prompt)
+    return await (await llm.aget()).agenerate(prompt, prefix=GAP_SUMMARY_PREFIX)
 
 async def summarize_recommendations(analysis: str, gaps: str) -> str:
     """
     Phase 2: Generate actionable recommendations based on analysis and gaps.
     """
     prompt = RECOMMENDATION_SUMMARY_PROMPT.format(analysis=analysis, gaps=gaps)
-    return llm.generate(prompt)
+    return await (await llm.aget()).agenerate(prompt, prefix=RECOMMENDATION_SUMMARY_PREFIX)
 
 # Register all tools
 mcp_registry.register_tool("summarize_results", summarize_results)
 mcp_registry.register_tool("summarize_comparison", summarize_comparison)
 mcp_registry.register_tool("summarize_gaps", summarize_gaps)
 mcp_registry.register_tool("summarize_recommendations", summarize_recommendations)
+mcp_registry.register_stream_tool("summarize_results", summarize_results_stream)
 
 print("Summarizer Agent initialized with Phase 1 and Phase 2 capabilities.")
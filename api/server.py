@@ -3,15 +3,55 @@ import os
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import yaml
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from core.lazy import print_startup_report, record_timing, startup_report, warm_up
 from core.mcp.handler import mcp_registry
-# Import planner to load the full pipeline
-import agents.planner.agent 
 from pydantic import BaseModel
 
+# Import planner to load the full pipeline (models and clients are built lazily)
+_import_start = time.perf_counter()
+import agents.planner.agent
+record_timing("import agents", time.perf_counter() - _import_start)
+
 from agents.graph_rag.agent import ingestor, grag
 
-app = FastAPI(title="Multi-Agent MCP Server")
+
+def _server_config() -> dict:
+    try:
+        with open("configs/config.yaml", "r") as f:
+            return yaml.safe_load(f).get("server", {}) or {}
+    except Exception:
+        return {}
+
+
+async def _warm_up(app: FastAPI):
+    """Build every lazy resource off the event loop, then mark the server ready."""
+    if _server_config().get("warm_up", True):
+        report = await asyncio.to_thread(warm_up)
+    else:
+        report = startup_report()
+    print_startup_report(report)
+    app.state.ready = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up runs in the background so liveness answers immediately;
+    # /ready reports 503 until it has finished
+    app.state.ready = False
+    app.state.warm_up = asyncio.create_task(_warm_up(app))
+    yield
+
+
+app = FastAPI(title="Multi-Agent MCP Server", lifespan=lifespan)
 
 @app.post("/mcp")
 async def handle_mcp(request: Request):
@@ -19,42 +59,137 @@ async def handle_mcp(request: Request):
     response = await mcp_registry.handle_request(data)
     return response
 
+@app.post("/mcp/stream")
+async def handle_mcp_stream(request: Request):
+    """Server-Sent Events variant of /mcp: one `data:` line per JSON-RPC message."""
+    data = await request.json()
+
+    async def events():
+        async for message in mcp_registry.handle_stream(data):
+            yield f"data: {json.dumps(message, default=str)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/health")
 def health():
+    """Liveness: the process is up and serving requests."""
     return {"status": "ok", "tools": list(mcp_registry.methods.keys())}
 
 
+def _retry_failed(failed):
+    """Rebuild components that failed warm-up in the background, at most once per `server.ready_retry_s`."""
+    task = getattr(app.state, "retry", None)
+    if task is not None and not task.done():
+        return
+    now = time.monotonic()
+    if now - getattr(app.state, "retry_at", float("-inf")) < _server_config().get("ready_retry_s", 30):
+        return
+    app.state.retry_at = now
+    app.state.retry = asyncio.create_task(asyncio.to_thread(warm_up, failed))
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: warm-up finished and every component was constructed.
+
+    After warm-up, components that failed are reported as "degraded" and
+    retried in the background on later /ready calls until they come up.
+    """
+    report = startup_report()
+    failed = [row["component"] for row in report if row["error"]]
+    warmed = bool(getattr(app.state, "ready", False))
+    if warmed and failed:
+        _retry_failed(failed)
+    is_ready = warmed and not failed
+    status = "ready" if is_ready else ("degraded" if warmed else "starting")
+    retrying = getattr(app.state, "retry", None) is not None and not app.state.retry.done()
+    body = {"status": status, "failed": failed, "retrying": retrying, "components": report}
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+
+
+@app.get("/llm/cache")
+def llm_cache_stats():
+    """Response cache hit/miss counters and prefix KV cache savings."""
+    from core.lazy import lazy
+    from core.llm.cache import get_response_cache
+    from core.llm.client import get_llm_client
+    cache = get_response_cache()
+    # Report on the model only once it is loaded; this endpoint must not trigger the load
+    llm = lazy("llm", get_llm_client)
+    prefix_cache = llm.get().prefix_cache if llm.ready else None
+    return {
+        "status": "ok" if cache is not None else "disabled",
+        "llm_loaded": llm.ready,
+        "stats": cache.stats() if cache is not None else {},
+        # Per fixed prefix: tokens cached and prefill time saved per call
+        "prefix_cache": prefix_cache.stats() if prefix_cache is not None else [],
+    }
+
+
+@app.get("/embedding/stats")
+def embedding_stats():
+    """Embedding micro-batch counters and query vector cache hit rate."""
+    from core.embedding.service import get_embedding_service
+    service = get_embedding_service()
+    return {
+        "model": service.model_name,
+        "stats": dict(service.stats),
+        "query_cache": service.query_cache.stats() if service.query_cache is not None else {},
+        "store": service.store.stats() if service.store is not None else {},
+    }
+
+
+@app.get("/llm/models")
+def llm_models():
+    """Models held by the shared registry, with reference counts and memory footprint."""
+    from core.llm.registry import get_model_registry
+    return {"models": get_model_registry().stats()}
+
+
+@app.get("/llm/executor")
+def llm_executor_stats():
+    """Inference executor load: running/queued calls and rejections."""
+    from core.llm.executor import get_inference_executor
+    executor = get_inference_executor()
+    return {
+        "max_concurrency": executor.max_concurrency,
+        "max_queue": executor.max_queue,
+        "stats": dict(executor.stats),
+    }
+
+
 class RetrieveRequest(BaseModel):
     query: str
     top_k: int = 5
+    filters: Optional[dict] = None
 
 
 @app.post("/graph/ingest")
-def graph_ingest():
-    """Trigger ingestion of Qdrant-indexed chunks into Neo4j."""
+def graph_ingest(resume: bool = False):
+    """Trigger ingestion of Qdrant-indexed chunks into Neo4j (?resume=true continues an interrupted run)."""
     try:
-        result = ingestor.ingest_all()
+        result = ingestor.ingest_all(resume=resume)
         return {"status": "ok", "result": result}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
 @app.post("/graph/retrieve")
-def graph_retrieve(body: RetrieveRequest):
+async def graph_retrieve(body: RetrieveRequest):
     """Run GraphRAG retrieval fusion and return synthesis."""
     try:
-        # Use SentenceTransformer inside graph_retrieve_fusion already if needed
         coro = mcp_registry.methods.get("graph_retrieve_fusion")
         if coro:
-            # coro is async, run it via asyncio
-            import asyncio
-            res = asyncio.run(coro(body.query, top_k=body.top_k))
+            # The tool offloads its blocking work, so it can be awaited on the server loop
+            res = await coro(body.query, top_k=body.top_k, filters=body.filters)
             return {"status": "ok", "result": res}
 
-        # Fallback to calling grag directly (needs embedder)
-        from sentence_transformers import SentenceTransformer
-        embedder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-        res = grag.retrieve(body.query, embedder, top_k=body.top_k)
+        # Fallback to calling grag directly (uses the shared embedding service)
+        res = await (await grag.aget()).aretrieve(body.query, top_k=body.top_k, filters=body.filters)
         return {"status": "ok", "result": res}
 
     except Exception as e:
@@ -0,0 +1,102 @@
+"""Benchmark chunk embedding for ingestion: per-chunk encode loop vs one batched matrix.
+
+The "old" path mirrors the previous QdrantHandler.ingest_chunks loop
+(encode + .tolist() per chunk); the "new" path encodes all chunk texts
+through the shared embedding service. Both build the Qdrant PointStructs;
+nothing is uploaded.
+
+Usage:
+    python benchmarks/embedding_ingest.py [--chunks 2000] [--batch-sizes 16 64 128] [--text-file doc.txt]
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client.models import PointStruct
+
+from core.embedding.service import EmbeddingService, DEFAULT_MODEL
+
+SENTENCES = [
+    "Every owner of a motor vehicle must hold third-party liability insurance.",
+    "The insurer shall indemnify the victim within thirty days of receiving the complete claim file.",
+    "Damage caused intentionally by the insured is excluded from cover.",
+    "Health insurance contracts may not exclude pre-existing conditions after a waiting period of one year.",
+    "The policyholder must declare any change of risk within fifteen days.",
+    "Premiums are payable annually in advance unless otherwise agreed in the special conditions.",
+    "A life insurance beneficiary may be designated or changed at any time by written notice.",
+    "Property cover extends to fire, explosion, lightning and water damage to the insured building.",
+]
+
+
+def make_chunks(n: int, text_file: str = None, chunk_chars: int = 800) -> list:
+    if text_file:
+        with open(text_file, "r", encoding="utf-8") as f:
+            text = f.read()
+        texts = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)][:n]
+    else:
+        texts = []
+        for i in range(n):
+            # Rotate sentences so chunks differ, roughly chunk_chars long
+            parts, length, j = [], 0, i
+            while length < chunk_chars:
+                sentence = SENTENCES[j % len(SENTENCES)]
+                parts.append(sentence)
+                length += len(sentence) + 1
+                j += 3
+            texts.append(f"Article {i}. " + " ".join(parts))
+    return [{"text": t, "metadata": {"filename": "benchmark.pdf", "chunk_id": i}} for i, t in enumerate(texts)]
+
+
+def old_path(model, chunks) -> list:
+    points = []
+    for chunk in chunks:
+        vector = model.encode(chunk["text"]).tolist()
+        points.append(PointStruct(id=str(uuid.uuid4()), vector=vector, payload={"text": chunk["text"], **chunk["metadata"]}))
+    return points
+
+
+def new_path(service, chunks) -> list:
+    vectors = service.encode([chunk["text"] for chunk in chunks]).tolist()
+    return [
+        PointStruct(id=str(uuid.uuid4()), vector=vector, payload={"text": chunk["text"], **chunk["metadata"]})
+        for chunk, vector in zip(chunks, vectors)
+    ]
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 128])
+    parser.add_argument("--text-file", help="Chunk this file instead of synthetic regulation text")
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks, args.text_file)
+    print(f"model={DEFAULT_MODEL} device={args.device} chunks={len(chunks)}")
+
+    service = EmbeddingService(DEFAULT_MODEL, device=args.device, batch_size=args.batch_sizes[0])
+    # Warm-up so the first measurement does not include lazy kernel init
+    service.encode(["warm-up"] * 8)
+
+    print(f"{'path':>14} {'seconds':>9} {'chunks/s':>9}")
+    elapsed = timed(old_path, service.model, chunks)
+    print(f"{'per-chunk':>14} {elapsed:>9.2f} {len(chunks) / elapsed:>9.1f}")
+    for bs in args.batch_sizes:
+        service.batch_size = bs
+        elapsed = timed(new_path, service, chunks)
+        print(f"{'batched/' + str(bs):>14} {elapsed:>9.2f} {len(chunks) / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
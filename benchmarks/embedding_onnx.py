@@ -0,0 +1,97 @@
+"""Compare the ONNX Runtime embedding backends with the torch SentenceTransformer.
+
+Reports encode throughput (texts/sec) per backend and, for every ONNX
+backend, the top-k retrieval agreement with torch. Agreement is the mean
+overlap of the top-k chunk ids per query, alongside the mean cosine between
+paired vectors. Exits non-zero if any backend's agreement falls below
+--min-agreement, so it can be used as a check before switching
+`embedding.backend`.
+
+Usage:
+    python benchmarks/embedding_onnx.py [--chunks 2000] [--top-k 10] [--min-agreement 0.9]
+"""
+import os
+import sys
+import time
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.embedding_ingest import make_chunks
+from core.embedding.service import DEFAULT_MODEL, load_backend
+
+QUERIES = [
+    "What insurance must a car owner have?",
+    "How long does the insurer have to pay a claim?",
+    "Are intentional damages covered?",
+    "Can health insurance exclude pre-existing conditions?",
+    "When must a change of risk be declared?",
+    "When are premiums due?",
+    "How do I change my life insurance beneficiary?",
+    "Does home insurance cover water damage?",
+]
+
+
+def encode(model, texts, batch_size):
+    return model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                        normalize_embeddings=True, show_progress_bar=False).astype(np.float32)
+
+
+def top_k(doc_vectors, query_vectors, k):
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx_int8"])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--min-agreement", type=float, default=0.9)
+    parser.add_argument("--text-file", help="Chunk this file instead of synthetic regulation text")
+    args = parser.parse_args()
+
+    texts = [c["text"] for c in make_chunks(args.chunks, args.text_file)]
+    print(f"model={DEFAULT_MODEL} chunks={len(texts)} queries={len(QUERIES)} top_k={args.top_k}")
+
+    results = {}
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        model = load_backend(backend, DEFAULT_MODEL)
+        # Warm-up so the first measurement does not include lazy init
+        encode(model, texts[:8], args.batch_size)
+        start = time.perf_counter()
+        docs = encode(model, texts, args.batch_size)
+        elapsed = time.perf_counter() - start
+        results[backend] = {
+            "docs": docs,
+            "queries": encode(model, QUERIES, args.batch_size),
+            "texts_per_s": len(texts) / elapsed if elapsed else 0.0,
+        }
+
+    reference = results["torch"]
+    ref_top = top_k(reference["docs"], reference["queries"], args.top_k)
+
+    failed = False
+    print(f"{'backend':>10} {'texts/s':>9} {'speedup':>8} {'top-k agree':>12} {'mean cos':>9}")
+    for backend, res in results.items():
+        speedup = res["texts_per_s"] / reference["texts_per_s"] if reference["texts_per_s"] else 0.0
+        if backend == "torch":
+            print(f"{backend:>10} {res['texts_per_s']:>9.1f} {speedup:>8.2f} {'-':>12} {'-':>9}")
+            continue
+        top = top_k(res["docs"], res["queries"], args.top_k)
+        agreement = np.mean([len(set(a) & set(b)) / args.top_k for a, b in zip(top, ref_top)])
+        cosine = float(np.mean(np.sum(res["docs"] * reference["docs"], axis=1)))
+        print(f"{backend:>10} {res['texts_per_s']:>9.1f} {speedup:>8.2f} {agreement:>12.3f} {cosine:>9.4f}")
+        failed = failed or agreement < args.min_agreement
+
+    if failed:
+        print(f"Top-k agreement below {args.min_agreement}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
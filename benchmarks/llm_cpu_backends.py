@@ -0,0 +1,139 @@
+"""Compare CPU inference backends (fp32, bf16, int8) on enrichment and extraction prompts.
+
+Each backend runs in its own subprocess so peak memory is measured cleanly.
+Reports load time, weight size, peak RSS, latency, tokens/sec and output
+agreement with the fp32 baseline. Every output is generated by the backend
+under test: the response cache is disabled for the benchmark and its workers.
+
+Usage:
+    python benchmarks/llm_cpu_backends.py [--backends fp32 bf16 int8] [--max-new-tokens 128]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import difflib
+import resource
+import subprocess
+
+# Force CPU before torch is imported
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+# Never replay cached completions (inherited by the per-backend workers)
+os.environ["LLM_CACHE_DISABLED"] = "1"
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+SAMPLE_TEXT = (
+    "Article 12. Every owner of a motor vehicle registered in Tunisia must hold third-party "
+    "liability insurance covering bodily injury and property damage caused to third parties. "
+    "The insurer shall indemnify the victim within thirty days of receiving the complete claim "
+    "file. Damage caused intentionally by the insured is excluded from cover."
+)
+SAMPLE_METADATA = {"country": "Tunisia", "policy_type": "Auto", "clause_type": "Requirement"}
+
+
+def build_prompts():
+    """(name, fixed prefix, per-call suffix) for the prompts we run in production."""
+    from agents.analyzer.pipeline import ENRICHMENT_PREFIX
+    from agents.graph_rag.prompts import GraphPrompts
+
+    extraction_prefix, extraction_suffix = GraphPrompts.get_extraction_parts(SAMPLE_TEXT, SAMPLE_METADATA)
+    return [
+        ("enrichment", ENRICHMENT_PREFIX, SAMPLE_TEXT),
+        ("extraction", extraction_prefix, extraction_suffix),
+    ]
+
+
+def worker(backend: str, max_new_tokens: int) -> dict:
+    import torch
+    import yaml
+    from core.llm.registry import get_model_registry, model_bytes
+
+    with open(os.path.join(ROOT, "configs", "config.yaml"), "r") as f:
+        model_id = yaml.safe_load(f).get("models", {}).get("model_id", "LiquidAI/LFM2-2.6B-Exp")
+
+    start = time.perf_counter()
+    model, tokenizer = get_model_registry().acquire(model_id, backend, token=os.environ.get("HF_TOKEN"))
+    load_s = time.perf_counter() - start
+    pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+    def run(prompt, n):
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        with torch.no_grad():
+            out = model.generate(**inputs, max_new_tokens=n, do_sample=False, pad_token_id=pad_token_id)
+        return out[0][inputs["input_ids"].shape[-1]:]
+
+    # Warm-up so the first measurement does not include lazy kernel init
+    run("Hello", 4)
+
+    results = {}
+    for name, prefix, suffix in build_prompts():
+        start = time.perf_counter()
+        new_tokens = run(prefix + suffix, max_new_tokens)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "latency_s": elapsed,
+            "tokens": int(new_tokens.shape[-1]),
+            "text": tokenizer.decode(new_tokens, skip_special_tokens=True),
+        }
+
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "weights_mb": model_bytes(model) / 1e6,
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "prompts": results,
+    }
+
+
+def run_backend(backend: str, max_new_tokens: int) -> dict:
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", backend, "--max-new-tokens", str(max_new_tokens)],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise RuntimeError(f"backend {backend} failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def agreement(text: str, baseline: str) -> float:
+    return difflib.SequenceMatcher(None, text, baseline).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["fp32", "bf16", "int8"])
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.max_new_tokens)))
+        return
+
+    backends = ["fp32"] + [b for b in args.backends if b != "fp32"]
+    reports = {}
+    for backend in backends:
+        print(f"Running {backend}...")
+        reports[backend] = run_backend(backend, args.max_new_tokens)
+
+    baseline = reports["fp32"]["prompts"]
+    print(f"\nmax_new_tokens={args.max_new_tokens}")
+    print(f"{'backend':>8} {'load s':>7} {'weights MB':>11} {'peak RSS MB':>12} "
+          f"{'prompt':>11} {'latency s':>10} {'tok/s':>7} {'vs fp32':>8} {'exact':>6}")
+    for backend, report in reports.items():
+        for name, res in report["prompts"].items():
+            ref = baseline[name]["text"]
+            tps = res["tokens"] / res["latency_s"] if res["latency_s"] else 0.0
+            print(f"{backend:>8} {report['load_s']:>7.1f} {report['weights_mb']:>11.0f} "
+                  f"{report['peak_rss_mb']:>12.0f} {name:>11} {res['latency_s']:>10.2f} {tps:>7.2f} "
+                  f"{agreement(res['text'], ref):>8.2f} {str(res['text'] == ref):>6}")
+
+
+if __name__ == "__main__":
+    main()
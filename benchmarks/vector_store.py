@@ -0,0 +1,105 @@
+"""Compare Qdrant search latency and recall with the exact local vector store.
+
+Random normalized vectors (or --text-file chunks embedded with the shared
+embedding service) are written to a fresh local store and, with --qdrant, to
+a scratch Qdrant collection. Both are queried with the same vectors. Reports
+write throughput, p50/p95 query latency and Qdrant's recall@k against the
+exact top-k of the local store.
+
+Usage:
+    python benchmarks/vector_store.py [--points 20000] [--queries 200] [--top-k 10] [--qdrant]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from agents.rag.local_store import LocalVectorStore
+
+COUNTRIES = ["Tunisia", "France", "Morocco", "Germany"]
+
+
+def make_points(n, dim, text_file=None):
+    if text_file:
+        from benchmarks.embedding_ingest import make_chunks
+        from core.embedding.service import get_embedding_service
+        texts = [c["text"] for c in make_chunks(n, text_file)]
+        vectors = get_embedding_service().encode_documents(texts)
+    else:
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((n, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        texts = [f"chunk {i}" for i in range(n)]
+    payloads = [{"text": t, "filename": f"doc{i // 50}.pdf", "country": COUNTRIES[i % len(COUNTRIES)]}
+                for i, t in enumerate(texts)]
+    return list(range(len(texts))), vectors, payloads
+
+
+def measure(store, queries, top_k, filters=None):
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        hits = store.search(q, top_k, filters=filters, with_payload=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([str(h.id) for h in hits])
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--qdrant", action="store_true", help="Also benchmark the Qdrant backend")
+    parser.add_argument("--text-file", help="Embed chunks of this file instead of random vectors")
+    args = parser.parse_args()
+
+    ids, vectors, payloads = make_points(args.points, args.dim, args.text_file)
+    dim = vectors.shape[1]
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(ids), args.queries)] + 0.05 * rng.standard_normal((args.queries, dim)).astype(np.float32)
+    print(f"points={len(ids)} dim={dim} queries={args.queries} top_k={args.top_k}")
+
+    stores = {}
+    tmp = tempfile.mkdtemp(prefix="vector_store_bench_")
+    stores["local"] = LocalVectorStore(tmp, dim)
+    if args.qdrant:
+        from agents.rag.qdrant_store import QdrantVectorStore
+        # Wait for each upsert to be applied, so the write rate covers indexing
+        # and the searches below see every point
+        qcfg = {"upsert": {"wait": True}}
+        store = QdrantVectorStore("bench_vector_store", dim, qcfg)
+        store.client.delete_collection("bench_vector_store")
+        stores["qdrant"] = QdrantVectorStore("bench_vector_store", dim, qcfg)
+
+    try:
+        print(f"{'backend':>8} {'filter':>8} {'points/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}")
+        exact = {}
+        for name, store in stores.items():
+            start = time.perf_counter()
+            store.upsert(ids, vectors, payloads)
+            write_rate = len(ids) / (time.perf_counter() - start)
+            for label, filters in (("none", None), ("country", {"country": "Tunisia"})):
+                p50, p95, results = measure(store, queries, args.top_k, filters)
+                if name == "local":
+                    exact[label] = results
+                    recall = "-"
+                else:
+                    recall = f"{np.mean([len(set(a) & set(b)) / args.top_k for a, b in zip(results, exact[label])]):.3f}"
+                print(f"{name:>8} {label:>8} {write_rate:>9.0f} {p50:>8.2f} {p95:>8.2f} {recall:>9}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if "qdrant" in stores:
+            stores["qdrant"].client.delete_collection("bench_vector_store")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""ONNX Runtime backend for the MiniLM sentence embedder, with dynamic int8 quantization.
+
+The HF encoder is exported to ONNX once and quantized with
+`onnxruntime.quantization.quantize_dynamic`. Both files are stored under
+`cache_dir`. Mean pooling and L2 normalization match the
+sentence-transformers pipeline of all-MiniLM-L6-v2, so the vectors stay
+compatible with the existing 384-dim cosine collections.
+
+`OnnxEmbedder` exposes the subset of the SentenceTransformer API that
+`EmbeddingService` uses, so the two backends are interchangeable.
+"""
+import os
+
+import numpy as np
+from transformers import AutoTokenizer
+
+DEFAULT_CACHE_DIR = "data/onnx"
+
+
+def _export(model_name: str, path: str, tokenizer):
+    import torch
+    from transformers import AutoModel
+
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    dummy = tokenizer(["insurance regulation"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    axes = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(dummy[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{name: axes for name in input_names}, "last_hidden_state": axes},
+            opset_version=14,
+        )
+
+
+class OnnxEmbedder:
+    def __init__(self, model_name: str, cache_dir: str = DEFAULT_CACHE_DIR, quantize: bool = True,
+                 max_seq_length: int = 256):
+        import onnxruntime as ort
+
+        self.model_name = model_name
+        self.max_seq_length = max_seq_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        model_dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+        os.makedirs(model_dir, exist_ok=True)
+        fp32_path = os.path.join(model_dir, "model.onnx")
+        int8_path = os.path.join(model_dir, "model.int8.onnx")
+
+        if not os.path.exists(fp32_path):
+            print(f"Exporting {model_name} to ONNX...")
+            _export(model_name, fp32_path, self.tokenizer)
+        path = fp32_path
+        if quantize:
+            if not os.path.exists(int8_path):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                print(f"Quantizing {model_name} to int8...")
+                quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+            path = int8_path
+
+        self.path = path
+        self.session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dim = self.session.get_outputs()[0].shape[-1]
+        if not isinstance(self._dim, int):
+            self._dim = int(self.encode(["dimension probe"]).shape[-1])
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dim
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {name: batch[name].astype(np.int64) for name in batch if name in self._input_names}
+            hidden = self.session.run(None, feeds)[0]
+
+            # Mean pooling over real tokens, as in the sentence-transformers Pooling module
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            outputs.append(pooled.astype(np.float32))
+
+        vectors = np.concatenate(outputs) if outputs else np.zeros((0, self._dim), dtype=np.float32)
+        if normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors[0] if single else vectors
+
+
+__all__ = ["OnnxEmbedder"]
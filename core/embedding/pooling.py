@@ -0,0 +1,47 @@
+"""Chunk vectors pooled from the sentence embeddings Chonkie already computed.
+
+`SemanticChunker` embeds every sentence with the same MiniLM model to find
+chunk boundaries. In `embedding.chunk_vectors: "pooled"` mode the chunkers
+attach a token-weighted mean of those sentence vectors to each chunk, so
+indexing does not run a second full embedding pass. A chunk of up to
+`processing.chunk_size` tokens is longer than MiniLM's 256-token window,
+so encoding it directly truncates it anyway, while pooling covers every
+sentence.
+"""
+from typing import Optional
+
+import numpy as np
+
+
+def pooled_chunk_vector(chunk, dim: Optional[int] = None) -> Optional[np.ndarray]:
+    """Normalized token-weighted mean of a chunk's sentence embeddings.
+
+    Returns None when the chunk carries no usable sentence embeddings (or
+    they have the wrong dimension), so the caller encodes the text instead.
+    """
+    sentences = getattr(chunk, "sentences", None)
+    if not sentences:
+        return None
+
+    vectors, weights = [], []
+    for sentence in sentences:
+        embedding = getattr(sentence, "embedding", None)
+        if embedding is None:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            continue
+        vectors.append(vector / norm)
+        weights.append(max(getattr(sentence, "token_count", 1) or 1, 1))
+
+    if not vectors or (dim is not None and vectors[0].shape[-1] != dim):
+        return None
+    pooled = np.average(np.stack(vectors), axis=0, weights=weights)
+    norm = np.linalg.norm(pooled)
+    if norm == 0:
+        return None
+    return (pooled / norm).astype(np.float32)
+
+
+__all__ = ["pooled_chunk_vector"]
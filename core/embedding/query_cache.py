@@ -0,0 +1,77 @@
+"""In-process LRU cache of query embeddings.
+
+Dashboard and chat questions repeat often, so `rag_search` and
+`GraphRAG.retrieve` look up the query vector here before running the model.
+Keys are the normalized query text (Unicode NFKC, case-folded, whitespace
+collapsed); entries optionally expire after `ttl_s` seconds.
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", query)).strip().casefold()
+
+
+class QueryEmbeddingCache:
+    def __init__(self, max_entries: int = 1024, ttl_s: Optional[float] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s) if ttl_s else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        key = normalize_query(query)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                vector, stored = item
+                if self.ttl_s is None or time.monotonic() - stored <= self.ttl_s:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, query: str, vector: np.ndarray):
+        key = normalize_query(query)
+        # Cached vectors are shared between callers, so make them read-only
+        vector = np.array(vector, dtype=np.float32, copy=True)
+        vector.flags.writeable = False
+        with self._lock:
+            self._entries[key] = (vector, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+__all__ = ["QueryEmbeddingCache", "normalize_query"]
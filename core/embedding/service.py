@@ -0,0 +1,242 @@
+"""Process-wide sentence embedding service.
+
+One all-MiniLM-L6-v2 instance serves the RAG handler, the analyzer pipeline,
+GraphRAG retrieval and the Chonkie chunkers. Concurrent `encode()` /
+`aencode()` calls are queued and merged into micro-batches by a worker
+thread. Results are L2-normalized float32 NumPy arrays, so dot product
+equals cosine similarity.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Union
+
+import numpy as np
+import yaml
+from sentence_transformers import SentenceTransformer
+
+from core.lazy import lazy
+from core.embedding.query_cache import QueryEmbeddingCache
+from core.embedding.store import DEFAULT_STORE_PATH, EmbeddingStore, text_hash
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+BACKENDS = ("torch", "onnx_int8", "onnx")
+
+
+def load_backend(backend: str, model_name: str, device: str = "cpu"):
+    """Return an encoder with the SentenceTransformer `encode()` API for the given backend."""
+    if backend == "torch":
+        return SentenceTransformer(model_name, device=device)
+    if backend in ("onnx", "onnx_int8"):
+        from core.embedding.onnx_backend import OnnxEmbedder
+        return OnnxEmbedder(model_name, quantize=backend == "onnx_int8")
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+
+class _EncodeRequest:
+    __slots__ = ("texts", "future")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future = Future()
+
+
+class EmbeddingService:
+    def __init__(self, model_name: str = DEFAULT_MODEL, device: str = "cpu",
+                 batch_size: int = 64, max_wait_ms: float = 5, query_cache: QueryEmbeddingCache = None,
+                 backend: str = "torch", store_path: str = None, chunk_vectors: str = "encode"):
+        self.model_name = model_name
+        self.backend = backend
+        # Using CPU by default to avoid VRAM conflicts with the LLM
+        self.model = load_backend(backend, model_name, device=device)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.query_cache = query_cache
+        # "pooled": chunkers attach vectors pooled from their sentence embeddings
+        self.chunk_vectors = chunk_vectors
+        # On-disk vectors of already-seen chunk texts; keyed per model and backend
+        # because ONNX int8 vectors differ slightly from torch ones
+        self.store = None
+        if store_path:
+            self.store = EmbeddingStore(store_path, f"{model_name}:{backend}", self.dim)
+
+        self.stats = {"requests": 0, "batches": 0, "texts": 0}
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    @property
+    def chunker_model(self):
+        """Model argument for Chonkie's SemanticChunker.
+
+        The torch model is shared directly; Chonkie cannot drive the ONNX
+        session, so with that backend it loads the model by name.
+        """
+        return self.model if self.backend == "torch" else self.model_name
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for encoding; the future resolves to an (n, dim) float32 array."""
+        request = _EncodeRequest(list(texts))
+        if not request.texts:
+            request.future.set_result(np.zeros((0, self.dim), dtype=np.float32))
+            return request.future
+        self._queue.put(request)
+        return request.future
+
+    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """Encode one text to a (dim,) vector or a list of texts to an (n, dim) matrix."""
+        if isinstance(texts, str):
+            return self.submit([texts]).result()[0]
+        return self.submit(texts).result()
+
+    def encode_documents(self, texts: List[str], precomputed: list = None) -> np.ndarray:
+        """Encode chunk texts into an (n, dim) matrix.
+
+        Rows given in `precomputed` (e.g. vectors pooled by the chunker) are
+        used as-is; the rest come from the persistent store or the model.
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        todo = []
+        for i in range(len(texts)):
+            if precomputed is not None and precomputed[i] is not None:
+                vectors[i] = precomputed[i]
+            else:
+                todo.append(i)
+        if not todo:
+            return vectors
+
+        if self.store is None:
+            vectors[todo] = self.encode([texts[i] for i in todo])
+            return vectors
+
+        hashes = {i: text_hash(texts[i]) for i in todo}
+        found = self.store.get_many(list(hashes.values()))
+        missing = [i for i in todo if hashes[i] not in found]
+        if missing:
+            encoded = self.encode([texts[i] for i in missing])
+            self.store.put_many([hashes[i] for i in missing], encoded)
+            vectors[missing] = encoded
+        for i in todo:
+            if hashes[i] in found:
+                vectors[i] = found[hashes[i]]
+        return vectors
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """Encode a search query, reusing the cached vector for repeated questions."""
+        if self.query_cache is None:
+            return self.encode(query)
+        vector = self.query_cache.get(query)
+        if vector is None:
+            vector = self.encode(query)
+            self.query_cache.set(query, vector)
+        return vector
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Encode several queries as one matrix; cached queries skip the model and the rest share one pass."""
+        if self.query_cache is None:
+            return self.encode(list(queries))
+        vectors = np.zeros((len(queries), self.dim), dtype=np.float32)
+        missing = []
+        for i, query in enumerate(queries):
+            vector = self.query_cache.get(query)
+            if vector is None:
+                missing.append(i)
+            else:
+                vectors[i] = vector
+        if missing:
+            encoded = self.encode([queries[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                self.query_cache.set(queries[i], vector)
+                vectors[i] = vector
+        return vectors
+
+    async def aencode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """Async `encode()`: awaits the micro-batch without blocking the event loop."""
+        if isinstance(texts, str):
+            return (await asyncio.wrap_future(self.submit([texts])))[0]
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        total = len(first.texts)
+        deadline = time.monotonic() + self.max_wait
+        while total < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            total += len(item.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [t for request in batch for t in request.texts]
+            try:
+                vectors = self.model.encode(
+                    texts,
+                    batch_size=self.batch_size,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False,
+                ).astype(np.float32, copy=False)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(texts)
+            start = 0
+            for request in batch:
+                end = start + len(request.texts)
+                request.future.set_result(vectors[start:end])
+                start = end
+
+
+def _load_service(config_path: str = "configs/config.yaml") -> EmbeddingService:
+    try:
+        with open(config_path, "r") as f:
+            cfg = yaml.safe_load(f).get("embedding", {}) or {}
+    except Exception:
+        cfg = {}
+    return EmbeddingService(
+        model_name=cfg.get("model", DEFAULT_MODEL),
+        device=cfg.get("device", "cpu"),
+        batch_size=cfg.get("batch_size", 64),
+        max_wait_ms=cfg.get("max_wait_ms", 5),
+        query_cache=_load_query_cache(cfg.get("query_cache", {}) or {}),
+        backend=cfg.get("backend", "torch"),
+        store_path=_store_path(cfg.get("store", {}) or {}),
+        chunk_vectors=cfg.get("chunk_vectors", "encode"),
+    )
+
+
+def _store_path(cfg: dict):
+    return cfg.get("path", DEFAULT_STORE_PATH) if cfg.get("enabled", True) else None
+
+
+def _load_query_cache(cfg: dict):
+    if not cfg.get("enabled", True):
+        return None
+    return QueryEmbeddingCache(max_entries=cfg.get("max_entries", 1024), ttl_s=cfg.get("ttl_s"))
+
+
+_service = lazy("embedding", _load_service)
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Return the shared embedding service, loading the model on first use."""
+    return _service.get()
+
+
+__all__ = ["EmbeddingService", "get_embedding_service"]
@@ -0,0 +1,74 @@
+"""Local BM25-style sparse vectors for lexical matching in Qdrant.
+
+Dense MiniLM vectors blur exact legal references ("Art. 12") and terms
+("responsabilité civile"). Each chunk also gets a sparse vector: hashed
+unigrams and bigrams weighted by BM25 term-frequency saturation and length
+normalization. The IDF part is applied by Qdrant (`Modifier.IDF` on the
+sparse vector), so nothing corpus-wide has to be computed or stored here.
+Queries weigh every distinct term 1.0, which makes the dot product the
+BM25 score.
+"""
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from typing import List, Tuple
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Only the most frequent function words; IDF takes care of the rest
+STOPWORDS = frozenset("""
+a an and are as at be by for from in is it of on or that the this to was were will with
+au aux ce ces dans de des du en est et il la le les leur ou par pas pour qui que sa se son sur un une
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, accent-folded word tokens without stopwords."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return [t for t in _TOKEN.findall(folded) if t not in STOPWORDS]
+
+
+def _terms(text: str) -> List[str]:
+    tokens = tokenize(text)
+    # Bigrams keep references and terms of art together ("art 12", "responsabilite civile")
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _index(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+
+class SparseEncoder:
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_len: float = 200.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_len = avg_doc_len
+
+    def _to_sparse(self, weights: dict) -> Tuple[List[int], List[float]]:
+        merged = {}
+        for term, weight in weights.items():
+            # Hash collisions are rare; merge them rather than send duplicate indices
+            idx = _index(term)
+            merged[idx] = merged.get(idx, 0.0) + weight
+        indices = sorted(merged)
+        return indices, [merged[i] for i in indices]
+
+    def encode_document(self, text: str) -> Tuple[List[int], List[float]]:
+        """(indices, values) with BM25 tf weights for a chunk."""
+        terms = _terms(text)
+        if not terms:
+            return [], []
+        norm = self.k1 * (1 - self.b + self.b * len(terms) / self.avg_doc_len)
+        weights = {term: tf * (self.k1 + 1) / (tf + norm) for term, tf in Counter(terms).items()}
+        return self._to_sparse(weights)
+
+    def encode_documents(self, texts: List[str]) -> List[Tuple[List[int], List[float]]]:
+        return [self.encode_document(text) for text in texts]
+
+    def encode_query(self, text: str) -> Tuple[List[int], List[float]]:
+        return self._to_sparse({term: 1.0 for term in _terms(text)})
+
+
+__all__ = ["SparseEncoder", "tokenize"]
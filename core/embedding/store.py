@@ -0,0 +1,144 @@
+"""Persistent on-disk embedding cache keyed by chunk content.
+
+Vectors live in a memory-mapped float32 matrix (`vectors.f32`), one
+directory per embedding model. A small SQLite index maps sha1(text) to a
+matrix row. Re-ingesting a document after a metadata fix or a chunker tweak
+then only encodes chunk texts that were never seen before.
+
+Several processes (the API server and the CLI ingest) may share a store:
+rows are allocated inside a `BEGIN IMMEDIATE` transaction, which holds
+SQLite's write lock across processes, so two writers never claim the same
+matrix row and a hash inserted concurrently by another writer is skipped.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List
+
+import numpy as np
+
+DEFAULT_STORE_PATH = "data/embeddings"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    def __init__(self, path: str, model_key: str, dim: int, initial_capacity: int = 4096):
+        self.dim = int(dim)
+        self.dir = os.path.join(path, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_key))
+        os.makedirs(self.dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # Autocommit mode: write transactions are opened explicitly in put_many.
+        # The timeout waits for another process's write lock instead of failing
+        self._conn = sqlite3.connect(
+            os.path.join(self.dir, "index.sqlite"), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS vectors (hash TEXT PRIMARY KEY, row INTEGER)")
+
+        self._path = os.path.join(self.dir, "vectors.f32")
+        # The file is only ever resized under the write lock
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._count = self._next_row()
+            existing = os.path.getsize(self._path) // (self.dim * 4) if os.path.exists(self._path) else 0
+            self._open(max(initial_capacity, existing, self._count))
+        finally:
+            self._conn.execute("COMMIT")
+
+    def _open(self, capacity: int):
+        needed = capacity * self.dim * 4
+        if not os.path.exists(self._path) or os.path.getsize(self._path) < needed:
+            with open(self._path, "ab") as f:
+                f.truncate(needed)
+        self._capacity = capacity
+        self._matrix = np.memmap(self._path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self._capacity:
+            return
+        self._matrix.flush()
+        del self._matrix
+        self._open(max(rows, self._capacity * 2))
+
+    def _remap(self):
+        """Map the whole file as it is now, without resizing it."""
+        self._matrix.flush()
+        del self._matrix
+        self._open(os.path.getsize(self._path) // (self.dim * 4))
+
+    def _next_row(self) -> int:
+        return self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()[0]
+
+    def _rows(self, hashes: List[str]) -> Dict[str, int]:
+        rows = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(hashes), 500):
+            part = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(part))
+            for h, row in self._conn.execute(f"SELECT hash, row FROM vectors WHERE hash IN ({placeholders})", part):
+                rows[h] = row
+        return rows
+
+    def get_many(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Return the stored vectors for the hashes that are present."""
+        with self._lock:
+            rows = self._rows(list(set(hashes)))
+            # Another process may have grown the matrix since it was mapped; it
+            # only commits rows after growing the file, so remapping is enough
+            if rows and max(rows.values()) >= self._capacity:
+                self._remap()
+            found = {h: np.array(self._matrix[row]) for h, row in rows.items()}
+        self.hits += sum(1 for h in hashes if h in found)
+        self.misses += sum(1 for h in hashes if h not in found)
+        return found
+
+    def put_many(self, hashes: List[str], vectors: np.ndarray):
+        with self._lock:
+            # The write lock is held from the existence check to the insert, so
+            # the next free row and the set of known hashes cannot change under us
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = self._rows(list(set(hashes)))
+                new = {}
+                for h, vector in zip(hashes, vectors):
+                    if h not in existing and h not in new:
+                        new[h] = vector
+                self._count = self._next_row()
+                if not new:
+                    self._conn.execute("COMMIT")
+                    return
+                self._ensure_capacity(self._count + len(new))
+                rows = []
+                for h, vector in new.items():
+                    self._matrix[self._count] = vector
+                    rows.append((h, self._count))
+                    self._count += 1
+                # Vectors hit the disk before the index references them
+                self._matrix.flush()
+                self._conn.executemany("INSERT OR IGNORE INTO vectors (hash, row) VALUES (?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._count = self._next_row()
+                raise
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.dir,
+            "entries": self._count,
+            "capacity": self._capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+__all__ = ["EmbeddingStore", "text_hash"]
@@ -0,0 +1,123 @@
+"""Lazily constructed process-wide resources and the startup timing report.
+
+Agent modules used to build their models, database drivers and clients at
+import time, which made importing the planner take minutes. A `LazyResource`
+defers the constructor to first use (or to the server warm-up) and records
+how long it took, so startup cost can be reported per component.
+
+Async code must not touch a resource that may still be building: attribute
+access on the proxy runs (or waits for) the constructor on the calling
+thread. Use `await resource.aget()`, or resolve it inside the worker thread.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+_resources: Dict[str, "LazyResource"] = {}
+_timings: List[dict] = []
+_lock = threading.Lock()
+
+
+class LazyResource:
+    """Proxy that builds `factory()` on first access and forwards attributes to it."""
+
+    def __init__(self, name: str, factory: Callable):
+        self._name = name
+        self._factory = factory
+        self._value = None
+        self._ready = False
+        self._error: Optional[str] = None
+        self._init_s = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def get(self):
+        if self._ready:
+            return self._value
+        with self._lock:
+            if not self._ready:
+                start = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                except Exception as e:
+                    self._error = str(e)
+                    raise
+                finally:
+                    self._init_s = time.perf_counter() - start
+                self._error = None
+                self._ready = True
+                print(f"[startup] {self._name} ready in {self._init_s:.2f}s")
+        return self._value
+
+    async def aget(self):
+        """`get()` for async callers: builds (or waits for) the resource in a worker thread."""
+        if self._ready:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    def __getattr__(self, attr):
+        # Only called for attributes not found on the proxy itself
+        return getattr(self.get(), attr)
+
+    def status(self) -> dict:
+        return {
+            "component": self._name,
+            "ready": self._ready,
+            "init_s": round(self._init_s, 3),
+            "error": self._error,
+        }
+
+
+def lazy(name: str, factory: Callable) -> LazyResource:
+    """Register a named lazy resource; the same name always returns the same proxy."""
+    with _lock:
+        resource = _resources.get(name)
+        if resource is None:
+            resource = LazyResource(name, factory)
+            _resources[name] = resource
+        return resource
+
+
+def record_timing(component: str, seconds: float):
+    """Record a startup step that is not a lazy resource (e.g. module imports)."""
+    with _lock:
+        _timings.append({"component": component, "ready": True, "init_s": round(seconds, 3), "error": None})
+
+
+def warm_up(names: Optional[List[str]] = None) -> List[dict]:
+    """Construct the given resources (all registered ones by default), continuing past failures."""
+    with _lock:
+        targets = [r for n, r in _resources.items() if names is None or n in names]
+    for resource in targets:
+        try:
+            resource.get()
+        except Exception as e:
+            print(f"[startup] {resource.name} failed: {e}")
+    return startup_report()
+
+
+def startup_report() -> List[dict]:
+    with _lock:
+        resources = list(_resources.values())
+        timings = list(_timings)
+    return timings + [r.status() for r in resources]
+
+
+def print_startup_report(report: Optional[List[dict]] = None):
+    report = report if report is not None else startup_report()
+    print(f"{'component':<28} {'status':<8} {'seconds':>8}")
+    for row in report:
+        status = "ready" if row["ready"] else ("error" if row["error"] else "pending")
+        print(f"{row['component']:<28} {status:<8} {row['init_s']:>8.2f}")
+    print(f"{'total':<28} {'':<8} {sum(r['init_s'] for r in report):>8.2f}")
+
+
+__all__ = ["LazyResource", "lazy", "record_timing", "warm_up", "startup_report", "print_startup_report"]
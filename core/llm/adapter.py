@@ -16,20 +16,56 @@ try:
 except Exception:
     get_llm_client = None
 
+from core.llm.cache import get_response_cache
+from core.llm.executor import get_inference_executor
+
 
 class OllamaAdapter:
-    def __init__(self, model: str = "llama3:8b", temperature: float = 0.3):
+    def __init__(self, model: str = "llama3:8b", temperature: float = 0.0):
+        self.model = model
+        self.temperature = temperature
         self.client = Ollama(model=model, temperature=temperature)
+        self._json_client = None
+        # Greedy by default: get_llm() serves extraction and analysis tasks that
+        # want deterministic output. Sampled (temperature > 0) completions are
+        # not reproducible, so only greedy decoding goes through the response cache
+        self.cache = get_response_cache() if temperature == 0 else None
 
     def generate(self, prompt: str, **kwargs) -> str:
+        if self.cache is None:
+            return self._generate(prompt)
+        params = {"backend": "ollama", "temperature": self.temperature}
+        return self.cache.get_or_generate(self.model, prompt, params, lambda: self._generate(prompt))
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        return await get_inference_executor().run(self.generate, prompt, **kwargs)
+
+    def generate_json(self, prompt: str, task: str = None, max_new_tokens=None, prefix: str = "", **kwargs) -> str:
+        """Generate a JSON value using Ollama's built-in JSON output mode."""
+        if self._json_client is None:
+            self._json_client = Ollama(model=self.model, temperature=self.temperature, format="json")
+        params = {"backend": "ollama", "temperature": self.temperature, "format": "json"}
+        if self.cache is None:
+            return self._generate(prefix + prompt, self._json_client)
+        return self.cache.get_or_generate(
+            self.model, prefix + prompt, params, lambda: self._generate(prefix + prompt, self._json_client)
+        )
+
+    async def agenerate_json(self, prompt: str, task: str = None, max_new_tokens=None, prefix: str = "", **kwargs) -> str:
+        return await get_inference_executor().run(
+            self.generate_json, prompt, task=task, max_new_tokens=max_new_tokens, prefix=prefix
+        )
+
+    def _generate(self, prompt: str, client=None) -> str:
+        client = client or self.client
         # Ollama client exposes different method names depending on version
-        if hasattr(self.client, "invoke"):
-            return self.client.invoke(prompt)
-        if hasattr(self.client, "generate"):
-            return self.client.generate(prompt)
+        if hasattr(client, "invoke"):
+            return client.invoke(prompt)
+        if hasattr(client, "generate"):
+            return client.generate(prompt)
         # Fallback to calling as a callable
         try:
-            return self.client(prompt)
+            return client(prompt)
         except Exception:
             return ""
 
@@ -52,6 +88,21 @@ class FallbackAdapter:
         except Exception:
             return ""
 
+    def generate_json(self, prompt: str, task: str = None, max_new_tokens=None, prefix: str = "", **kwargs) -> str:
+        if not self.client:
+            return ""
+        if hasattr(self.client, "generate_json"):
+            return self.client.generate_json(prompt, task=task, max_new_tokens=max_new_tokens, prefix=prefix)
+        return self.client.generate(prefix + prompt)
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        return await get_inference_executor().run(self.generate, prompt, **kwargs)
+
+    async def agenerate_json(self, prompt: str, task: str = None, max_new_tokens=None, prefix: str = "", **kwargs) -> str:
+        return await get_inference_executor().run(
+            self.generate_json, prompt, task=task, max_new_tokens=max_new_tokens, prefix=prefix
+        )
+
 
 def get_llm():
     """Return an object with a `generate(prompt)` method.
@@ -0,0 +1,153 @@
+"""Dynamic request batching for the local HF causal LM.
+
+Concurrent ``generate`` calls are pushed onto a queue; a single worker thread
+drains it into left-padded batches bounded by ``max_batch_size`` and
+``max_wait_ms`` and hands each decoded completion back to its caller.
+
+A request that carries a fixed ``prefix`` and arrives alone in its batch
+window is generated through the prefix KV cache (when one is given), so
+sequential callers keep the prefix reuse that batching would otherwise
+bypass. Requests that do share a batch are prefilled in full.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+
+from core.llm.constrained import json_generation_kwargs
+
+
+class _PendingRequest:
+    __slots__ = ("prompt", "prefix", "params", "future")
+
+    def __init__(self, prompt: str, params: tuple, prefix: str = ""):
+        self.prompt = prompt
+        self.prefix = prefix
+        self.params = params
+        self.future = Future()
+
+
+class BatchingEngine:
+    def __init__(self, model, tokenizer, max_batch_size: int = 8, max_wait_ms: float = 20, prefix_cache=None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.prefix_cache = prefix_cache
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        # Decoder-only models must be padded on the left for batched generation
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        # prefix_cached: lone requests served from the prefix KV cache instead of a batch
+        self.stats = {"requests": 0, "batches": 0, "generated_tokens": 0, "prefix_cached": 0}
+        self._queue = queue.Queue()
+        self._stopped = False
+        self._worker = threading.Thread(target=self._run, name="llm-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt: str, max_new_tokens=1024, do_sample=False, json_task=None, prefix: str = "") -> Future:
+        """Queue `prefix + prompt` and return a future resolving to the generated text.
+
+        With `json_task` set the output is constrained to JSON for that task.
+        """
+        if self._stopped:
+            raise RuntimeError("BatchingEngine has been shut down")
+        request = _PendingRequest(prompt, (int(max_new_tokens), bool(do_sample), json_task), prefix)
+        self._queue.put(request)
+        return request.future
+
+    def generate(self, prompt: str, max_new_tokens=1024, do_sample=False, json_task=None, prefix: str = "") -> str:
+        return self.submit(
+            prompt, max_new_tokens=max_new_tokens, do_sample=do_sample, json_task=json_task, prefix=prefix
+        ).result()
+
+    def shutdown(self):
+        self._stopped = True
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Requests can only share a generate() call if their params match
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.params, []).append(request)
+            for params, requests in groups.items():
+                if len(requests) == 1 and requests[0].prefix and self.prefix_cache is not None:
+                    self._generate_prefixed(requests[0], params)
+                else:
+                    self._generate_batch(requests, params)
+
+    def _generate_prefixed(self, request, params):
+        max_new_tokens, do_sample, json_task = params
+        try:
+            extra = json_generation_kwargs(self.tokenizer, json_task) if json_task else {}
+            text = self.prefix_cache.generate(
+                request.prefix, request.prompt, max_new_tokens=max_new_tokens, do_sample=do_sample, **extra
+            )
+        except Exception as e:
+            request.future.set_exception(e)
+            return
+        self.stats["requests"] += 1
+        self.stats["prefix_cached"] += 1
+        request.future.set_result(text)
+
+    def _generate_batch(self, requests, params):
+        max_new_tokens, do_sample, json_task = params
+        try:
+            extra = json_generation_kwargs(self.tokenizer, json_task) if json_task else {}
+            inputs = self.tokenizer(
+                [r.prefix + r.prompt for r in requests],
+                return_tensors="pt",
+                padding=True,
+            ).to(self.model.device)
+            with torch.no_grad():
+                outputs = self.model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=do_sample,
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    **extra,
+                )
+            new_tokens = outputs[:, inputs["input_ids"].shape[-1]:]
+            texts = self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        except Exception as e:
+            for r in requests:
+                r.future.set_exception(e)
+            return
+
+        self.stats["requests"] += len(requests)
+        self.stats["batches"] += 1
+        self.stats["generated_tokens"] += int((new_tokens != self.tokenizer.pad_token_id).sum())
+        for r, text in zip(requests, texts):
+            r.future.set_result(text)
+
+
+__all__ = ["BatchingEngine"]
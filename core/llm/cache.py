@@ -0,0 +1,148 @@
+"""Persistent, content-addressed cache for LLM completions.
+
+Entries are keyed by sha256 of (model_id, prompt, generation params) and kept
+in a small SQLite file so re-ingesting unchanged chunks skips generation.
+The file is bounded by `max_size_mb`; least recently used entries are evicted
+first.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+import yaml
+
+DEFAULT_CACHE_PATH = "data/llm_cache.sqlite"
+
+
+class ResponseCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_size_mb: float = 512):
+        self.path = path
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model_id TEXT, response TEXT,"
+            " size INTEGER, created REAL, accessed REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._size = int(row[0])
+
+    @staticmethod
+    def make_key(model_id: str, prompt: str, params: dict) -> str:
+        raw = json.dumps([model_id, prompt, params or {}], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, model_id: str, prompt: str, params: dict) -> Optional[str]:
+        key = self.make_key(model_id, prompt, params)
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, model_id: str, prompt: str, params: dict, response: str):
+        key = self.make_key(model_id, prompt, params)
+        size = len(response.encode("utf-8")) + len(key)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model_id, response, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_id, response, size, now, now),
+            )
+            self._size += size - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def get_or_generate(self, model_id: str, prompt: str, params: dict, generate_fn: Callable[[], str]) -> str:
+        """Return the cached response or call `generate_fn` and store its (non-empty) result."""
+        cached = self.get(model_id, prompt, params)
+        if cached is not None:
+            return cached
+        response = generate_fn()
+        if response:
+            self.set(model_id, prompt, params, response)
+        return response
+
+    def _evict(self):
+        # Drop least recently used entries until we are comfortably under the cap
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall()
+        for key, size in rows:
+            if self._size <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._size -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache(config_path: str = "configs/config.yaml") -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None when disabled.
+
+    `llm_cache.enabled: false` in config or LLM_CACHE_DISABLED=1 in the
+    environment (used by benchmarks) turns it off.
+    """
+    global _cache
+    if os.environ.get("LLM_CACHE_DISABLED") == "1":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                with open(config_path, "r") as f:
+                    cfg = yaml.safe_load(f).get("llm_cache", {}) or {}
+            except Exception:
+                cfg = {}
+            if not cfg.get("enabled", True):
+                return None
+            _cache = ResponseCache(
+                path=cfg.get("path", DEFAULT_CACHE_PATH),
+                max_size_mb=cfg.get("max_size_mb", 512),
+            )
+        return _cache
+
+
+__all__ = ["ResponseCache", "get_response_cache"]
@@ -1,9 +1,17 @@
 import os
 import torch
 import yaml
-from threading import Lock
+from threading import Lock, Thread
+from typing import Iterator
 from dotenv import load_dotenv
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+from transformers import TextIteratorStreamer, pipeline
+
+from core.llm.batching import BatchingEngine
+from core.llm.cache import get_response_cache
+from core.llm.constrained import json_generation_kwargs, task_budget
+from core.llm.executor import get_inference_executor
+from core.llm.prefix_cache import PrefixCache
+from core.llm.registry import get_model_registry, resolve_quantization
 
 load_dotenv()
 
@@ -25,35 +33,47 @@ class LiquidClient:
         self.token = os.environ.get("HF_TOKEN")
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         
+        # Weights come from the shared registry so other clients reuse the same copy
+        self.quantization = self.config.get("quantization", "auto")
         try:
-            print(f"Loading model: {self.model_id} on {self.device}...")
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_id, token=self.token)
-            
-            # Use explicit device placement to avoid meta tensor issues
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_id,
-                token=self.token,
-                trust_remote_code=True,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                low_cpu_mem_usage=True,
+            self.model, self.tokenizer = get_model_registry().acquire(
+                self.model_id, self.quantization, token=self.token
             )
-            
-            # Move model to GPU explicitly
-            if self.device == "cuda":
-                self.model = self.model.to("cuda")
-            
+            self.resolved_quantization = resolve_quantization(self.quantization)
+
+            # The model is already placed on its device by the registry
             self.pipe = pipeline(
                 "text-generation",
                 model=self.model,
                 tokenizer=self.tokenizer,
                 max_new_tokens=512,  # Reduced to avoid OOM
-                device=0 if self.device == "cuda" else -1
             )
             print("LiquidAI Model loaded successfully.")
         except Exception as e:
             print(f"Failed to load LiquidAI model: {e}")
             self.pipe = None
 
+        # Reuse the KV state of long fixed prompt prefixes across calls
+        self.prefix_cache = None
+        if self.pipe and (self.config.get("prefix_cache", {}) or {}).get("enabled", False):
+            self.prefix_cache = PrefixCache(self.model, self.tokenizer)
+
+        # Queue concurrent generate() calls into padded batches; a prefixed call
+        # that ends up alone in its batch window uses the prefix cache instead
+        self.batcher = None
+        batching = self.config.get("batching", {}) or {}
+        if self.pipe and batching.get("enabled", False):
+            self.batcher = BatchingEngine(
+                self.model,
+                self.tokenizer,
+                max_batch_size=batching.get("max_batch_size", 8),
+                max_wait_ms=batching.get("max_wait_ms", 20),
+                prefix_cache=self.prefix_cache,
+            )
+            print(f"LLM batching enabled (max_batch_size={self.batcher.max_batch_size}).")
+
+        self.cache = get_response_cache()
+
     def _load_config(self):
         # Fallback if config file doesn't exist or is different structure
         try:
@@ -62,13 +82,40 @@ class LiquidClient:
         except Exception:
             return {}
 
-    def generate(self, prompt: str, max_new_tokens=1024, do_sample=False) -> str:
+    def generate(self, prompt: str, max_new_tokens=1024, do_sample=False, prefix: str = "") -> str:
+        """Generate a completion for `prefix + prompt`.
+
+        `prefix` is a fixed instruction block shared by many calls; with the
+        prefix cache enabled its KV state is computed once and reused. With
+        batching also enabled, calls that share a batch are prefilled in full
+        and a call alone in its batch window uses the prefix cache. Sampled completions (`do_sample=True`) are never cached.
+        """
         if not self.pipe:
             return "Error: Model not initialized."
-        
+
+        if self.cache is None or do_sample:
+            return self._generate(prompt, max_new_tokens, do_sample, prefix)
+        params = self._cache_params(max_new_tokens=max_new_tokens, do_sample=do_sample)
+        return self.cache.get_or_generate(
+            self.model_id, prefix + prompt, params,
+            lambda: self._generate(prompt, max_new_tokens, do_sample, prefix)
+        )
+
+    async def agenerate(self, prompt: str, max_new_tokens=1024, do_sample=False, prefix: str = "") -> str:
+        """Async `generate()`: runs on the inference executor without blocking the event loop."""
+        return await get_inference_executor().run(
+            self.generate, prompt, max_new_tokens=max_new_tokens, do_sample=do_sample, prefix=prefix
+        )
+
+    def _generate(self, prompt: str, max_new_tokens: int, do_sample: bool, prefix: str = "") -> str:
         try:
+            # The batcher falls back to the prefix cache for a lone prefixed request
+            if self.batcher:
+                return self.batcher.generate(prompt, max_new_tokens=max_new_tokens, do_sample=do_sample, prefix=prefix)
+            if prefix and self.prefix_cache:
+                return self.prefix_cache.generate(prefix, prompt, max_new_tokens=max_new_tokens, do_sample=do_sample)
             outputs = self.pipe(
-                prompt,
+                prefix + prompt,
                 max_new_tokens=max_new_tokens,
                 do_sample=do_sample,
                 return_full_text=False
@@ -78,6 +125,120 @@ class LiquidClient:
             print(f"Generation error: {e}")
             return ""
 
+    def generate_json(self, prompt: str, task: str, max_new_tokens=None, prefix: str = "") -> str:
+        """Generate a JSON value for a structured task and return its text.
+
+        Decoding is constrained to valid JSON, stops as soon as the top-level
+        value closes and is capped by the task's token budget
+        (`models.json_budgets` overrides the defaults).
+        """
+        if not self.pipe:
+            return ""
+
+        budget = max_new_tokens or task_budget(task, self.config.get("json_budgets"))
+        if self.cache is None:
+            return self._generate_json(prompt, task, budget, prefix)
+        params = self._cache_params(max_new_tokens=budget, json_task=task)
+        return self.cache.get_or_generate(
+            self.model_id, prefix + prompt, params,
+            lambda: self._generate_json(prompt, task, budget, prefix)
+        )
+
+    async def agenerate_json(self, prompt: str, task: str, max_new_tokens=None, prefix: str = "") -> str:
+        """Async `generate_json()` on the inference executor."""
+        return await get_inference_executor().run(
+            self.generate_json, prompt, task, max_new_tokens=max_new_tokens, prefix=prefix
+        )
+
+    def _generate_json(self, prompt: str, task: str, max_new_tokens: int, prefix: str = "") -> str:
+        try:
+            if self.batcher:
+                return self.batcher.generate(prompt, max_new_tokens=max_new_tokens, json_task=task, prefix=prefix)
+            if prefix and self.prefix_cache:
+                return self.prefix_cache.generate(
+                    prefix, prompt, max_new_tokens=max_new_tokens,
+                    **json_generation_kwargs(self.tokenizer, task)
+                )
+            inputs = self.tokenizer(prefix + prompt, return_tensors="pt").to(self.model.device)
+            with torch.no_grad():
+                outputs = self.model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=False,
+                    pad_token_id=self._pad_token_id(),
+                    **json_generation_kwargs(self.tokenizer, task),
+                )
+            return self.tokenizer.decode(outputs[0][inputs["input_ids"].shape[-1]:], skip_special_tokens=True)
+        except Exception as e:
+            print(f"Generation error: {e}")
+            return ""
+
+    def generate_stream(self, prompt: str, max_new_tokens=1024, do_sample=False, prefix: str = "") -> Iterator[str]:
+        """Yield decoded text pieces as soon as the model produces them.
+
+        Streams never go through the batcher and use the prefix cache directly.
+        """
+        if not self.pipe:
+            yield "Error: Model not initialized."
+            return
+
+        params = self._cache_params(max_new_tokens=max_new_tokens, do_sample=do_sample)
+        # Only greedy output is deterministic enough to replay from the cache
+        cache = None if do_sample else self.cache
+        if cache is not None:
+            cached = cache.get(self.model_id, prefix + prompt, params)
+            if cached is not None:
+                yield cached
+                return
+
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+
+        def _run():
+            try:
+                if prefix and self.prefix_cache:
+                    self.prefix_cache.generate(
+                        prefix, prompt, max_new_tokens=max_new_tokens, do_sample=do_sample, streamer=streamer
+                    )
+                    return
+                inputs = self.tokenizer(prefix + prompt, return_tensors="pt").to(self.model.device)
+                self.model.generate(
+                    **inputs,
+                    streamer=streamer,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=do_sample,
+                    pad_token_id=self._pad_token_id(),
+                )
+            except Exception as e:
+                print(f"Generation error: {e}")
+                streamer.end()
+
+        thread = Thread(target=_run, daemon=True)
+        thread.start()
+        pieces = []
+        for text in streamer:
+            if text:
+                pieces.append(text)
+                yield text
+        thread.join()
+
+        if cache is not None and pieces:
+            cache.set(self.model_id, prefix + prompt, params, "".join(pieces))
+
+    def agenerate_stream(self, prompt: str, max_new_tokens=1024, do_sample=False, prefix: str = ""):
+        """Async `generate_stream()`: streams from the inference executor, holding one of its slots."""
+        return get_inference_executor().stream(
+            self.generate_stream, prompt, max_new_tokens=max_new_tokens, do_sample=do_sample, prefix=prefix
+        )
+
+    def _cache_params(self, json_task=None, **params) -> dict:
+        """Response cache key params: outputs differ between backends and with/without the JSON constraint."""
+        return {**params, "json_task": json_task, "quantization": self.resolved_quantization}
+
+    def _pad_token_id(self):
+        if self.tokenizer.pad_token_id is not None:
+            return self.tokenizer.pad_token_id
+        return self.tokenizer.eos_token_id
+
 # Simple singleton access
 def get_llm_client():
     return LiquidClient()
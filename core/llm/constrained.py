@@ -0,0 +1,180 @@
+"""Grammar-constrained JSON decoding for the local HF models.
+
+`JsonLogitsProcessor` tracks, per sequence, a character-level JSON recognizer
+and masks every candidate token that would make the output invalid JSON.
+`JsonStoppingCriteria` ends a sequence as soon as its top-level value closes,
+and `TASK_BUDGETS` caps each structured task at a sensible number of tokens.
+"""
+from typing import Optional
+
+import torch
+from transformers import LogitsProcessor, LogitsProcessorList, StoppingCriteria, StoppingCriteriaList
+
+from core.llm.json_grammar import JsonPrefixValidator, parse_json
+
+# Upper bound on new tokens per structured task; the JSON usually closes earlier
+TASK_BUDGETS = {
+    "keywords": 96,
+    "questions": 192,
+    "requirements": 384,
+    "classification": 48,
+    "query_analysis": 128,
+    "enrichment": 768,
+}
+DEFAULT_JSON_BUDGET = 256
+
+# Expected top-level JSON type per task
+TASK_ROOTS = {
+    "keywords": "array",
+    "questions": "array",
+    "requirements": "array",
+    "classification": "object",
+    "query_analysis": "object",
+    "enrichment": "object",
+}
+
+# Generated tokens decoded together with each new token, so pieces keep the
+# leading spaces that SentencePiece-style tokenizers drop from a lone token
+CONTEXT_TOKENS = 4
+
+
+class JsonLogitsProcessor(LogitsProcessor):
+    """Mask candidate tokens that would take a sequence out of the JSON grammar.
+
+    Only the `top_k` highest-scoring tokens are checked at each step. If none
+    of them is valid, the rest of the vocabulary is searched in successive
+    `top_k` blocks, in score order, until a valid continuation is found, so
+    the sequence never leaves the grammar.
+
+    The text of a token is what it adds to the decoded output after the
+    sequence's last `CONTEXT_TOKENS` tokens, the same way the generated
+    suffix decodes, rather than the token decoded on its own.
+    """
+
+    def __init__(self, tokenizer, root: Optional[str] = None, top_k: int = 32):
+        self.tokenizer = tokenizer
+        self.root = root
+        self.top_k = top_k
+        self.special_ids = set(tokenizer.all_special_ids)
+        self._validators = None
+        self._broken = None
+        self._tails = None
+        self._prompt_len = 0
+        self._fed = 0
+        self.fallbacks = 0
+
+    def _decode(self, token_ids) -> str:
+        return self.tokenizer.decode(token_ids, skip_special_tokens=False)
+
+    def _piece(self, tail: list, base: str, token_id: int) -> str:
+        """Text that `token_id` appends to the decoded `tail` (whose text is `base`)."""
+        text = self._decode(tail + [token_id])
+        return text[len(base):] if text.startswith(base) else self._decode([token_id])
+
+    def is_complete(self, row: int) -> bool:
+        return self._validators is not None and self._validators[row].complete
+
+    def advance(self, input_ids: torch.LongTensor):
+        """Feed tokens appended since the last call to each row's recognizer."""
+        if self._validators is None:
+            rows = input_ids.shape[0]
+            self._prompt_len = input_ids.shape[-1]
+            self._validators = [JsonPrefixValidator(self.root) for _ in range(rows)]
+            self._broken = [False] * rows
+            self._tails = [[] for _ in range(rows)]
+            return
+        generated = input_ids.shape[-1] - self._prompt_len
+        for pos in range(self._fed, generated):
+            for row, validator in enumerate(self._validators):
+                token_id = int(input_ids[row, self._prompt_len + pos])
+                if validator.complete or self._broken[row] or token_id in self.special_ids:
+                    continue
+                tail = self._tails[row]
+                piece = self._piece(tail, self._decode(tail), token_id)
+                self._tails[row] = (tail + [token_id])[-CONTEXT_TOKENS:]
+                if not validator.feed(piece):
+                    self._broken[row] = True
+        self._fed = max(self._fed, generated)
+
+    def _valid(self, validator: JsonPrefixValidator, tail: list, token_ids) -> list:
+        base = self._decode(tail)
+        allowed = []
+        for token_id in token_ids:
+            if token_id in self.special_ids:
+                continue
+            text = self._piece(tail, base, token_id)
+            if text and validator.copy().feed(text):
+                allowed.append(token_id)
+        return allowed
+
+    def _fallback(self, validator: JsonPrefixValidator, tail: list, row_scores: torch.FloatTensor,
+                  checked: list) -> list:
+        """Valid tokens from the best-scoring `top_k` block of the rest of the vocabulary that has any."""
+        self.fallbacks += 1
+        remaining = row_scores.clone()
+        remaining[checked] = float("-inf")
+        k = min(self.top_k, remaining.shape[-1])
+        while True:
+            values, indices = torch.topk(remaining, k)
+            block = [i for i, v in zip(indices.tolist(), values.tolist()) if v != float("-inf")]
+            if not block:
+                return []
+            allowed = self._valid(validator, tail, block)
+            if allowed:
+                return allowed
+            remaining[block] = float("-inf")
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        self.advance(input_ids)
+        k = min(self.top_k, scores.shape[-1])
+        candidates = torch.topk(scores, k, dim=-1).indices.tolist()
+        for row, validator in enumerate(self._validators):
+            if validator.complete or self._broken[row]:
+                continue
+            tail = self._tails[row]
+            allowed = (self._valid(validator, tail, candidates[row])
+                       or self._fallback(validator, tail, scores[row], candidates[row]))
+            if not allowed:
+                continue
+            mask = torch.full_like(scores[row], float("-inf"))
+            mask[allowed] = 0.0
+            scores[row] = scores[row] + mask
+        return scores
+
+
+class JsonStoppingCriteria(StoppingCriteria):
+    """Stop each sequence as soon as its top-level JSON value is closed."""
+
+    def __init__(self, processor: JsonLogitsProcessor):
+        self.processor = processor
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        self.processor.advance(input_ids)
+        done = [self.processor.is_complete(row) for row in range(input_ids.shape[0])]
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+
+def task_budget(task: str, budgets: Optional[dict] = None) -> int:
+    """Token budget for a structured task, with optional overrides from config."""
+    budgets = {**TASK_BUDGETS, **(budgets or {})}
+    return int(budgets.get(task, DEFAULT_JSON_BUDGET))
+
+
+def json_generation_kwargs(tokenizer, task: str) -> dict:
+    """Extra `model.generate()` kwargs that constrain the output to JSON for `task`."""
+    processor = JsonLogitsProcessor(tokenizer, root=TASK_ROOTS.get(task))
+    return {
+        "logits_processor": LogitsProcessorList([processor]),
+        "stopping_criteria": StoppingCriteriaList([JsonStoppingCriteria(processor)]),
+    }
+
+
+__all__ = [
+    "TASK_BUDGETS",
+    "JsonPrefixValidator",
+    "JsonLogitsProcessor",
+    "JsonStoppingCriteria",
+    "task_budget",
+    "json_generation_kwargs",
+    "parse_json",
+]
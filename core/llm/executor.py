@@ -0,0 +1,118 @@
+"""Dedicated executor for blocking LLM inference called from async code.
+
+At most `max_concurrency` inference calls run at once and at most `max_queue`
+more wait for a worker; anything beyond that is rejected immediately instead
+of piling up behind a busy model. The event loop only awaits the result, so
+other requests (including `/health`) keep being served during a generation.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when the inference queue is at capacity."""
+
+
+class InferenceExecutor:
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 64):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-infer")
+        # One slot per running or waiting call
+        self._slots = threading.BoundedSemaphore(self.max_concurrency + self.max_queue)
+        self._stats_lock = threading.Lock()
+        self.stats = {"submitted": 0, "completed": 0, "rejected": 0, "in_flight": 0}
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.stats["rejected"] += 1
+            raise InferenceQueueFull(
+                f"Inference queue full ({self.max_concurrency} running, {self.max_queue} queued)"
+            )
+        with self._stats_lock:
+            self.stats["submitted"] += 1
+            self.stats["in_flight"] += 1
+
+    def _submit(self, fn):
+        """Take a slot and submit `fn`; the slot is given back if the pool refuses it."""
+        self._acquire()
+        try:
+            return self._pool.submit(fn)
+        except BaseException:
+            self._slots.release()
+            with self._stats_lock:
+                self.stats["submitted"] -= 1
+                self.stats["in_flight"] -= 1
+            raise
+
+    async def run(self, func, *args, **kwargs):
+        """Run `func(*args, **kwargs)` on the inference pool and await its result."""
+        future = self._submit(functools.partial(func, *args, **kwargs))
+        # Release on completion rather than when the awaiting task finishes, so a
+        # cancelled request keeps its slot until the model is actually free.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def stream(self, func, *args, **kwargs):
+        """Iterate `func(*args, **kwargs)` on the inference pool, yielding its items as they arrive.
+
+        The call holds one slot until the iterator is exhausted, like `run()`.
+        """
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        done = object()
+
+        def _produce():
+            try:
+                for item in func(*args, **kwargs):
+                    loop.call_soon_threadsafe(items.put_nowait, item)
+            finally:
+                loop.call_soon_threadsafe(items.put_nowait, done)
+
+        future = self._submit(_produce)
+        future.add_done_callback(self._release)
+        while True:
+            item = await items.get()
+            if item is done:
+                break
+            yield item
+        # Surface errors raised by the producer
+        await asyncio.wrap_future(future)
+
+    def _release(self, _future):
+        self._slots.release()
+        with self._stats_lock:
+            self.stats["completed"] += 1
+            self.stats["in_flight"] -= 1
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_inference_executor(config_path: str = "configs/config.yaml") -> InferenceExecutor:
+    """Return the process-wide inference executor configured under `models.executor`."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            try:
+                with open(config_path, "r") as f:
+                    cfg = (yaml.safe_load(f).get("models", {}) or {}).get("executor", {}) or {}
+            except Exception:
+                cfg = {}
+            _executor = InferenceExecutor(
+                max_concurrency=cfg.get("max_concurrency", 8),
+                max_queue=cfg.get("max_queue", 64),
+            )
+        return _executor
+
+
+__all__ = ["InferenceExecutor", "InferenceQueueFull", "get_inference_executor"]
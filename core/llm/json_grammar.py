@@ -0,0 +1,231 @@
+"""Incremental JSON recognizer and lenient JSON parsing for LLM output.
+
+Pure Python, so it can be used (and tested) without torch; the logits
+processor in `core.llm.constrained` drives `JsonPrefixValidator` token by
+token during constrained decoding.
+"""
+import json
+from typing import Optional
+
+_WHITESPACE = " \t\n\r"
+_HEX = "0123456789abcdefABCDEF"
+_DIGITS = "0123456789"
+
+# Number grammar -?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)? as transitions between
+# phases; a number may only end in one of the _NUMBER_END phases
+_NUMBER_STEPS = {
+    "SIGN": {"0": "ZERO", "digit": "INT"},
+    "ZERO": {".": "DOT", "e": "EXP"},
+    "INT": {"0": "INT", "digit": "INT", ".": "DOT", "e": "EXP"},
+    "DOT": {"0": "FRAC", "digit": "FRAC"},
+    "FRAC": {"0": "FRAC", "digit": "FRAC", "e": "EXP"},
+    "EXP": {"0": "EXP_DIGITS", "digit": "EXP_DIGITS", "sign": "EXP_SIGN"},
+    "EXP_SIGN": {"0": "EXP_DIGITS", "digit": "EXP_DIGITS"},
+    "EXP_DIGITS": {"0": "EXP_DIGITS", "digit": "EXP_DIGITS"},
+}
+_NUMBER_END = ("ZERO", "INT", "FRAC", "EXP_DIGITS")
+
+
+def _number_class(ch: str) -> str:
+    if ch == "0":
+        return "0"
+    if ch in _DIGITS:
+        return "digit"
+    if ch in "eE":
+        return "e"
+    if ch in "+-":
+        return "sign"
+    return ch
+
+
+class JsonPrefixValidator:
+    """Incremental recognizer for a single JSON value.
+
+    `feed()` returns False as soon as the text can no longer be the prefix of a
+    valid JSON document; `complete` turns True once the top-level value closed.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root
+        self.stack = []
+        self.state = "VALUE"
+        self.started = False
+        self.complete = False
+        self.is_key = False
+        self.literal = ""
+        self.number = ""
+        self.unicode_left = 0
+
+    def copy(self) -> "JsonPrefixValidator":
+        clone = JsonPrefixValidator.__new__(JsonPrefixValidator)
+        clone.__dict__ = self.__dict__.copy()
+        clone.stack = list(self.stack)
+        return clone
+
+    def feed(self, text: str) -> bool:
+        for ch in text:
+            if not self._step(ch):
+                return False
+        return True
+
+    def _close_value(self):
+        if not self.stack:
+            self.complete = True
+            self.state = "DONE"
+        elif self.stack[-1] == "{":
+            self.state = "OBJ_NEXT"
+        else:
+            self.state = "ARR_NEXT"
+
+    def _start_value(self, ch: str) -> bool:
+        if not self.started and self.root is not None:
+            if (self.root == "object" and ch != "{") or (self.root == "array" and ch != "["):
+                return False
+        self.started = True
+        if ch == "{":
+            self.stack.append("{")
+            self.state = "OBJ_FIRST"
+        elif ch == "[":
+            self.stack.append("[")
+            self.state = "ARR_FIRST"
+        elif ch == '"':
+            self.state = "STRING"
+            self.is_key = False
+        elif ch == "-" or ch in _DIGITS:
+            self.state = "NUMBER"
+            self.number = "SIGN" if ch == "-" else _NUMBER_STEPS["SIGN"][_number_class(ch)]
+        elif ch in "tfn":
+            self.state = "LITERAL"
+            self.literal = {"t": "rue", "f": "alse", "n": "ull"}[ch]
+        else:
+            return False
+        return True
+
+    def _step(self, ch: str) -> bool:
+        state = self.state
+        if state == "STRING":
+            if ch == '"':
+                if self.is_key:
+                    self.is_key = False
+                    self.state = "COLON"
+                else:
+                    self._close_value()
+            elif ch == "\\":
+                self.state = "ESCAPE"
+            elif ord(ch) < 0x20:
+                return False
+            return True
+        if state == "ESCAPE":
+            if ch == "u":
+                self.unicode_left = 4
+                self.state = "UNICODE"
+                return True
+            if ch in '"\\/bfnrt':
+                self.state = "STRING"
+                return True
+            return False
+        if state == "UNICODE":
+            if ch not in _HEX:
+                return False
+            self.unicode_left -= 1
+            if self.unicode_left == 0:
+                self.state = "STRING"
+            return True
+        if state == "LITERAL":
+            if ch != self.literal[0]:
+                return False
+            self.literal = self.literal[1:]
+            if not self.literal:
+                self._close_value()
+            return True
+        if state == "NUMBER":
+            # self.number holds the phase of the number grammar reached so far
+            phase = _NUMBER_STEPS[self.number].get(_number_class(ch))
+            if phase is not None:
+                self.number = phase
+                return True
+            if self.number not in _NUMBER_END:
+                return False
+            self._close_value()
+            return self._step(ch)
+
+        if ch in _WHITESPACE:
+            return True
+        if state == "DONE":
+            return False
+        if state == "VALUE":
+            return self._start_value(ch)
+        if state == "OBJ_FIRST":
+            if ch == "}":
+                self.stack.pop()
+                self._close_value()
+                return True
+            state = "OBJ_KEY"
+        if state == "OBJ_KEY":
+            if ch != '"':
+                return False
+            self.state = "STRING"
+            self.is_key = True
+            return True
+        if state == "COLON":
+            if ch != ":":
+                return False
+            self.state = "VALUE"
+            return True
+        if state == "OBJ_NEXT":
+            if ch == ",":
+                self.state = "OBJ_KEY"
+            elif ch == "}":
+                self.stack.pop()
+                self._close_value()
+            else:
+                return False
+            return True
+        if state == "ARR_FIRST":
+            if ch == "]":
+                self.stack.pop()
+                self._close_value()
+                return True
+            return self._start_value(ch)
+        if state == "ARR_NEXT":
+            if ch == ",":
+                self.state = "VALUE"
+            elif ch == "]":
+                self.stack.pop()
+                self._close_value()
+            else:
+                return False
+            return True
+        return False
+
+
+def parse_json(text: str, expect: Optional[str] = None):
+    """Parse the first JSON value in `text`.
+
+    Constrained output parses directly; otherwise the first value starting at
+    `{` or `[` (as given by `expect`: "object"/"array") is decoded without the
+    greedy regex scraping that used to swallow trailing text.
+    """
+    if not text:
+        return None
+    stripped = text.strip()
+    try:
+        value = json.loads(stripped)
+        if expect is None or (expect == "object") == isinstance(value, dict):
+            return value
+    except ValueError:
+        pass
+
+    openers = {"object": "{", "array": "["}.get(expect, "{[")
+    decoder = json.JSONDecoder()
+    for idx, ch in enumerate(stripped):
+        if ch in openers:
+            try:
+                value, _ = decoder.raw_decode(stripped[idx:])
+                return value
+            except ValueError:
+                continue
+    return None
+
+
+__all__ = ["JsonPrefixValidator", "parse_json"]
@@ -0,0 +1,164 @@
+"""Process-wide registry of loaded causal LMs.
+
+`LiquidClient`, `FHClient` and everything built on them used to load their
+own copy of the same weights. The registry keys each model by
+(model_id, quantization), loads it on first `acquire()` and counts
+references; the weights are dropped once the last holder calls `release()`.
+"""
+import gc
+import threading
+import time
+
+import torch
+from transformers import AutoTokenizer, AutoModelForCausalLM
+
+# fp32/fp16/4bit as before; bf16 and int8 (dynamic quantization of the Linear
+# layers) are CPU backends that avoid the bitsandbytes/CUDA requirement
+QUANTIZATIONS = ("fp32", "fp16", "bf16", "int8", "4bit")
+
+
+def resolve_quantization(quantization: str = "auto") -> str:
+    """Map "auto" to the default for this machine: 4-bit on CUDA, fp32 on CPU."""
+    if quantization in (None, "", "auto"):
+        return "4bit" if torch.cuda.is_available() else "fp32"
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS} or 'auto'")
+    return quantization
+
+
+def _load(model_id: str, quantization: str, token=None):
+    tokenizer = AutoTokenizer.from_pretrained(model_id, token=token, trust_remote_code=True)
+
+    if quantization == "4bit":
+        from transformers import BitsAndBytesConfig
+        # 4-bit quantization for efficiency on laptop GPU
+        bnb_config = BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_compute_dtype=torch.float16,
+            bnb_4bit_use_double_quant=True,
+            bnb_4bit_quant_type="nf4"
+        )
+        model = AutoModelForCausalLM.from_pretrained(
+            model_id,
+            device_map="auto",
+            quantization_config=bnb_config,
+            token=token,
+            trust_remote_code=True
+        )
+        return model, tokenizer
+
+    dtype = {"fp16": torch.float16, "bf16": torch.bfloat16}.get(quantization, torch.float32)
+    # Use explicit device placement to avoid meta tensor issues
+    model = AutoModelForCausalLM.from_pretrained(
+        model_id,
+        token=token,
+        trust_remote_code=True,
+        torch_dtype=dtype,
+        low_cpu_mem_usage=True,
+    )
+
+    if quantization == "int8":
+        # Dynamic int8: Linear weights are stored quantized, activations are
+        # quantized on the fly. CPU-only, so the model stays off the GPU.
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.eval()
+        return model, tokenizer
+
+    if torch.cuda.is_available():
+        model = model.to("cuda")
+    return model, tokenizer
+
+
+def model_bytes(model) -> int:
+    """Bytes held by weights and buffers, including packed int8 Linear weights."""
+    total = 0
+    for value in model.state_dict().values():
+        for tensor in (value if isinstance(value, tuple) else (value,)):
+            if isinstance(tensor, torch.Tensor):
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class _Entry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.model = None
+        self.tokenizer = None
+        self.refs = 0
+        self.load_s = 0.0
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, model_id: str, quantization: str = "auto", token=None):
+        """Return (model, tokenizer) for the key, loading it on first use."""
+        key = (model_id, resolve_quantization(quantization))
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            entry.refs += 1
+
+        # Per-entry lock: concurrent first callers wait for a single load
+        with entry.lock:
+            if entry.model is None:
+                try:
+                    print(f"Loading model: {key[0]} ({key[1]})...")
+                    start = time.perf_counter()
+                    entry.model, entry.tokenizer = _load(key[0], key[1], token=token)
+                    entry.load_s = time.perf_counter() - start
+                    print(f"Model loaded in {entry.load_s:.1f}s.")
+                except Exception:
+                    with self._lock:
+                        entry.refs -= 1
+                    raise
+        return entry.model, entry.tokenizer
+
+    def release(self, model_id: str, quantization: str = "auto"):
+        """Drop one reference; the weights are freed when none are left."""
+        key = (model_id, resolve_quantization(quantization))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            del self._entries[key]
+        print(f"Unloading model: {key[0]} ({key[1]})")
+        entry.model = entry.tokenizer = None
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def stats(self) -> list:
+        with self._lock:
+            items = list(self._entries.items())
+        report = []
+        for (model_id, quantization), entry in items:
+            size = 0
+            if entry.model is not None:
+                try:
+                    size = model_bytes(entry.model)
+                except Exception:
+                    pass
+            report.append({
+                "model_id": model_id,
+                "quantization": quantization,
+                "refs": entry.refs,
+                "loaded": entry.model is not None,
+                "load_s": round(entry.load_s, 2),
+                "memory_bytes": size,
+            })
+        return report
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return _registry
+
+
+__all__ = ["ModelRegistry", "get_model_registry", "resolve_quantization", "model_bytes"]
@@ -1,4 +1,5 @@
-from typing import Any, Dict, List, Optional, Callable
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Callable
 from pydantic import BaseModel, Field
 
 class JsonRpcRequest(BaseModel):
@@ -16,11 +17,21 @@ class JsonRpcResponse(BaseModel):
 class McpHandler:
     def __init__(self):
         self.methods: Dict[str, Callable] = {}
+        self.stream_methods: Dict[str, Callable] = {}
 
     def register_tool(self, name: str, func: Callable):
         """Register a function as an MCP tool."""
         self.methods[name] = func
 
+    def register_stream_tool(self, name: str, func: Callable):
+        """Register an async generator as the streaming variant of an MCP tool.
+
+        The generator yields event dicts; a `{"type": "result", "result": ...}`
+        event carries the final JSON-RPC result, everything else is forwarded
+        as a `stream.event` notification.
+        """
+        self.stream_methods[name] = func
+
     async def handle_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle incoming JSON-RPC request."""
         try:
@@ -35,13 +46,14 @@ class McpHandler:
             # Execute method
             # Support both dict params and list params (positional)
             # For simplicity, assuming params is a dict for now as per plan
+            # Synchronous tools run in a worker thread so they cannot block the event loop
             func = self.methods[req.method]
             if isinstance(req.params, dict):
-                result = await func(**req.params) if self._is_async(func) else func(**req.params)
+                result = await func(**req.params) if self._is_async(func) else await asyncio.to_thread(func, **req.params)
             elif isinstance(req.params, list):
-                result = await func(*req.params) if self._is_async(func) else func(*req.params)
+                result = await func(*req.params) if self._is_async(func) else await asyncio.to_thread(func, *req.params)
             else:
-                result = await func() if self._is_async(func) else func()
+                result = await func() if self._is_async(func) else await asyncio.to_thread(func)
             
             return JsonRpcResponse(result=result, id=req.id).dict(exclude_none=True)
 
@@ -50,6 +62,48 @@ class McpHandler:
             traceback.print_exc()
             return self._error_response(req.id, -32000, str(e))
 
+    async def handle_stream(self, request_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Handle a JSON-RPC request, yielding notifications then the final response.
+
+        Methods without a streaming variant yield their regular response only.
+        """
+        try:
+            req = JsonRpcRequest(**request_data)
+        except Exception:
+            yield self._error_response(None, -32700, "Parse error")
+            return
+
+        func = self.stream_methods.get(req.method)
+        if func is None:
+            yield await self.handle_request(request_data)
+            return
+
+        result = None
+        try:
+            if isinstance(req.params, dict):
+                events = func(**req.params)
+            elif isinstance(req.params, list):
+                events = func(*req.params)
+            else:
+                events = func()
+
+            async for event in events:
+                if isinstance(event, dict) and event.get("type") == "result":
+                    result = event.get("result")
+                    continue
+                yield {
+                    "jsonrpc": "2.0",
+                    "method": "stream.event",
+                    "params": {"id": req.id, "event": event},
+                }
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield self._error_response(req.id, -32000, str(e))
+            return
+
+        yield JsonRpcResponse(result=result, id=req.id).dict(exclude_none=True)
+
     def _error_response(self, req_id, code, message):
         return JsonRpcResponse(
             error={"code": code, "message": message},
@@ -1,6 +1,9 @@
 from chonkie import SemanticChunker
 import yaml
 
+from core.embedding.pooling import pooled_chunk_vector
+from core.embedding.service import get_embedding_service
+
 class ChonkieChunker:
     def __init__(self, config_path="configs/config.yaml"):
         with open(config_path, "r") as f:
@@ -8,14 +11,15 @@ class ChonkieChunker:
         
         self.chunk_size = config.get("chunk_size", 800)
         self.chunk_overlap = config.get("chunk_overlap", 150)
-        self.model_name = "sentence-transformers/all-MiniLM-L6-v2"
+        embedder = get_embedding_service()
+        self.model_name = embedder.model_name
+        self.pooled_dim = embedder.dim if embedder.chunk_vectors == "pooled" else None
 
-        print(f"Initializing Chonkie SemanticChunker with model={self.model_name}...")
+        print(f"Initializing Chonkie SemanticChunker with shared model={self.model_name}...")
         self.chunker = SemanticChunker(
             chunk_size=self.chunk_size,
             overlap=self.chunk_overlap,
-            model=self.model_name,
-            device="cuda" 
+            model=embedder.chunker_model
         )
 
     def chunk_text(self, text, metadata):
@@ -35,9 +39,15 @@ class ChonkieChunker:
             if chunk_id:
                 chunk_meta["chunk_id"] = chunk_id
             
-            processed_chunks.append({
+            processed = {
                 "text": chunk_text,
                 "metadata": chunk_meta
-            })
+            }
+            # Reuse the sentence embeddings the chunker already computed
+            if self.pooled_dim:
+                vector = pooled_chunk_vector(chunk, self.pooled_dim)
+                if vector is not None:
+                    processed["vector"] = vector.tolist()
+            processed_chunks.append(processed)
             
         return processed_chunks
@@ -1,5 +1,4 @@
-import json
-import re
+from core.llm.constrained import parse_json
 from ingestion.minio_loader import MinioClient
 from ingestion.pdf_loader import IngestionPipeline as PdfPipeline # Reusing existing logic
 from ingestion.chonkie_chunker import ChonkieChunker
@@ -17,14 +16,7 @@ class Pipeline:
         self.graph_builder = GraphBuilder()
 
     def parse_json_from_llm(self, response: str):
-        try:
-            match = re.search(r'\{.*\}', response, re.DOTALL)
-            if match:
-                json_str = match.group(0)
-                return json.loads(json_str)
-        except Exception:
-            pass
-        return None
+        return parse_json(response, expect="object")
 
     def run(self):
         print("Starting Chonkie-GraphRAG Pipeline...")
@@ -60,9 +52,9 @@ class Pipeline:
                     # Optionally use chunk_data['metadata'] in graph props if needed
                     
                     print(f"Extracting from chunk {i+1}/{len(chunks)}...")
-                    prompt = GraphPrompts.get_extraction_prompt(text_content)
-                    
-                    response = self.hf_client.generate(prompt)
+                    response = self.hf_client.generate(
+                        text_content.strip(), prefix=GraphPrompts.EXTRACTION_PREFIX
+                    )
                     if response:
                         print("Cypher generated. Executing...")
                         self.graph_builder.build_graph_from_cypher(response)
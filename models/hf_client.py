@@ -1,62 +1,20 @@
 import os
 import yaml
-import torch
+from threading import Thread
+from typing import Iterator
 from dotenv import load_dotenv
-from transformers import (
-    AutoTokenizer,
-    AutoModelForCausalLM,
-    BitsAndBytesConfig
-)
+from transformers import TextIteratorStreamer
 
-load_dotenv()
-
-# Global cache (CLI mode)
-_CLI_MODEL = None
-_CLI_TOKENIZER = None
-
-
-def get_streamlit_cache():
-    try:
-        import streamlit as st
-        return st.cache_resource
-    except ImportError:
-        return lambda x: x
-
-
-@get_streamlit_cache()
-def load_model_cached(model_id, token):
-    print(f"Loading model: {model_id}")
-
-    tokenizer = AutoTokenizer.from_pretrained(
-        model_id,
-        token=token,
-        trust_remote_code=True
-    )
-    
-    # 4-bit quantization for efficiency on laptop GPU
-    bnb_config = BitsAndBytesConfig(
-        load_in_4bit=True,
-        bnb_4bit_compute_dtype=torch.float16,
-        bnb_4bit_use_double_quant=True,
-        bnb_4bit_quant_type="nf4"
-    )
-
-    model = AutoModelForCausalLM.from_pretrained(
-        model_id,
-        device_map="auto",
-        quantization_config=bnb_config,
-        token=token,
-        trust_remote_code=True
-    )
-
-    print("Model loaded successfully.")
-    return model, tokenizer
+from core.llm.cache import get_response_cache
+from core.llm.constrained import json_generation_kwargs, task_budget
+from core.llm.executor import get_inference_executor
+from core.llm.prefix_cache import PrefixCache
+from core.llm.registry import get_model_registry, resolve_quantization
 
+load_dotenv()
 
 class FHClient:
     def __init__(self, config_path="configs/config.yaml"):
-        global _CLI_MODEL, _CLI_TOKENIZER
-        
         with open(config_path, "r") as f:
             cfg = yaml.safe_load(f)["models"]
 
@@ -67,29 +25,96 @@ class FHClient:
             "LiquidAI/LFM2-2.6B-Exp"
         )
 
-        try:
-            import streamlit  # noqa
-            is_streamlit = True
-        except ImportError:
-            is_streamlit = False
+        # Shared with LiquidClient (and across Streamlit reruns) through the model registry
+        self.quantization = cfg.get("quantization", "auto")
+        self.model, self.tokenizer = get_model_registry().acquire(
+            self.model_id, self.quantization, token=self.token
+        )
+        self.resolved_quantization = resolve_quantization(self.quantization)
+
+        self.prefix_cache = None
+        if (cfg.get("prefix_cache", {}) or {}).get("enabled", False):
+            self.prefix_cache = PrefixCache(self.model, self.tokenizer, add_special_tokens=False)
+
+        self.json_budgets = cfg.get("json_budgets")
+        self.cache = get_response_cache(config_path)
+
+    def close(self):
+        """Release this client's reference to the shared model."""
+        if self.model is not None:
+            get_model_registry().release(self.model_id, self.quantization)
+            self.model = self.tokenizer = None
+            self.prefix_cache = None
+
+    def generate(self, prompt: str, max_new_tokens=1024, temperature=0.1, prefix: str = ""):
+        """Generate a reply to the user message `prefix + prompt`.
+
+        With the prefix cache enabled, the KV state of the chat template up to
+        the end of `prefix` is computed once and reused.
+        """
+        if not self.model or not self.tokenizer:
+            raise RuntimeError("Model/Tokenizer not initialized")
+
+        if self.cache is None:
+            return self._generate(prompt, max_new_tokens, prefix)
+        # Decoding is greedy, so temperature does not affect the output and stays out of the key.
+        # The "chat" flag keeps these entries apart from LiquidClient's raw-prompt completions.
+        params = self._cache_params(max_new_tokens=max_new_tokens)
+        return self.cache.get_or_generate(
+            self.model_id, prefix + prompt, params,
+            lambda: self._generate(prompt, max_new_tokens, prefix)
+        )
+
+    async def agenerate(self, prompt: str, max_new_tokens=1024, temperature=0.1, prefix: str = "") -> str:
+        """Async `generate()`: runs on the inference executor without blocking the event loop."""
+        return await get_inference_executor().run(
+            self.generate, prompt, max_new_tokens=max_new_tokens, temperature=temperature, prefix=prefix
+        )
 
-        if is_streamlit:
-            self.model, self.tokenizer = load_model_cached(self.model_id, self.token)
-        else:
-            if _CLI_MODEL is None:
-                _CLI_MODEL, _CLI_TOKENIZER = load_model_cached(self.model_id, self.token)
-            self.model, self.tokenizer = _CLI_MODEL, _CLI_TOKENIZER
+    def generate_json(self, prompt: str, task: str, max_new_tokens=None, prefix: str = "") -> str:
+        """Generate a JSON value for a structured task and return its text.
 
-    def generate(self, prompt: str, max_new_tokens=1024, temperature=0.1):
+        Decoding is constrained to valid JSON and stops once the value closes.
+        """
         if not self.model or not self.tokenizer:
             raise RuntimeError("Model/Tokenizer not initialized")
 
+        budget = max_new_tokens or task_budget(task, self.json_budgets)
+        if self.cache is None:
+            return self._generate(prompt, budget, prefix, json_task=task)
+        params = self._cache_params(max_new_tokens=budget, json_task=task)
+        return self.cache.get_or_generate(
+            self.model_id, prefix + prompt, params,
+            lambda: self._generate(prompt, budget, prefix, json_task=task)
+        )
+
+    async def agenerate_json(self, prompt: str, task: str, max_new_tokens=None, prefix: str = "") -> str:
+        """Async `generate_json()` on the inference executor."""
+        return await get_inference_executor().run(
+            self.generate_json, prompt, task, max_new_tokens=max_new_tokens, prefix=prefix
+        )
+
+    def _cache_params(self, json_task=None, **params) -> dict:
+        """Response cache key params: outputs differ between backends and with/without the JSON constraint."""
+        return {**params, "chat": True, "json_task": json_task, "quantization": self.resolved_quantization}
+
+    def _split_chat_prompt(self, prompt: str, prefix: str):
+        """Render the chat template as text and split it right after `prefix`."""
+        chat_text = self.tokenizer.apply_chat_template(
+            [{"role": "user", "content": prefix + prompt}],
+            add_generation_prompt=True,
+            tokenize=False,
+        )
+        cut = chat_text.index(prefix) + len(prefix)
+        return chat_text[:cut], chat_text[cut:]
+
+    def _chat_inputs(self, prompt: str):
         messages = [
             {"role": "user", "content": prompt},
         ]
 
         # Tokenize and apply chat template as requested
-        inputs = self.tokenizer.apply_chat_template(
+        return self.tokenizer.apply_chat_template(
             messages,
             add_generation_prompt=True,
             tokenize=True,
@@ -97,11 +122,20 @@ class FHClient:
             return_tensors="pt",
         ).to(self.model.device)
 
+    def _generate(self, prompt: str, max_new_tokens: int, prefix: str = "", json_task: str = None) -> str:
+        extra = json_generation_kwargs(self.tokenizer, json_task) if json_task else {}
+        if prefix and self.prefix_cache:
+            chat_prefix, chat_suffix = self._split_chat_prompt(prompt, prefix)
+            return self.prefix_cache.generate(chat_prefix, chat_suffix, max_new_tokens=max_new_tokens, **extra).strip()
+
+        inputs = self._chat_inputs(prefix + prompt)
+
         # Generate
         outputs = self.model.generate(
             **inputs, 
             max_new_tokens=max_new_tokens,
-            pad_token_id=self.tokenizer.eos_token_id 
+            pad_token_id=self.tokenizer.eos_token_id,
+            **extra
         )
         
         # Decode only the generated part
@@ -112,3 +146,48 @@ class FHClient:
         )
         
         return decoded_output.strip()
+
+    def generate_stream(self, prompt: str, max_new_tokens=1024, temperature=0.1, prefix: str = "") -> Iterator[str]:
+        """Yield decoded text pieces as soon as the model produces them."""
+        if not self.model or not self.tokenizer:
+            raise RuntimeError("Model/Tokenizer not initialized")
+
+        params = self._cache_params(max_new_tokens=max_new_tokens)
+        if self.cache is not None:
+            cached = self.cache.get(self.model_id, prefix + prompt, params)
+            if cached is not None:
+                yield cached
+                return
+
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+
+        def _run():
+            try:
+                if prefix and self.prefix_cache:
+                    chat_prefix, chat_suffix = self._split_chat_prompt(prompt, prefix)
+                    self.prefix_cache.generate(
+                        chat_prefix, chat_suffix, max_new_tokens=max_new_tokens, streamer=streamer
+                    )
+                    return
+                inputs = self._chat_inputs(prefix + prompt)
+                self.model.generate(
+                    **inputs,
+                    streamer=streamer,
+                    max_new_tokens=max_new_tokens,
+                    pad_token_id=self.tokenizer.eos_token_id
+                )
+            except Exception as e:
+                print(f"Generation error: {e}")
+                streamer.end()
+
+        thread = Thread(target=_run, daemon=True)
+        thread.start()
+        pieces = []
+        for text in streamer:
+            if text:
+                pieces.append(text)
+                yield text
+        thread.join()
+
+        if self.cache is not None and pieces:
+            self.cache.set(self.model_id, prefix + prompt, params, "".join(pieces).strip())
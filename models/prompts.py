@@ -4,7 +4,9 @@ class GraphPrompts:
     from regulatory or legal text.
     """
 
-    EXTRACTION_TEMPLATE = (
+    # Fixed instruction block, kept separate from the input text so its KV
+    # cache can be computed once and reused for every chunk.
+    EXTRACTION_PREFIX = (
         "You are an expert Neo4j developer.\n"
         "Your task is to convert the following regulatory text into a set of Cypher MERGE statements "
         "to build a knowledge graph.\n\n"
@@ -26,9 +28,10 @@ class GraphPrompts:
         "- Do NOT add explanations or markdown.\n"
         "- Separate statements with semicolons.\n\n"
         "Input Text:\n"
-        "{text}"
     )
 
+    EXTRACTION_TEMPLATE = EXTRACTION_PREFIX + "{text}"
+
     @staticmethod
     def get_extraction_prompt(text: str) -> str:
         return GraphPrompts.EXTRACTION_TEMPLATE.format(
@@ -7,6 +7,9 @@ except ImportError:
         def __init__(self, **kwargs): pass
         def __call__(self, text): return []
 
+from core.embedding.pooling import pooled_chunk_vector
+from core.embedding.service import get_embedding_service
+
 class DocumentChunker:
     def __init__(self, config_path="configs/config.yaml"):
         # We can still load config if we want to make it configurable, 
@@ -21,13 +24,15 @@ class DocumentChunker:
         
         self.chunk_size = config.get("chunk_size", 800)
         self.chunk_overlap = config.get("chunk_overlap", 150)
-        self.model_name = "sentence-transformers/all-MiniLM-L6-v2"
+        embedder = get_embedding_service()
+        self.model_name = embedder.model_name
+        self.pooled_dim = embedder.dim if embedder.chunk_vectors == "pooled" else None
 
-        print(f"Initializing Chonkie SemanticChunker with model={self.model_name}...")
+        print(f"Initializing Chonkie SemanticChunker with shared model={self.model_name}...")
         self.chunker = SemanticChunker(
             chunk_size=self.chunk_size,
             overlap=self.chunk_overlap,
-            model=self.model_name
+            model=embedder.chunker_model
         )
 
     def chunk_documents(self, documents):
@@ -62,6 +67,8 @@ class DocumentChunker:
                 # Optional: add chunk id if available
                 if hasattr(chunk, 'id'):
                     new_doc.metadata['chunk_id'] = chunk.id
+                # Vector pooled from the chunker's sentence embeddings (None = encode later)
+                new_doc.vector = pooled_chunk_vector(chunk, self.pooled_dim) if self.pooled_dim else None
                 
                 chunked_docs.append(new_doc)
                 
@@ -39,6 +39,7 @@ class GraphQueryEngine:
 
     def close(self):
         self.neo4j.close()
+        self.llm.close()
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.llm.executor import InferenceExecutor, InferenceQueueFull
+
+
+def test_run_returns_the_result():
+    executor = InferenceExecutor(max_concurrency=2, max_queue=0)
+    assert asyncio.run(executor.run(lambda a, b=0: a + b, 1, b=2)) == 3
+    assert executor.stats["completed"] == 1 and executor.stats["in_flight"] == 0
+
+
+def test_rejects_beyond_capacity():
+    executor = InferenceExecutor(max_concurrency=1, max_queue=0)
+    release = threading.Event()
+
+    async def main():
+        busy = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(InferenceQueueFull):
+            await executor.run(lambda: None)
+        release.set()
+        await busy
+
+    asyncio.run(main())
+    assert executor.stats["rejected"] == 1
+
+
+def test_stream_yields_items_and_holds_a_slot():
+    executor = InferenceExecutor(max_concurrency=1, max_queue=0)
+
+    async def main():
+        stream = executor.stream(lambda n: iter(range(n)), 3)
+        first = await stream.__anext__()
+        with pytest.raises(InferenceQueueFull):
+            await executor.run(lambda: None)
+        return [first] + [item async for item in stream]
+
+    assert asyncio.run(main()) == [0, 1, 2]
+
+
+def test_stream_surfaces_producer_errors():
+    executor = InferenceExecutor(max_concurrency=1, max_queue=0)
+
+    def produce():
+        yield 1
+        raise ValueError("boom")
+
+    async def main():
+        return [item async for item in executor.stream(produce)]
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
+
+
+def test_refused_submit_gives_the_slot_back():
+    executor = InferenceExecutor(max_concurrency=1, max_queue=0)
+    executor.shutdown()
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            asyncio.run(executor.run(lambda: None))
+    assert executor.stats == {"submitted": 0, "completed": 0, "rejected": 0, "in_flight": 0}
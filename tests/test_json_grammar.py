@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from core.llm.json_grammar import JsonPrefixValidator, parse_json
+
+
+def feed(text, root=None):
+    validator = JsonPrefixValidator(root)
+    return validator.feed(text), validator
+
+
+@pytest.mark.parametrize("text", [
+    '{"a": {"b": [1, 2, {"c": []}]}, "d": {}}',
+    '[[], [[1]], {"k": [true, false, null]}]',
+    '{"s": "quote \\" backslash \\\\ slash \\/ \\b\\f\\n\\r\\t"}',
+    '["\\u00e9\\u20AC", "café"]',
+    '[0, -0, 1, -12, 0.5, -3.25, 1e10, 2E-3, 4.5e+6, 0e0]',
+    '  {"a" : 1 , "b":[ ] }  ',
+])
+def test_accepts_valid_json_and_every_prefix(text):
+    json.loads(text)
+    for end in range(len(text)):
+        assert feed(text[:end])[0], text[:end]
+    ok, validator = feed(text)
+    assert ok and validator.complete
+
+
+@pytest.mark.parametrize("text", [
+    "[-]", "[0.]", "[1e]", "[1e+]", "[01]", "[-01]", "[.5]", "[1.2.3]", "[1ee2]", "[--1]", "[1+2]", "[+1]",
+])
+def test_rejects_malformed_numbers(text):
+    assert not feed(text)[0]
+
+
+@pytest.mark.parametrize("text", ["[-", "[0.", "[1e", "[1e-"])
+def test_incomplete_numbers_are_valid_prefixes(text):
+    ok, validator = feed(text)
+    assert ok and not validator.complete
+
+
+@pytest.mark.parametrize("text", ['"\\x"', '"\\u12G4"', '"line\nbreak"'])
+def test_rejects_bad_strings(text):
+    assert not feed(text)[0]
+
+
+@pytest.mark.parametrize("text,valid", [
+    ("[true, false, null]", True),
+    ("[tru]", False),
+    ("[nul", True),
+    ("[nulL]", False),
+    ("[True]", False),
+])
+def test_literals(text, valid):
+    assert feed(text)[0] is valid
+
+
+@pytest.mark.parametrize("text", ['{"a" 1}', '{a: 1}', '{"a": 1,}', "[1 2]", "[1,]", '{"a": 1}}', "[1]]"])
+def test_rejects_structural_errors(text):
+    assert not feed(text)[0]
+
+
+def test_root_type_is_enforced():
+    assert feed("[1]", root="array")[0]
+    assert not feed("[1]", root="object")[0]
+    assert feed('{"a": 1}', root="object")[0]
+    assert not feed('{"a": 1}', root="array")[0]
+    assert not feed('"text"', root="array")[0]
+    # Leading whitespace is fine before the root value
+    assert feed('\n {"a": 1}', root="object")[0]
+
+
+def test_nothing_after_the_top_level_value():
+    ok, validator = feed('{"a": 1}  ')
+    assert ok and validator.complete
+    assert not validator.feed("{")
+
+
+def test_copy_is_independent():
+    _, validator = feed('{"a": [')
+    clone = validator.copy()
+    assert clone.feed("1]}") and clone.complete
+    assert not validator.complete
+    assert validator.feed('"x"]}') and validator.complete
+
+
+def test_parse_json_direct():
+    assert parse_json('{"a": [1, 2]}') == {"a": [1, 2]}
+    assert parse_json(' ["x"] ', expect="array") == ["x"]
+
+
+def test_parse_json_with_surrounding_prose():
+    text = 'Sure! Here is the result:\n{"policy_type": "Auto", "clause_type": "Coverage"}\nHope this helps {x}.'
+    assert parse_json(text, expect="object") == {"policy_type": "Auto", "clause_type": "Coverage"}
+    assert parse_json('Keywords: ["premium", "deductible"] -- done [1]', expect="array") == ["premium", "deductible"]
+
+
+def test_parse_json_expect_selects_the_type():
+    text = 'Items ["a"] and object {"k": 1}'
+    assert parse_json(text, expect="object") == {"k": 1}
+    assert parse_json(text, expect="array") == ["a"]
+    # A bare value of the wrong type is skipped in favour of an embedded one
+    assert parse_json('["a", {"k": 1}]', expect="object") == {"k": 1}
+
+
+def test_parse_json_invalid():
+    assert parse_json("") is None
+    assert parse_json("no json here") is None
+    assert parse_json('{"a": ', expect="object") is None
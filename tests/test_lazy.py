@@ -0,0 +1,34 @@
+import asyncio
+import threading
+
+from core.lazy import LazyResource, warm_up, lazy
+
+
+def test_aget_builds_off_the_event_loop():
+    built_on = []
+    resource = LazyResource("test.aget", lambda: built_on.append(threading.current_thread()) or "value")
+
+    async def main():
+        return await resource.aget(), threading.current_thread()
+
+    value, loop_thread = asyncio.run(main())
+    assert value == "value" and resource.ready
+    assert built_on and built_on[0] is not loop_thread
+
+
+def test_failed_resource_is_rebuilt_by_a_later_warm_up():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("service down")
+        return "up"
+
+    resource = lazy("test.retry", factory)
+    report = {row["component"]: row for row in warm_up(["test.retry"])}
+    assert report["test.retry"]["error"] == "service down" and not resource.ready
+
+    report = {row["component"]: row for row in warm_up(["test.retry"])}
+    assert report["test.retry"]["ready"] and report["test.retry"]["error"] is None
+    assert resource.get() == "up" and len(attempts) == 2
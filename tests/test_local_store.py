@@ -0,0 +1,196 @@
+import zlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from agents.rag.local_store import LocalVectorStore
+from agents.rag.vector_store import get_vector_store
+
+DIM = 16
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def _payload(i):
+    return {
+        "text": f"chunk {i}",
+        "filename": f"doc{i % 3}.pdf",
+        "country": "Tunisia" if i % 2 else "France",
+        "chunk_id": i,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorStore(str(tmp_path / "regulations"), DIM, initial_capacity=8)
+    vectors = _vectors(50)
+    store.upsert([f"p{i}" for i in range(50)], vectors, [_payload(i) for i in range(50)], batch_size=16)
+    return store, vectors
+
+
+def _expected(vectors, query, top_k, rows=None):
+    rows = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    normalized = vectors[rows] / np.linalg.norm(vectors[rows], axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return [f"p{rows[i]}" for i in np.argsort(-scores)[:top_k]]
+
+
+def test_upsert_and_search_returns_the_point_itself(store):
+    store, vectors = store
+    assert store.count() == 50
+    hits = store.search(vectors[7], top_k=1)
+    assert hits[0].id == "p7"
+    assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+    assert hits[0].payload == _payload(7)
+
+
+def test_search_is_exact_top_k_in_score_order(store):
+    store, vectors = store
+    query = _vectors(1, seed=1)[0]
+    hits = store.search(query, top_k=10)
+    assert [h.id for h in hits] == _expected(vectors, query, 10)
+    scores = [h.score for h in hits]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_filters(store):
+    store, vectors = store
+    query = _vectors(1, seed=2)[0]
+    hits = store.search(query, top_k=5, filters={"country": "Tunisia"})
+    odd = [i for i in range(50) if i % 2]
+    assert [h.id for h in hits] == _expected(vectors, query, 5, odd)
+
+    hits = store.search(query, top_k=50, filters={"filename": ["doc0.pdf", "doc1.pdf"], "country": "France"})
+    assert {h.id for h in hits} == {f"p{i}" for i in range(50) if i % 2 == 0 and i % 3 in (0, 1)}
+    assert store.search(query, top_k=5, filters={"country": "Italy"}) == []
+
+
+def test_search_payload_projection(store):
+    store, vectors = store
+    hit = store.search(vectors[3], top_k=1, with_payload=["country"])[0]
+    assert hit.payload == {"country": "Tunisia"}
+    assert store.search(vectors[3], top_k=1, with_payload=False)[0].payload == {}
+
+
+def test_search_batch_matches_search(store):
+    store, _ = store
+    queries = _vectors(4, seed=3)
+    batch = store.search_batch(queries, top_k=5)
+    assert [[h.id for h in hits] for hits in batch] == [[h.id for h in store.search(q, top_k=5)] for q in queries]
+
+
+def test_delete_document_except(store):
+    store, vectors = store
+    doc0 = [i for i in range(50) if i % 3 == 0]
+    keep = [f"p{i}" for i in doc0[:2]]
+    store.delete_document_except("doc0.pdf", keep)
+    assert store.count() == 50 - len(doc0) + 2
+    hits = store.search(vectors[0], top_k=50, filters={"filename": "doc0.pdf"})
+    assert sorted(h.id for h in hits) == sorted(keep)
+    # Unfiltered search skips the freed rows too
+    assert store.search(vectors[doc0[-1]], top_k=1)[0].id != f"p{doc0[-1]}"
+
+    # Freed rows are reused by new points
+    store.upsert(["new"], _vectors(1, seed=4), [{"text": "new", "filename": "doc9.pdf"}])
+    assert store.count() == 50 - len(doc0) + 3
+    assert store.search(_vectors(1, seed=4)[0], top_k=1)[0].id == "new"
+
+
+def test_upsert_overwrites_existing_id(store):
+    store, _ = store
+    vector = _vectors(1, seed=5)
+    store.upsert(["p1"], vector, [{"text": "updated", "filename": "doc1.pdf"}])
+    assert store.count() == 50
+    hit = store.search(vector[0], top_k=1)[0]
+    assert (hit.id, hit.payload["text"]) == ("p1", "updated")
+
+
+def test_reopen_from_disk(store, tmp_path):
+    store, vectors = store
+    store.delete_document_except("doc1.pdf", [])
+    query = _vectors(1, seed=6)[0]
+    before = [(h.id, h.payload) for h in store.search(query, top_k=10)]
+
+    reopened = LocalVectorStore(str(tmp_path / "regulations"), DIM)
+    assert reopened.count() == store.count()
+    after = [(h.id, h.payload) for h in reopened.search(query, top_k=10)]
+    assert after == before
+
+
+def test_get_vector_store_local_backend(tmp_path):
+    config = {"vector_store": {"backend": "local", "path": str(tmp_path)}}
+    store = get_vector_store("regulations", DIM, config)
+    assert isinstance(store, LocalVectorStore)
+    assert store.path == str(tmp_path / "regulations")
+    with pytest.raises(ValueError):
+        get_vector_store("regulations", DIM, {"vector_store": {"backend": "faiss"}})
+
+
+class FakeEncoder:
+    """Deterministic text -> vector mapping standing in for the embedding service."""
+
+    dim = DIM
+
+    def _encode(self, text):
+        return np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(DIM).astype(np.float32)
+
+    def encode_documents(self, texts, precomputed=None):
+        return np.stack([self._encode(t) for t in texts])
+
+    def encode_queries(self, texts):
+        return self.encode_documents(texts)
+
+    def encode_query(self, text):
+        return self._encode(text)
+
+
+@pytest.fixture
+def handler(tmp_path, monkeypatch):
+    # agents.rag.db imports the embedding service and the Qdrant filter helpers
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("qdrant_client")
+    from agents.rag import db
+
+    config = {"vector_store": {"backend": "local", "path": str(tmp_path)}}
+    monkeypatch.setattr(db, "get_embedding_service", FakeEncoder)
+    monkeypatch.setattr(db, "get_vector_store", lambda collection, dim: get_vector_store(collection, dim, config))
+    return db.QdrantHandler("regulations")
+
+
+def _chunks(filename, texts, country):
+    return [
+        {"text": text, "metadata": {"filename": filename, "chunk_id": i, "country": country}}
+        for i, text in enumerate(texts)
+    ]
+
+
+def test_handler_ingest_and_search_local_backend(handler):
+    assert handler.store.backend == "local"
+    assert handler.ingest_chunks(_chunks("tn.pdf", ["motor liability", "claims within thirty days"], "Tunisia"))
+    assert handler.ingest_chunks(_chunks("fr.pdf", ["assurance habitation"], "France"))
+    assert handler.store.count() == 3
+
+    hits = handler.search("claims within thirty days", top_k=1)
+    assert hits[0]["text"] == "claims within thirty days"
+    assert hits[0]["metadata"]["country"] == "Tunisia"
+
+    hits = handler.search("claims within thirty days", top_k=3, filters={"country": "France"})
+    assert [h["text"] for h in hits] == ["assurance habitation"]
+
+    groups = handler.search_batch(["motor liability", "assurance habitation"], top_k=1)
+    assert [g["results"][0]["text"] for g in groups] == ["motor liability", "assurance habitation"]
+
+
+def test_handler_reingest_is_idempotent_and_replace_drops_stale_points(handler):
+    chunks = _chunks("tn.pdf", ["article 1", "article 2", "article 3"], "Tunisia")
+    assert handler.ingest_chunks(chunks)
+    assert handler.ingest_chunks(chunks)
+    assert handler.store.count() == 3
+
+    assert handler.ingest_chunks(_chunks("tn.pdf", ["article 1", "article 2 amended"], "Tunisia"), replace=True)
+    assert handler.store.count() == 2
+    texts = {h["text"] for h in handler.search("article", top_k=5)}
+    assert texts == {"article 1", "article 2 amended"}
@@ -1,11 +1,13 @@
 import streamlit as st
 import requests
 import uuid
+import json
 
 st.set_page_config(page_title="Tunisian Insurance Legal Assistant", layout="wide")
 
 
 API_URL = "http://localhost:8001/mcp"
+STREAM_URL = "http://localhost:8001/mcp/stream"
 
 
 # Status emoji mapping for document display
@@ -70,17 +72,41 @@ with tab1:
                         "id": str(uuid.uuid4())
                     }
                     
-                    response = requests.post(API_URL, json=payload)
-                    data = response.json()
+                    # Stream the answer over SSE and render tokens as they arrive
+                    response = requests.post(STREAM_URL, json=payload, stream=True)
+                    data = {}
+                    answer_box = st.empty()
+                    streamed = ""
+                    if response.status_code >= 400:
+                        # Show the server's error instead of an empty answer
+                        try:
+                            data = response.json()
+                        except ValueError:
+                            data = {}
+                        if not isinstance(data, dict) or "error" not in data:
+                            data = {"error": {"message": f"HTTP {response.status_code}: {response.text[:500]}"}}
+                    else:
+                        for line in response.iter_lines(decode_unicode=True):
+                            if not line or not line.startswith("data: "):
+                                continue
+                            message = json.loads(line[len("data: "):])
+                            if message.get("method") == "stream.event":
+                                event = message.get("params", {}).get("event", {})
+                                if event.get("type") == "token":
+                                    streamed += event.get("text", "")
+                                    answer_box.markdown(streamed + "▌")
+                            else:
+                                data = message
                     
                     if "error" in data:
-                         st.error(f"Agent Error: {data['error']['message']}")
+                         error = data["error"]
+                         st.error(f"Agent Error: {error.get('message', error) if isinstance(error, dict) else error}")
                     else:
-                        result = data.get("result", {})
-                        answer = result.get("answer", "No answer generated.")
+                        result = data.get("result") or {}
+                        answer = result.get("answer") or streamed or "No answer generated."
                         analysis = result.get("analysis", {})
                         
-                        st.markdown(answer)
+                        answer_box.markdown(answer)
                         
                         # Display enriched analysis information
                         with st.expander("📊 Agent Reasoning & Analysis"):